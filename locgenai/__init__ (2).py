@@ -1,6 +1,19 @@
 __version__ = "0.1.0"
 
 # Re-export useful functions for convenience:
-from .model_wrapper import get_response, find_local_answer  # noqa: F401
+from .model_wrapper import get_response, find_local_answer, preview_answer, search_local  # noqa: F401
+from .prompts import PromptTemplate, get_template  # noqa: F401
+from .backends import ModelBackend, GeminiBackend, LocalBackend, register_backend  # noqa: F401
+from .postprocess import ProcessedAnswer, process_response  # noqa: F401
+from .profiling import RequestProfile, start_profile  # noqa: F401
+from .gazetteer import extract_entities, canonicalize_entities  # noqa: F401
+from .canonical import canonical  # noqa: F401
 
-__all__ = ["__version__", "get_response", "find_local_answer"]
+__all__ = [
+    "__version__", "get_response", "find_local_answer", "preview_answer", "search_local",
+    "PromptTemplate", "get_template",
+    "ModelBackend", "GeminiBackend", "LocalBackend", "register_backend",
+    "ProcessedAnswer", "process_response",
+    "RequestProfile", "start_profile",
+    "extract_entities", "canonicalize_entities", "canonical",
+]
@@ -0,0 +1,185 @@
+# locgenai/admission.py
+# Admission control for model calls — per-session concurrency and rate caps,
+# a global in-flight limit with a bounded wait queue, and load shedding.
+#
+# Requests that are not admitted are "shed": the caller answers them from
+# local data only, so one noisy session or a burst cannot exhaust the quota
+# everyone else shares.
+
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+ADMISSION_ENABLED = os.getenv("LOCGENAI_ADMISSION", "1") != "0"
+# Model calls one session may have running at once
+SESSION_CONCURRENCY = int(os.getenv("LOCGENAI_SESSION_CONCURRENCY", "2"))
+# Sustained model calls per minute per session, and the burst above that
+SESSION_RATE_PER_MINUTE = float(os.getenv("LOCGENAI_SESSION_RATE", "12"))
+SESSION_BURST = int(os.getenv("LOCGENAI_SESSION_BURST", "4"))
+# Model calls in flight across the whole process
+GLOBAL_INFLIGHT = int(os.getenv("LOCGENAI_MAX_INFLIGHT", "8"))
+# Requests allowed to wait for a global slot, and for how long
+QUEUE_SIZE = int(os.getenv("LOCGENAI_ADMISSION_QUEUE", "16"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("LOCGENAI_ADMISSION_WAIT", "10"))
+# Sessions idle this long are forgotten
+SESSION_IDLE_SECONDS = 3600
+
+# Shed reasons
+RATE_LIMITED = "session_rate"
+SESSION_BUSY = "session_concurrency"
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+
+# ───────────────────────────────────────────────
+# CONTROLLER
+# ───────────────────────────────────────────────
+
+class _Session:
+    __slots__ = ("tokens", "updated", "inflight")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+        self.inflight = 0
+
+
+class Ticket:
+    """Outcome of `admit`: `admitted`, or shed with a `reason`."""
+
+    __slots__ = ("admitted", "reason", "waited")
+
+    def __init__(self, admitted: bool, reason: str = None, waited: float = 0.0):
+        self.admitted = admitted
+        self.reason = reason
+        self.waited = waited
+
+
+class AdmissionController:
+    """Token-bucket rate and concurrency caps per session, plus a global
+    in-flight limit whose overflow waits in a bounded queue."""
+
+    def __init__(self, session_concurrency: int = SESSION_CONCURRENCY,
+                 rate_per_minute: float = SESSION_RATE_PER_MINUTE, burst: int = SESSION_BURST,
+                 global_inflight: int = GLOBAL_INFLIGHT, queue_size: int = QUEUE_SIZE,
+                 queue_timeout: float = QUEUE_TIMEOUT_SECONDS, clock=time.monotonic):
+        self.session_concurrency = session_concurrency
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.global_inflight = global_inflight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+        self._sessions = {}
+        self._inflight = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._last_sweep = clock()
+        self.shed = Counter()
+        self.stats = {"admitted": 0, "queued": 0, "max_queue_depth": 0, "wait_seconds": 0.0}
+
+    def _session(self, session_id: str, now: float) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(float(self.burst), now)
+        else:
+            session.tokens = min(self.burst, session.tokens + (now - session.updated) * self.rate)
+            session.updated = now
+        if now - self._last_sweep > SESSION_IDLE_SECONDS:
+            self._last_sweep = now
+            for sid in [s for s, v in self._sessions.items()
+                        if not v.inflight and now - v.updated > SESSION_IDLE_SECONDS]:
+                del self._sessions[sid]
+        return session
+
+    def _try_acquire(self, session_id: str, global_slot: bool = True) -> Ticket:
+        """Run the admission steps; on success the caller owns one slot."""
+        with self._cond:
+            now = self._clock()
+            # Without a session id only the global limit applies
+            session = self._session(session_id, now) if session_id else _Session(1.0, now)
+            if session.tokens < 1:
+                return self._shed(RATE_LIMITED)
+            if session.inflight >= self.session_concurrency:
+                return self._shed(SESSION_BUSY)
+            if not global_slot:
+                session.inflight += 1
+                session.tokens -= 1
+                self.stats["admitted"] += 1
+                return Ticket(True)
+
+            waited = 0.0
+            if self._inflight >= self.global_inflight:
+                if self._waiting >= self.queue_size:
+                    return self._shed(QUEUE_FULL)
+                # A queued request already counts against its session's cap
+                session.inflight += 1
+                self._waiting += 1
+                self.stats["queued"] += 1
+                self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._waiting)
+                deadline = now + self.queue_timeout
+                try:
+                    while self._inflight >= self.global_inflight:
+                        remaining = deadline - self._clock()
+                        if remaining <= 0 or not self._cond.wait(remaining):
+                            if self._inflight >= self.global_inflight:
+                                session.inflight -= 1
+                                return self._shed(QUEUE_TIMEOUT)
+                finally:
+                    self._waiting -= 1
+                waited = self._clock() - now
+                self.stats["wait_seconds"] += waited
+            else:
+                session.inflight += 1
+
+            session.tokens -= 1
+            self._inflight += 1
+            self.stats["admitted"] += 1
+            return Ticket(True, waited=waited)
+
+    def _shed(self, reason: str) -> Ticket:
+        self.shed[reason] += 1
+        return Ticket(False, reason)
+
+    def _release(self, session_id: str, global_slot: bool = True):
+        with self._cond:
+            if global_slot:
+                self._inflight -= 1
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                session.inflight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def admit(self, session_id: str = None, global_slot: bool = True):
+        """`with admit(sid) as ticket:` — call the model only if `ticket.admitted`.
+
+        With `global_slot=False` only the session is charged: for work such
+        as a batch, whose own model calls each take a global slot.
+        """
+        ticket = self._try_acquire(session_id, global_slot)
+        try:
+            yield ticket
+        finally:
+            if ticket.admitted:
+                self._release(session_id, global_slot)
+
+    def snapshot(self) -> dict:
+        """Current queue depth, in-flight count and shed counters."""
+        with self._cond:
+            return {
+                "inflight": self._inflight,
+                "queue_depth": self._waiting,
+                "sessions": len(self._sessions),
+                "shed": dict(self.shed),
+                "shed_total": sum(self.shed.values()),
+                **self.stats,
+            }
+
+
+ADMISSION = AdmissionController() if ADMISSION_ENABLED else None
@@ -0,0 +1,188 @@
+# locgenai/answer_cache.py
+# Model answer cache — stale-while-revalidate, outage grace and negative entries
+#
+#   fresh   (age < ttl)                 serve, no model call
+#   stale   (age < ttl + revalidate)    serve now, refresh in the background
+#   grace   (age < ttl + grace)         call the model; serve this if it fails
+#   expired                             dropped
+#
+# Negative entries remember prompts the model rejected outright, so they are
+# answered without a network call until `negative_ttl` passes.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .canonical import canonical_sequence
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+ANSWER_CACHE_ENABLED = os.getenv("LOCGENAI_ANSWER_CACHE", "1") != "0"
+ANSWER_TTL_SECONDS = int(os.getenv("LOCGENAI_ANSWER_TTL", "3600"))
+# Past the TTL, stale answers are served instantly and refreshed for this long
+REVALIDATE_SECONDS = int(os.getenv("LOCGENAI_ANSWER_REVALIDATE", "3600"))
+# Past the TTL, stale answers stand in for a failing model for this long
+GRACE_SECONDS = int(os.getenv("LOCGENAI_ANSWER_GRACE", "86400"))
+NEGATIVE_TTL_SECONDS = int(os.getenv("LOCGENAI_NEGATIVE_TTL", "600"))
+MAX_ENTRIES = int(os.getenv("LOCGENAI_ANSWER_CACHE_SIZE", "4096"))
+REFRESH_WORKERS = 2
+
+FRESH, STALE, GRACE, NEGATIVE, MISS = "fresh", "stale", "grace", "negative", "miss"
+
+
+def answer_key(prompt: str, template_key: str) -> str:
+    """Cache key: canonical query words, in order, under one prompt template.
+    Script and spelling variants of a question share one entry; "kobe" and
+    "kothay" questions, or the two directions of a route, do not."""
+    return f"{template_key}|{canonical_sequence(prompt)}"
+
+# ───────────────────────────────────────────────
+# CACHE
+# ───────────────────────────────────────────────
+
+class _Entry:
+    __slots__ = ("value", "stored_at", "negative")
+
+    def __init__(self, value, stored_at: float, negative: bool = False):
+        self.value = value
+        self.stored_at = stored_at
+        self.negative = negative
+
+
+class AnswerCache:
+    """Thread-safe LRU of model answers with stale-while-revalidate lookups."""
+
+    def __init__(self, ttl: int = ANSWER_TTL_SECONDS, revalidate: int = REVALIDATE_SECONDS,
+                 grace: int = GRACE_SECONDS, negative_ttl: int = NEGATIVE_TTL_SECONDS,
+                 max_entries: int = MAX_ENTRIES, clock=time.time, executor=None):
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self.grace = max(grace, revalidate)
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._executor = executor
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "stale": 0, "grace": 0, "negative": 0, "misses": 0,
+                      "stores": 0, "refreshes": 0, "refresh_failures": 0}
+
+    def _state(self, entry: _Entry, now: float) -> str:
+        age = now - entry.stored_at
+        if entry.negative:
+            return NEGATIVE if age < self.negative_ttl else MISS
+        if age < self.ttl:
+            return FRESH
+        if age < self.ttl + self.revalidate:
+            return STALE
+        if age < self.ttl + self.grace:
+            return GRACE
+        return MISS
+
+    def lookup(self, key: str):
+        """Return (state, value); value is None on a miss."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            state = MISS if entry is None else self._state(entry, now)
+            if state == MISS:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return MISS, None
+            self._entries.move_to_end(key)
+            self.stats[state] += 1
+            return state, entry.value
+
+    def peek(self, key: str) -> str:
+        """State of `key` without counting a lookup or refreshing its LRU slot."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return MISS if entry is None else self._state(entry, self._clock())
+
+    def store(self, key: str, value):
+        self._put(key, _Entry(value, self._clock()))
+
+    def store_negative(self, key: str, value):
+        """Remember a rejected prompt and the reply to give it meanwhile."""
+        self._put(key, _Entry(value, self._clock(), negative=True))
+
+    def _put(self, key: str, entry: _Entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def export(self) -> list:
+        """Live entries as [key, value, stored_at, negative], least recent first."""
+        now = self._clock()
+        with self._lock:
+            return [[k, e.value, e.stored_at, e.negative] for k, e in self._entries.items()
+                    if self._state(e, now) != MISS]
+
+    def restore(self, rows: list) -> int:
+        """Add exported entries that are still live; returns how many."""
+        now = self._clock()
+        restored = 0
+        with self._lock:
+            for key, value, stored_at, negative in rows:
+                entry = _Entry(value, stored_at, negative)
+                if key not in self._entries and self._state(entry, now) != MISS:
+                    self._entries[key] = entry
+                    restored += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return restored
+
+    def refresh_async(self, key: str, fn) -> bool:
+        """Recompute `key` with `fn()` in the background (one refresh per key).
+
+        A falsy result keeps the stale entry; exceptions are logged.
+        Returns False if a refresh for `key` is already running.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS,
+                                                    thread_name_prefix="locgenai-refresh")
+
+        def run():
+            try:
+                value = fn()
+                if value:
+                    self.store(key, value)
+                    self.stats["refreshes"] += 1
+                else:
+                    self.stats["refresh_failures"] += 1
+            except Exception as e:
+                self.stats["refresh_failures"] += 1
+                print(f"[Answer Cache] refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+        return True
+
+    def invalidate(self, key: str = None):
+        """Forget one answer, or every answer."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+ANSWER_CACHE = AnswerCache() if ANSWER_CACHE_ENABLED else None
@@ -0,0 +1,433 @@
+# locgenai/backends.py
+# Model backends — Gemini (network) and local CPU responders behind one interface
+
+import asyncio
+import difflib
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+try:
+    import google.generativeai as genai
+except Exception:  # optional at import time — local backends still work
+    genai = None
+
+try:  # newer SDKs can cap thinking separately from the answer
+    from google.generativeai import protos as _protos
+    THINKING_CONFIG = "thinking_config" in _protos.GenerationConfig.meta.fields
+except Exception:
+    THINKING_CONFIG = False
+
+try:
+    from llama_cpp import Llama
+except Exception:
+    Llama = None
+
+from .context_cache import CONTEXT_CACHE_ENABLED, ContextCache, inline_instruction, is_cache_gone
+from .gazetteer import extract_entities
+from .generation import THINKING_TOKENS, estimate_tokens
+from .offload import MATCH_POOL, OFFLOAD_MIN_ITEMS
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+# Load Gemini API key from environment (for Hugging Face Space secret)
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+if not GEMINI_API_KEY:
+    print("⚠️ GEMINI_API_KEY not found in environment — Gemini may not work.")
+else:
+    print("✅ GEMINI_API_KEY loaded successfully.")
+
+# Configure Gemini
+if genai is not None:
+    genai.configure(api_key=GEMINI_API_KEY)
+else:
+    print("⚠️ google-generativeai not installed — only local backends available.")
+
+# Server-side cache for the shared system instruction + regional knowledge
+CONTEXT_CACHE = ContextCache() if CONTEXT_CACHE_ENABLED and genai is not None else None
+
+# Path to a GGUF model for the optional llama.cpp backend
+LOCAL_MODEL_PATH = os.getenv("LOCGENAI_LOCAL_MODEL", "")
+# Minimum similarity for the retrieval-only responder to answer on its own,
+# when it has no token-aware lookup to defer to
+LOCAL_MATCH_THRESHOLD = 0.85
+# Per-prompt local results kept for the current corpus, so routing, answering
+# and sourcing one request scan it once
+LOCAL_MEMO_SIZE = int(os.getenv("LOCGENAI_LOCAL_MEMO_SIZE", "256"))
+
+# ───────────────────────────────────────────────
+# INTERFACE
+# ───────────────────────────────────────────────
+
+class ModelBackend:
+    """Common interface: generate, stream and async generate.
+
+    `generate` returns plain text or None when the backend has no answer,
+    so callers can fall through to the next backend. `generation` is a
+    GenerationSettings; backends that decode honour it and report the
+    output length back through `generation.record`.
+    """
+
+    name = "base"
+    network = False
+
+    def available(self) -> bool:
+        return True
+
+    def generate(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        raise NotImplementedError
+
+    def stream(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        """Yield text chunks; default is a single chunk from `generate`."""
+        reply = self.generate(prompt, system_instruction, knowledge, generation)
+        if reply:
+            yield reply
+
+    async def agenerate(self, prompt: str, system_instruction: str = None, knowledge: str = "",
+                        generation=None):
+        return await asyncio.to_thread(self.generate, prompt, system_instruction, knowledge, generation)
+
+    def sources_for(self, prompt: str) -> list:
+        """Sources backing the last answer for `prompt` (local backends only)."""
+        return []
+
+# ───────────────────────────────────────────────
+# GEMINI
+# ───────────────────────────────────────────────
+
+@lru_cache(maxsize=32)
+def _get_model(model_name: str, system_instruction: str = None):
+    """Build (once) a Gemini model bound to a fixed system instruction."""
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+class PromptRejected(Exception):
+    """The model blocked the prompt itself — retrying it will not help."""
+
+
+def _block_reason(response):
+    feedback = getattr(response, "prompt_feedback", None)
+    return getattr(feedback, "block_reason", None) if feedback is not None else None
+
+
+def _text_of(response):
+    reason = _block_reason(response)
+    if reason:
+        raise PromptRejected(f"blocked ({reason})")
+    return _plain_text(response).strip() or None
+
+
+def _plain_text(response) -> str:
+    """Text of a response or stream chunk, "" if it has none — `.text` raises
+    when a candidate has no parts, e.g. when the budget went on thinking."""
+    try:
+        return getattr(response, "text", "") or ""
+    except ValueError:
+        return ""
+
+
+def _config_of(generation, model_name: str = None):
+    if generation is None:
+        return None
+    thinking = THINKING_TOKENS.get(model_name, 0)
+    config = generation.as_config(thinking)
+    if thinking and THINKING_CONFIG:
+        config["thinking_config"] = {"thinking_budget": thinking}
+    return config
+
+
+def _record_usage(generation, response, text: str):
+    """Report the output length (and whether the budget cut it off).
+
+    candidates_token_count leaves out thinking tokens, so only the answer
+    is measured against the answer budget.
+    """
+    if generation is None:
+        return
+    usage = getattr(response, "usage_metadata", None)
+    tokens = getattr(usage, "candidates_token_count", 0) or estimate_tokens(text or "")
+    candidates = getattr(response, "candidates", None) or []
+    reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+    truncated = getattr(reason, "name", None) == "MAX_TOKENS" or reason == 2
+    generation.record(tokens, truncated)
+
+
+class GeminiBackend(ModelBackend):
+    """google.generativeai model, using a cached prefix when one exists."""
+
+    network = True
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.name = model_name
+
+    def available(self) -> bool:
+        return genai is not None
+
+    def _models(self, system_instruction: str, knowledge: str):
+        """Yield (cached?, model): the cached-prefix model (if any), then the inline one."""
+        if CONTEXT_CACHE is not None and system_instruction:
+            cached = CONTEXT_CACHE.model_for(self.model_name, system_instruction, knowledge)
+            if cached is not None:
+                yield True, cached
+        yield False, _get_model(self.model_name, inline_instruction(system_instruction, knowledge))
+
+    def _failed(self, cached: bool, error: Exception, mode: str = ""):
+        print(f"[Gemini Error] {self.model_name}{mode}: {error}")
+        if cached and is_cache_gone(error):
+            # Evicted or expired server-side — drop it and go inline. Other
+            # errors keep the cache (and its failure backoff) as it is
+            CONTEXT_CACHE.invalidate(self.model_name)
+
+    def generate(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        """Call Gemini model and return plain text response."""
+        if genai is None:
+            return None
+        config = _config_of(generation, self.model_name)
+        for cached, model in self._models(system_instruction, knowledge):
+            try:
+                response = model.generate_content(prompt, generation_config=config)
+                text = _text_of(response)
+                _record_usage(generation, response, text)
+                return text
+            except PromptRejected:
+                raise
+            except Exception as e:
+                self._failed(cached, e)
+        return None
+
+    def stream(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        """Like generate, chunk by chunk; the cached prefix's fallback is only
+        tried while nothing has been yielded."""
+        if genai is None:
+            return
+        config = _config_of(generation, self.model_name)
+        for cached, model in self._models(system_instruction, knowledge):
+            chunk, produced = None, []
+            try:
+                for chunk in model.generate_content(prompt, stream=True, generation_config=config):
+                    if not produced and _block_reason(chunk):
+                        raise PromptRejected(f"blocked ({_block_reason(chunk)})")
+                    text = _plain_text(chunk)
+                    if text:
+                        produced.append(text)
+                        yield text
+                if chunk is not None:
+                    _record_usage(generation, chunk, "".join(produced))
+                return
+            except PromptRejected:
+                raise
+            except Exception as e:
+                self._failed(cached, e, " (stream)")
+                if produced:
+                    return
+
+    async def agenerate(self, prompt: str, system_instruction: str = None, knowledge: str = "",
+                        generation=None):
+        if genai is None:
+            return None
+        config = _config_of(generation, self.model_name)
+        for cached, model in self._models(system_instruction, knowledge):
+            try:
+                response = await model.generate_content_async(prompt, generation_config=config)
+                text = _text_of(response)
+                _record_usage(generation, response, text)
+                return text
+            except PromptRejected:
+                raise
+            except Exception as e:
+                self._failed(cached, e, " (async)")
+        return None
+
+# ───────────────────────────────────────────────
+# LOCAL (zero-network)
+# ───────────────────────────────────────────────
+
+CHITCHAT_REPLIES = {
+    "hi": "Hello! Ami LocGenAI — Kolkata niye ki jante chao?",
+    "hello": "Hello! Ami LocGenAI — Kolkata niye ki jante chao?",
+    "hey": "Hey! Bolo, ki help korte pari?",
+    "namaskar": "Nomoshkar! Kolkata niye kichu jiggesh korte paro.",
+    "nomoskar": "Nomoshkar! Kolkata niye kichu jiggesh korte paro.",
+    "thanks": "You're welcome! Aar kichu jante chaile bolo.",
+    "thank you": "You're welcome! Aar kichu jante chaile bolo.",
+    "dhonnobad": "Tomakeo dhonnobad! Aar kichu jante chaile bolo.",
+    "bye": "Bye! Abar esho 👋",
+}
+
+
+class LocalBackend(ModelBackend):
+    """Retrieval-only responder over the seed corpus — CPU only, no network."""
+
+    name = "local"
+
+    def __init__(self, corpus, threshold: float = LOCAL_MATCH_THRESHOLD, lookup=None):
+        # `corpus` is a callable returning the current list of {'q','a','sources'};
+        # `lookup(prompt)` returns the entry to answer with, or None — when
+        # given, it decides what is answered and `match` only scores
+        self._corpus = corpus
+        self.threshold = threshold
+        self._lookup = lookup
+        self._memo = OrderedDict()  # (kind, prompt) -> result, for `_memo_corpus` only
+        self._memo_corpus = None
+        self._memo_lock = threading.Lock()
+
+    def _memoized(self, kind: str, prompt: str, compute):
+        """`compute(prompt, corpus)`, reused until the corpus list changes."""
+        corpus = self._corpus()
+        key = (kind, prompt)
+        with self._memo_lock:
+            if self._memo_corpus is not corpus:
+                self._memo.clear()
+                self._memo_corpus = corpus
+            elif key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        value = compute(prompt, corpus)
+        with self._memo_lock:
+            if self._memo_corpus is corpus:
+                self._memo[key] = value
+                while len(self._memo) > LOCAL_MEMO_SIZE:
+                    self._memo.popitem(last=False)
+        return value
+
+    def match(self, prompt: str, threshold: float = None):
+        """Return (item, score) for the closest corpus question, or (None, 0.0).
+
+        Character similarity alone rates "local language of chennai" close
+        to "local language of kolkata", so a question naming different
+        gazetteer entities than the prompt scores 0.
+        """
+        item, score = self._memoized("closest", prompt, self._closest)
+        if item is not None and set(extract_entities(item["q"])) != set(extract_entities(prompt)):
+            return None, 0.0
+        if score < (self.threshold if threshold is None else threshold):
+            return None, score
+        return item, score
+
+    def _closest(self, prompt: str, corpus: list):
+        q = " ".join(prompt.lower().split())
+        if MATCH_POOL is not None and len(corpus) >= OFFLOAD_MIN_ITEMS:
+            # Large corpora are scanned in worker processes, off the GIL
+            pos, best_score = MATCH_POOL.best_match(corpus, q)
+            return (corpus[pos] if pos >= 0 else None), best_score
+
+        best, best_score = None, 0.0
+        matcher = difflib.SequenceMatcher(b=q, autojunk=False)
+        for item in corpus:
+            matcher.set_seq1(item["q"].lower())
+            if matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best, best_score = item, score
+        return best, best_score
+
+    def answer_item(self, prompt: str):
+        """Corpus entry to answer `prompt` with, or None."""
+        if self._lookup is not None:
+            return self._memoized("lookup", prompt, lambda p, _: self._lookup(p))
+        return self.match(prompt)[0]
+
+    def generate(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        q = " ".join(prompt.lower().split()).strip(" ?!.")
+        if q in CHITCHAT_REPLIES:
+            return CHITCHAT_REPLIES[q]
+        item = self.answer_item(prompt)
+        return item["a"] if item else None
+
+    def sources_for(self, prompt: str) -> list:
+        item = self.answer_item(prompt)
+        return list(item.get("sources", [])) if item else []
+
+
+class LlamaCppBackend(ModelBackend):
+    """Optional on-device GGUF model via llama-cpp-python (CPU)."""
+
+    name = "local-llm"
+
+    def __init__(self, model_path: str, n_ctx: int = 2048, max_tokens: int = 256):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.max_tokens = max_tokens
+        self._llm = None
+        self._lock = threading.Lock()  # llama.cpp contexts are not thread-safe
+
+    def available(self) -> bool:
+        return Llama is not None and bool(self.model_path) and os.path.exists(self.model_path)
+
+    def _get_llm(self):
+        if self._llm is None:
+            self._llm = Llama(model_path=self.model_path, n_ctx=self.n_ctx, verbose=False)
+        return self._llm
+
+    def _messages(self, prompt: str, system_instruction: str, knowledge: str):
+        messages = []
+        if estimate_tokens(knowledge) > self.n_ctx // 2:
+            knowledge = ""  # would crowd the question and answer out of a small context
+        if system_instruction:
+            messages.append({"role": "system", "content": inline_instruction(system_instruction, knowledge)})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _decode_args(self, generation) -> dict:
+        if generation is None:
+            return {"max_tokens": self.max_tokens}
+        return {"max_tokens": min(self.max_tokens, generation.max_output_tokens),
+                "temperature": generation.temperature, "stop": list(generation.stop_sequences)}
+
+    def generate(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        if not self.available():
+            return None
+        try:
+            with self._lock:
+                out = self._get_llm().create_chat_completion(
+                    messages=self._messages(prompt, system_instruction, knowledge),
+                    **self._decode_args(generation),
+                )
+            choice = out["choices"][0]
+            if generation is not None:
+                generation.record(out.get("usage", {}).get("completion_tokens", 0),
+                                  choice.get("finish_reason") == "length")
+            return choice["message"]["content"].strip() or None
+        except Exception as e:
+            print(f"[Local LLM Error] {e}")
+        return None
+
+    def stream(self, prompt: str, system_instruction: str = None, knowledge: str = "", generation=None):
+        if not self.available():
+            return
+        try:
+            with self._lock:
+                for chunk in self._get_llm().create_chat_completion(
+                    messages=self._messages(prompt, system_instruction, knowledge),
+                    stream=True,
+                    **self._decode_args(generation),
+                ):
+                    text = chunk["choices"][0]["delta"].get("content")
+                    if text:
+                        yield text
+        except Exception as e:
+            print(f"[Local LLM Error] {e}")
+
+# ───────────────────────────────────────────────
+# REGISTRY
+# ───────────────────────────────────────────────
+
+BACKENDS = {}
+
+
+def register_backend(backend: ModelBackend):
+    """Add (or replace) a backend under its name."""
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name: str) -> ModelBackend:
+    """Return a registered backend; unknown Gemini model names are created on demand."""
+    if name not in BACKENDS and name.startswith("gemini"):
+        register_backend(GeminiBackend(name))
+    return BACKENDS[name]
@@ -0,0 +1,271 @@
+# locgenai/bm25.py
+# BM25 full-text index over seed questions and answers
+#
+# Questions count twice (a cheap field boost), answers once. Per-posting
+# BM25 weights are precomputed at build time, so a query is a scatter-add
+# of a few posting lists — vectorized with numpy when it is installed.
+# The index is saved as flat binary arrays and reused while the corpus
+# hash matches, so startup does not rebuild it.
+
+import hashlib
+import io
+import json
+import math
+import mmap
+import os
+import threading
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python scoring gives the same ranking
+    np = None
+
+from .canonical import QUESTIONS, STOPWORDS, canonical
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+K1 = 1.2
+B = 0.75
+QUESTION_BOOST = 2
+# A hit answers directly only with this much of the query's weight matched...
+ANSWER_CONFIDENCE = float(os.getenv("LOCGENAI_BM25_CONFIDENCE", "0.6"))
+# ...and a raw score this high (filters matches on near-ubiquitous words)
+MIN_ANSWER_SCORE = 1.0
+INDEX_FORMAT_VERSION = 3
+_MAGIC = b"LGBM"
+_FILE_HEADER = struct.Struct("<4sII")
+
+# ───────────────────────────────────────────────
+# TOKENIZATION
+# ───────────────────────────────────────────────
+
+# Query text is canonicalized first (see locgenai.canonical): transliterated,
+# variant-folded and stopword-free. Question words carry no topic and are
+# dropped; only English plurals are folded here.
+_EN_SUFFIXES = ("ies", "es", "s")
+
+
+def _fold(token: str) -> str:
+    for suffix in _EN_SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)] + ("y" if suffix == "ies" else "")
+    return token
+
+
+def tokenize(text: str) -> list:
+    """Canonical, plural-folded tokens of `text`, never stopwords or question words."""
+    return [_fold(t) for t in canonical(text).split() if t not in STOPWORDS and t not in QUESTIONS]
+
+
+def corpus_hash(corpus) -> str:
+    digest = hashlib.sha1()
+    for item in corpus:
+        digest.update(item.get("q", "").encode("utf-8") + b"\x00")
+        digest.update(item.get("a", "").encode("utf-8") + b"\x01")
+    return digest.hexdigest()
+
+# ───────────────────────────────────────────────
+# INDEX
+# ───────────────────────────────────────────────
+
+class BM25Index:
+    """Inverted index with precomputed BM25 posting weights.
+
+    Postings live in three flat arrays: `offsets` (per term), `doc_ids`
+    and `weights`; term t's postings are the slice offsets[t]:offsets[t + 1].
+    """
+
+    def __init__(self, terms: list, idf, offsets, doc_ids, weights, doc_count: int, corpus_hash: str):
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.idf = idf
+        self.doc_count = doc_count
+        self.corpus_hash = corpus_hash
+        self.max_idf = max(idf, default=0.0)
+        self._offsets, self._doc_ids, self._weights = offsets, doc_ids, weights
+
+    @classmethod
+    def build(cls, corpus) -> "BM25Index":
+        docs = [tokenize(item.get("q", "")) * QUESTION_BOOST + tokenize(item.get("a", "")) for item in corpus]
+        lengths = [len(d) for d in docs]
+        avg_len = (sum(lengths) / len(lengths)) if lengths and sum(lengths) else 1.0
+
+        vocab, raw = {}, defaultdict(list)
+        for doc_id, tokens in enumerate(docs):
+            for term, tf in Counter(tokens).items():
+                raw[vocab.setdefault(term, len(vocab))].append((doc_id, tf))
+
+        n = len(docs)
+        idf = array("d", bytes(8 * len(vocab)))
+        offsets, doc_ids, weights = array("I", [0]), array("i"), array("d")
+        for term_id in range(len(vocab)):
+            plist = raw[term_id]
+            df = len(plist)
+            idf[term_id] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in plist:
+                norm = K1 * (1 - B + B * lengths[doc_id] / avg_len)
+                doc_ids.append(doc_id)
+                weights.append(idf[term_id] * tf * (K1 + 1) / (tf + norm))
+            offsets.append(len(doc_ids))
+        return cls._from_arrays(list(vocab), idf, offsets, doc_ids, weights, n, corpus_hash(corpus))
+
+    @classmethod
+    def _from_arrays(cls, terms, idf, offsets, doc_ids, weights, doc_count, digest):
+        if np is not None:
+            offsets, doc_ids, weights = (np.frombuffer(a, dtype=t) for a, t in
+                                         ((offsets, np.uint32), (doc_ids, np.int32), (weights, np.float64)))
+        return cls(terms, idf.tolist(), offsets, doc_ids, weights, doc_count, digest)
+
+    def search(self, query: str, k: int = 5) -> list:
+        """Top-k (doc id, score, confidence), best first.
+
+        Confidence is the score relative to an average-length document that
+        contains every query term once; unknown terms weigh as much as the
+        rarest known term, so off-corpus words lower it.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.doc_count:
+            return []
+        known = sorted(self.vocab[t] for t in terms if t in self.vocab)
+        ceiling = sum(self.idf[t] for t in known) + (len(terms) - len(known)) * self.max_idf
+        if not known or ceiling <= 0:
+            return []
+
+        off, doc_ids, weights = self._offsets, self._doc_ids, self._weights
+        if np is not None:
+            scores = np.zeros(self.doc_count)
+            for t in known:
+                # doc ids are unique within one posting list, so += is a scatter-add
+                scores[doc_ids[off[t]:off[t + 1]]] += weights[off[t]:off[t + 1]]
+            k = min(k, self.doc_count)
+            kth = -np.partition(-scores, k - 1)[k - 1]
+            # Everything tied with the k-th score, so ties break on doc id as below
+            top = np.nonzero(scores >= max(kth, 1e-12))[0]
+            ranked = sorted(((int(d), float(scores[d])) for d in top),
+                            key=lambda r: (-r[1], r[0]))[:k]
+        else:
+            acc = defaultdict(float)
+            for t in known:
+                for doc_id, weight in zip(doc_ids[off[t]:off[t + 1]], weights[off[t]:off[t + 1]]):
+                    acc[doc_id] += weight
+            ranked = sorted(acc.items(), key=lambda r: (-r[1], r[0]))[:k]
+        return [(doc_id, score, min(1.0, score / ceiling)) for doc_id, score in ranked]
+
+    def best(self, query: str, min_confidence: float = ANSWER_CONFIDENCE):
+        """(doc id, score, confidence) of a hit confident enough to answer with, or None.
+
+        Every query term must occur in the hit: a term the corpus does not
+        know, or one the document lacks ("delhi" in "famous food of delhi"),
+        vetoes the answer however well the rest matches.
+        """
+        hits = self.search(query, k=1)
+        if not hits or hits[0][2] < min_confidence or hits[0][1] < MIN_ANSWER_SCORE:
+            return None
+        doc_id = hits[0][0]
+        for term in set(tokenize(query)):
+            if term not in self.vocab or not self._has(self.vocab[term], doc_id):
+                return None
+        return hits[0]
+
+    def _has(self, term_id: int, doc_id: int) -> bool:
+        # Posting lists are in doc id order
+        lo, hi = int(self._offsets[term_id]), int(self._offsets[term_id + 1])
+        i = bisect_left(self._doc_ids, doc_id, lo, hi)
+        return i < hi and int(self._doc_ids[i]) == doc_id
+
+    # — persistence —
+    #
+    #   <4s I I>  magic b"LGBM", format version, header length
+    #   header    JSON: terms (in id order), doc_count, corpus_hash, array lengths
+    #             (space-padded so the arrays start 8-byte aligned)
+    #   arrays    idf (f64), offsets (u32), doc_ids (i32), weights (f64), native
+    #             order, each zero-padded to a multiple of 8 bytes
+
+    def write_to(self, f):
+        terms = [None] * len(self.vocab)
+        for term, i in self.vocab.items():
+            terms[i] = term
+        arrays = [array("d", self.idf), array("I", self._offsets), array("i", self._doc_ids),
+                  array("d", self._weights)]
+        header = json.dumps({"terms": terms, "doc_count": self.doc_count, "corpus_hash": self.corpus_hash,
+                             "lengths": [len(a) for a in arrays]}, ensure_ascii=False).encode("utf-8")
+        header += b" " * (-(_FILE_HEADER.size + len(header)) % 8)
+        f.write(_FILE_HEADER.pack(_MAGIC, INDEX_FORMAT_VERSION, len(header)))
+        f.write(header)
+        for a in arrays:
+            a.tofile(f)
+            f.write(bytes(-(len(a) * a.itemsize) % 8))
+
+    def to_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        self.write_to(buf)
+        return buf.getvalue()
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            self.write_to(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_buffer(cls, buf) -> "BM25Index":
+        """Index over `buf` (bytes, mmap, memoryview); with numpy the posting
+        arrays are views into it, not copies."""
+        magic, version, header_len = _FILE_HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != INDEX_FORMAT_VERSION:
+            raise ValueError(f"unsupported BM25 index format {magic!r} v{version}")
+        pos = _FILE_HEADER.size
+        header = json.loads(bytes(buf[pos:pos + header_len]).decode("utf-8"))
+        pos += header_len
+        arrays = []
+        for typecode, length in zip("dIid", header["lengths"]):
+            nbytes = length * array(typecode).itemsize
+            if np is not None:
+                arrays.append(np.frombuffer(buf, dtype=_DTYPES[typecode], count=length, offset=pos))
+            else:
+                arrays.append(array(typecode, bytes(buf[pos:pos + nbytes])))
+            pos += nbytes + (-nbytes % 8)
+        return cls._from_arrays(header["terms"], *arrays, header["doc_count"], header["corpus_hash"])
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "rb") as f:
+            return cls.from_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+_DTYPES = {"d": "=f8", "I": "=u4", "i": "=i4"}
+_build_lock = threading.Lock()
+_preloaded = {}  # corpus hash -> index restored from a snapshot
+
+
+def preload(index: BM25Index):
+    """Offer an already-loaded index to `load_or_build` for its corpus."""
+    _preloaded[index.corpus_hash] = index
+
+
+def load_or_build(corpus, path: str = None) -> BM25Index:
+    """Preloaded or saved index for this exact corpus if there is one, else
+    build (and save)."""
+    digest = corpus_hash(corpus)
+    with _build_lock:
+        if digest in _preloaded:
+            return _preloaded.pop(digest)
+        if path and os.path.exists(path):
+            try:
+                index = BM25Index.load(path)
+                if index.corpus_hash == digest:
+                    return index
+            except Exception as e:
+                print(f"⚠️ Rebuilding BM25 index ({e})")
+        index = BM25Index.build(corpus)
+        if path:
+            try:
+                index.save(path)
+            except OSError as e:
+                print(f"⚠️ Could not save BM25 index: {e}")
+        return index
@@ -0,0 +1,199 @@
+# locgenai/canonical.py
+# Query canonicalization — one form for Bengali script, Benglish and English
+#
+#   NFC + casefold → gazetteer entities → Bengali case endings
+#   → Bengali→Latin transliteration → spelling-variant folding
+#   → question words and concepts → stopwords
+#
+# "কলকাতায় কী খাবো", "kolkatay ki khabo" and "Calcutta te ki khabo?" all
+# become "kolkata what food". Question words are kept — "kobe" and
+# "kothay" ask different things — so caches can key on this form.
+
+import re
+from functools import lru_cache
+
+from .gazetteer import canonicalize_entities, normalize
+
+# ───────────────────────────────────────────────
+# TRANSLITERATION (Bengali → Latin)
+# ───────────────────────────────────────────────
+
+# A plain phonetic romanization, close to how users type Benglish
+_CONSONANTS = {
+    "ক": "k", "খ": "kh", "গ": "g", "ঘ": "gh", "ঙ": "ng", "চ": "ch", "ছ": "chh", "জ": "j",
+    "ঝ": "jh", "ঞ": "n", "ট": "t", "ঠ": "th", "ড": "d", "ঢ": "dh", "ণ": "n", "ত": "t",
+    "থ": "th", "দ": "d", "ধ": "dh", "ন": "n", "প": "p", "ফ": "ph", "ব": "b", "ভ": "bh",
+    "ম": "m", "য": "j", "র": "r", "ল": "l", "শ": "sh", "ষ": "sh", "স": "s", "হ": "h",
+    "\u09dc": "r", "\u09dd": "rh", "\u09df": "y",  # ড় ঢ় য়
+}
+_VOWELS = {
+    "অ": "o", "আ": "a", "ই": "i", "ঈ": "i", "উ": "u", "ঊ": "u", "ঋ": "ri", "এ": "e",
+    "ঐ": "oi", "ও": "o", "ঔ": "ou",
+}
+_VOWEL_SIGNS = {
+    "া": "a", "ি": "i", "ী": "i", "ু": "u", "ূ": "u", "ৃ": "ri", "ে": "e", "ৈ": "oi",
+    "ো": "o", "ৌ": "ou",
+}
+_OTHERS = {"ৎ": "t", "ং": "ng", "ঃ": "h", "ঁ": "", "়": ""}
+_VIRAMA = "্"
+# NFC leaves ড় ঢ় য় decomposed (consonant + nukta)
+_NUKTA_FORMS = {"\u09a1\u09bc": "\u09dc", "\u09a2\u09bc": "\u09dd", "\u09af\u09bc": "\u09df"}
+_BENGALI = re.compile(r"[ঀ-৿]+")
+
+
+def _romanize_word(word: str) -> str:
+    for decomposed, letter in _NUKTA_FORMS.items():
+        word = word.replace(decomposed, letter)
+    out = []
+    for i, ch in enumerate(word):
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            nxt = word[i + 1] if i + 1 < len(word) else ""
+            # Inherent vowel, except word-finally and where a sign or virama follows
+            if nxt and nxt not in _VOWEL_SIGNS and nxt != _VIRAMA and nxt not in _OTHERS:
+                out.append("o")
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch in _VOWEL_SIGNS:
+            out.append(_VOWEL_SIGNS[ch])
+        elif ch in _OTHERS:
+            out.append(_OTHERS[ch])
+        elif "০" <= ch <= "৯":
+            out.append(str(ord(ch) - ord("০")))
+    return "".join(out)
+
+
+def transliterate(text: str) -> str:
+    """Romanize every Bengali-script run in `text`; Latin text is unchanged."""
+    return _BENGALI.sub(lambda m: _romanize_word(m.group()), text)
+
+# ───────────────────────────────────────────────
+# FOLDING
+# ───────────────────────────────────────────────
+
+# Bengali case and plural endings, stripped before transliteration; the
+# short genitive/locative forms only follow a vowel (কলকাতার, কলকাতায়)
+_BN_SUFFIXES = ("গুলো", "গুলি", "দের", "েরা", "ের", "কে", "তে")
+_BN_AFTER_VOWEL = ("য়", "র")
+
+# Romanized spellings that vary from user to user, folded to one key:
+# aspirates, doubled letters, long vowels, v/b, z/j, final y/i
+_VARIANTS = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"([kgtdpbj])h"), r"\1"),
+    (re.compile(r"chh"), "ch"),
+    (re.compile(r"sh"), "s"),
+    (re.compile(r"v"), "b"),
+    (re.compile(r"z"), "j"),
+    (re.compile(r"ee"), "i"),
+    (re.compile(r"oo"), "u"),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+    (re.compile(r"(?<=[a-z])y$"), "i"),
+]
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _strip_bn_suffix(match) -> str:
+    word = match.group()
+    for suffix in _BN_SUFFIXES:
+        if len(word) > len(suffix) + 1 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    for suffix in _BN_AFTER_VOWEL:
+        stem = word[: -len(suffix)]
+        if len(stem) > 1 and word.endswith(suffix) and (stem[-1] in _VOWEL_SIGNS or stem[-1] in _VOWELS):
+            return stem
+    return word
+
+
+@lru_cache(maxsize=16384)
+def fold_word(word: str) -> str:
+    """Spelling-variant key of one romanized word ("bhalo", "valo" → "balo")."""
+    if not word.isascii():
+        return word
+    for pattern, repl in _VARIANTS:
+        word = pattern.sub(repl, word)
+    return word
+
+# ───────────────────────────────────────────────
+# QUESTION WORDS, CONCEPTS AND STOPWORDS
+# ───────────────────────────────────────────────
+
+# Question words in every script, mapped to one English word each
+_RAW_QUESTION_WORDS = {
+    "what": "what ki কি কী",
+    "when": "when kobe kokhon কবে কখন",
+    "where": "where kothay kotha kothai কোথায় কোথা",
+    "why": "why keno কেন",
+    "how": "how kemon kivabe kibhabe কেমন কীভাবে কিভাবে",
+    "who": "who ke কে",
+    "which": "which kon কোন",
+}
+# Words for the same thing across languages; small on purpose — only what
+# the corpus is about
+_RAW_CONCEPTS = {
+    "food": "food foods eat eating dish dishes cuisine khabo khabar khawa khete khai খাবো খাবার খাওয়া খেতে খাই",
+    "visit": "visit visiting ghurbo ghurte ghora ঘুরবো ঘুরতে ঘোরা",
+    "travel": "travel transport jabo jete jawa যাবো যেতে যাওয়া",
+    "language": "language bhasha ভাষা",
+    "weather": "weather climate abhawa abohawa আবহাওয়া",
+    "festival": "festival festivals utsab utsob উৎসব",
+    "sweet": "sweet sweets mishti misti মিষ্টি",
+}
+_RAW_STOPWORDS = """
+a about an and any are as at be best by can could do does for from get give good i in
+is it its me my of on or please should tell the there to was will with would you your
+ache achhe hoy ta te er r ar amake bolo bolun
+আছে হয় এবং ও আর আমাকে বলো বলুন এর
+"""
+# All held in folded form, the same form the words they are compared with are in
+QUESTION_WORDS = {fold_word(transliterate(w)): q for q, ws in _RAW_QUESTION_WORDS.items() for w in ws.split()}
+CONCEPTS = {fold_word(transliterate(w)): c for c, ws in _RAW_CONCEPTS.items() for w in ws.split()}
+STOPWORDS = frozenset(fold_word(transliterate(w)) for w in _RAW_STOPWORDS.split())
+# Question words as they appear in canonical text
+QUESTIONS = frozenset(_RAW_QUESTION_WORDS)
+# Stopwords that give a question its direction ("howrah to sealdah")
+DIRECTIONS = frozenset(fold_word(w) for w in ("to", "from"))
+# Ask for whatever an entry on the topic says; the others ask for one facet
+# of it (a time, a place, a reason, a way) that the entry must be about
+OPEN_QUESTIONS = frozenset({"what", "which"})
+
+# ───────────────────────────────────────────────
+# CANONICAL FORM
+# ───────────────────────────────────────────────
+
+@lru_cache(maxsize=8192)
+def canonical(text: str, keep: frozenset = frozenset()) -> str:
+    """Canonical form of `text`: space-joined folded content words, plus
+    any stopwords in `keep`.
+
+    If every word is a stopword the folded words are kept, so the result
+    is empty only for text with no words at all.
+    """
+    text = _BENGALI.sub(_strip_bn_suffix, canonicalize_entities(normalize(text)))
+    text = transliterate(text)
+    words = [fold_word(w) for w in _WORD.findall(text)]
+    words = [QUESTION_WORDS.get(w) or CONCEPTS.get(w, w) for w in words]
+    content = [w for w in words if w not in STOPWORDS or w in keep]
+    return " ".join(content or words)
+
+
+def canonical_key(text: str) -> str:
+    """`canonical(text)` with its words sorted and deduplicated: Bengali and
+    English word order give the same key. For matching only — the order
+    lost here can matter to the answer."""
+    return " ".join(sorted(set(canonical(text).split())))
+
+
+def canonical_sequence(text: str) -> str:
+    """`canonical(text)` in word order with "to"/"from" kept, so "howrah to
+    sealdah" and "sealdah to howrah" stay apart."""
+    return canonical(text, DIRECTIONS)
+
+
+def cache_info() -> dict:
+    """Memo hit rates, for the debug panel and /health."""
+    info = {}
+    for name, fn in (("canonical", canonical), ("fold_word", fold_word)):
+        ci = fn.cache_info()
+        info[name] = {"hits": ci.hits, "misses": ci.misses, "size": ci.currsize}
+    return info
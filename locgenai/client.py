@@ -0,0 +1,87 @@
+# locgenai/client.py
+# Thin HTTP client for locgenai.serve — same call shape as get_response
+#
+# LOCGENAI_API_URL may list several instances, comma-separated; each query
+# goes to the shard picked from its primary gazetteer entity, so questions
+# about one place (in any spelling) warm the same instance's caches.
+
+import json
+import os
+
+import requests
+
+from .gazetteer import shard_for
+
+API_URL = os.getenv("LOCGENAI_API_URL", "")
+REQUEST_TIMEOUT_SECONDS = 75
+
+
+def _session_header(session_id: str = None) -> dict:
+    """The server charges admission to X-Session-Id; without it, to our address
+    — which every user of a shared front end has in common."""
+    return {"X-Session-Id": session_id} if session_id else {}
+
+
+class RemoteClient:
+    """Talk to a running `python -m locgenai.serve` over a keep-alive session."""
+
+    def __init__(self, base_url: str = API_URL, timeout: float = REQUEST_TIMEOUT_SECONDS):
+        self.base_urls = [u.strip().rstrip("/") for u in base_url.split(",") if u.strip()] or [""]
+        self.base_url = self.base_urls[0]
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def get_response(self, prompt: str, language_style: str = None, region: str = None,
+                     session_id: str = None):
+        """Return dict with {'answer': str, 'sources': list, ...}"""
+        payload = {"prompt": prompt, "language_style": language_style, "region": region}
+        resp = self._session.post(f"{self._url_for(prompt)}/query", json=payload,
+                                  headers=_session_header(session_id), timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def get_responses(self, queries: list, session_id: str = None) -> list:
+        """Batch variant: `queries` is a list of get_response keyword dicts
+        (without session_id — the whole batch is charged to `session_id`).
+
+        Split into one batch per shard; results come back in input order.
+        """
+        by_url = {}
+        for i, query in enumerate(queries):
+            by_url.setdefault(self._url_for(query.get("prompt", "")), []).append(i)
+        results = [None] * len(queries)
+        for url, positions in by_url.items():
+            batch = [{k: v for k, v in queries[i].items() if k != "session_id"} for i in positions]
+            resp = self._session.post(f"{url}/batch", json={"queries": batch},
+                                      headers=_session_header(session_id), timeout=self.timeout)
+            resp.raise_for_status()
+            for i, result in zip(positions, resp.json()["results"]):
+                results[i] = result
+        return results
+
+    def stream_response(self, prompt: str, language_style: str = None, region: str = None,
+                        session_id: str = None):
+        """Yield answer text chunks as the server produces them."""
+        payload = {"prompt": prompt, "language_style": language_style, "region": region}
+        with self._session.post(f"{self._url_for(prompt)}/stream", json=payload,
+                                headers=_session_header(session_id), timeout=self.timeout,
+                                stream=True) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if "chunk" in event:
+                    yield event["chunk"]
+                elif "error" in event:
+                    raise RuntimeError(event["error"])
+
+    def health(self, shard: int = 0) -> dict:
+        resp = self._session.get(f"{self.base_urls[shard]}/health", timeout=5)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _url_for(self, prompt: str) -> str:
+        if len(self.base_urls) == 1:
+            return self.base_url
+        return self.base_urls[shard_for(prompt, len(self.base_urls))]
@@ -0,0 +1,210 @@
+# locgenai/context_cache.py
+# Gemini context caching — server-side cached prefix (system prompt + regional knowledge)
+
+import datetime
+import hashlib
+import os
+import threading
+import time
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+CONTEXT_CACHE_ENABLED = os.getenv("LOCGENAI_CONTEXT_CACHE", "1") != "0"
+CACHE_TTL_SECONDS = int(os.getenv("LOCGENAI_CONTEXT_CACHE_TTL", "3600"))
+# Refresh a cache this many seconds before it expires on the server
+REFRESH_MARGIN_SECONDS = 120
+# Gemini rejects cached contents below a minimum token count (~1024 tokens);
+# ~4 chars per token keeps us from paying a failed round trip for short prefixes.
+MIN_CACHE_CHARS = 4096
+# After a failed create, wait this long before trying that model again
+FAILURE_BACKOFF_SECONDS = 600
+
+# region -> list of knowledge passages sent alongside the system instruction
+REGION_KNOWLEDGE = {}
+
+
+def register_region_knowledge(region: str, passages):
+    """Attach knowledge passages to a region (replaces any previous ones)."""
+    REGION_KNOWLEDGE[region] = [p for p in passages if p and p.strip()]
+
+
+def region_knowledge(region: str) -> str:
+    """Return the joined knowledge block for a region ('' if none)."""
+    return "\n\n".join(REGION_KNOWLEDGE.get(region, []))
+
+
+def inline_instruction(system_instruction: str, knowledge: str) -> str:
+    """Fallback prefix used when no server-side cache is available."""
+    if not knowledge:
+        return system_instruction
+    return f"{system_instruction}\n\nRegional knowledge:\n{knowledge}"
+
+def is_cache_gone(error: Exception) -> bool:
+    """True if a call failed because its cached prefix no longer exists
+    (evicted or expired server-side) — not for quota or transient errors."""
+    if type(error).__name__ == "NotFound":  # google.api_core.exceptions.NotFound
+        return True
+    message = str(error).lower()
+    return "cache" in message and ("not found" in message or "expired" in message)
+
+# ───────────────────────────────────────────────
+# CLIENT (stubbable)
+# ───────────────────────────────────────────────
+
+class GeminiCacheClient:
+    """Thin adapter over google.generativeai caching.
+
+    Any object with the same four methods can be passed to ContextCache,
+    which is how the cache is exercised offline.
+    """
+
+    def __init__(self):
+        import google.generativeai as genai
+        from google.generativeai import caching
+        self._genai = genai
+        self._caching = caching
+
+    def create(self, model_name: str, system_instruction: str, contents, ttl: int):
+        return self._caching.CachedContent.create(
+            model=model_name,
+            display_name="locgenai-prefix",
+            system_instruction=system_instruction,
+            contents=contents,
+            ttl=datetime.timedelta(seconds=ttl),
+        )
+
+    def refresh(self, handle, ttl: int):
+        handle.update(ttl=datetime.timedelta(seconds=ttl))
+
+    def delete(self, handle):
+        handle.delete()
+
+    def model_for(self, handle):
+        return self._genai.GenerativeModel.from_cached_content(cached_content=handle)
+
+# ───────────────────────────────────────────────
+# CACHE MANAGER
+# ───────────────────────────────────────────────
+
+class _Entry:
+    __slots__ = ("handle", "model", "expires_at")
+
+    def __init__(self, handle, model, expires_at):
+        self.handle = handle
+        self.model = model
+        self.expires_at = expires_at
+
+
+class ContextCache:
+    """Create, track and refresh cached prefixes keyed by model + prefix hash."""
+
+    def __init__(self, client=None, ttl: int = CACHE_TTL_SECONDS,
+                 refresh_margin: int = REFRESH_MARGIN_SECONDS,
+                 min_chars: int = MIN_CACHE_CHARS, clock=time.monotonic):
+        self._client = client
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.min_chars = min_chars
+        self._clock = clock
+        self._entries = {}
+        self._failed_until = {}
+        self._pending = set()  # keys with a create/refresh in flight
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "creates": 0, "refreshes": 0, "deletes": 0, "fallbacks": 0}
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = GeminiCacheClient()
+        return self._client
+
+    @staticmethod
+    def _key(model_name: str, system_instruction: str, knowledge: str) -> str:
+        digest = hashlib.sha256(f"{system_instruction}\x00{knowledge}".encode("utf-8"))
+        return f"{model_name}:{digest.hexdigest()[:16]}"
+
+    def model_for(self, model_name: str, system_instruction: str, knowledge: str = ""):
+        """Return a model bound to a cached prefix, or None to go inline.
+
+        The create/refresh round trip runs outside the lock: other callers
+        keep using the current entry meanwhile, or go inline if there is
+        none yet, instead of queueing behind it.
+        """
+        if len(system_instruction or "") + len(knowledge or "") < self.min_chars:
+            return None
+
+        now = self._clock()
+        key = self._key(model_name, system_instruction, knowledge)
+        with self._lock:
+            if self._failed_until.get(model_name, 0) > now:
+                self.stats["fallbacks"] += 1
+                return None
+            entry = self._entries.get(key)
+            usable = entry is not None and entry.expires_at > now
+            if usable and (entry.expires_at - now > self.refresh_margin or key in self._pending):
+                self.stats["hits"] += 1
+                return entry.model
+            if key in self._pending:
+                self.stats["fallbacks"] += 1
+                return None
+            self._pending.add(key)
+
+        try:
+            client = self._get_client()
+            if usable:
+                try:
+                    client.refresh(entry.handle, self.ttl)
+                    with self._lock:
+                        entry.expires_at = now + self.ttl
+                        self.stats["refreshes"] += 1
+                    return entry.model
+                except Exception as e:
+                    print(f"[Context Cache] refresh failed for {model_name}: {e}")
+
+            contents = [knowledge] if knowledge else None
+            handle = client.create(model_name, system_instruction, contents, self.ttl)
+            replaced, entry = entry, _Entry(handle, client.model_for(handle), now + self.ttl)
+            with self._lock:
+                self._entries[key] = entry
+                self.stats["creates"] += 1
+            if usable:
+                # The one that would not refresh would otherwise be billed until it expires
+                self._delete(client, model_name, replaced.handle)
+            return entry.model
+        except Exception as e:
+            print(f"[Context Cache] unavailable for {model_name}: {e}")
+            with self._lock:
+                self._entries.pop(key, None)
+                self._failed_until[model_name] = now + FAILURE_BACKOFF_SECONDS
+                self.stats["fallbacks"] += 1
+            return None
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _delete(self, client, model_name: str, handle):
+        try:
+            client.delete(handle)
+            with self._lock:
+                self.stats["deletes"] += 1
+        except Exception as e:
+            print(f"[Context Cache] could not delete old cache for {model_name}: {e}")
+
+    def invalidate(self, model_name: str = None):
+        """Forget cached prefixes (all, or only those of one model)."""
+        with self._lock:
+            for key in list(self._entries):
+                if model_name is None or key.startswith(f"{model_name}:"):
+                    del self._entries[key]
+            if model_name is None:
+                self._failed_until.clear()
+            else:
+                self._failed_until.pop(model_name, None)
+
+    def ttl_remaining(self, model_name: str, system_instruction: str, knowledge: str = ""):
+        """Seconds until the cached prefix expires, or None if not cached."""
+        entry = self._entries.get(self._key(model_name, system_instruction, knowledge))
+        if entry is None:
+            return None
+        return max(0.0, entry.expires_at - self._clock())
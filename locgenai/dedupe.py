@@ -0,0 +1,330 @@
+# locgenai/dedupe.py
+# Near-duplicate clustering for seed corpora (MinHash + LSH) — run with:
+#
+#   python -m locgenai.dedupe merged_qas.json --report dedupe_report.json      # review
+#   python -m locgenai.dedupe merged_qas.json --apply -o seed_qas.json         # rewrite
+#
+# Questions are shingled into character n-grams, signed with MinHash and
+# bucketed by LSH bands, so only questions sharing a band are compared —
+# each bucket member against the clusters already found in the bucket, not
+# against every other member. A match needs exact Jaccard similarity of both
+# the questions and the answers — "weather in june" and "weather in july"
+# read alike but answer differently. Matches are clustered with union-find,
+# and each cluster is collapsed into one entry whose sources are the union
+# of its members'. Without --apply only the report is written.
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import unicodedata
+import zlib
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python signatures are slower but identical
+    np = None
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+DEFAULT_THRESHOLD = 0.7   # Jaccard similarity of question shingles
+DEFAULT_ANSWER_THRESHOLD = 0.5  # ...and of answer shingles
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE = 4       # characters; robust to typos and short questions
+SEED = 1
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# ───────────────────────────────────────────────
+# SHINGLING
+# ───────────────────────────────────────────────
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Case-folded, punctuation-free, single-spaced question text."""
+    text = unicodedata.normalize("NFC", str(text)).casefold()
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+
+def shingles(text: str, k: int = DEFAULT_SHINGLE) -> set:
+    """Set of 32-bit hashes of the character k-grams of `text`."""
+    text = normalize_question(text)
+    if len(text) <= k:
+        return {zlib.crc32(text.encode("utf-8"))} if text else set()
+    return {zlib.crc32(text[i:i + k].encode("utf-8")) for i in range(len(text) - k + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+# ───────────────────────────────────────────────
+# MINHASH + LSH
+# ───────────────────────────────────────────────
+
+class MinHasher:
+    """Fixed family of `num_perm` hash functions (a*x + b) mod p."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = SEED):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        # a, b, x < 2**32 keeps a*x + b inside uint64 for the numpy path
+        self.a = [rng.randrange(1, _MAX_HASH) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, _MAX_HASH) for _ in range(num_perm)]
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, shingle_set: set) -> tuple:
+        if not shingle_set:
+            return (_MAX_HASH,) * self.num_perm
+        if np is not None:
+            x = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))[None, :]
+            hashed = ((self._a * x + self._b) % np.uint64(_MERSENNE_PRIME)) & np.uint64(_MAX_HASH)
+            return tuple(hashed.min(axis=1).tolist())
+        return tuple(
+            min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in shingle_set)
+            for a, b in zip(self.a, self.b)
+        )
+
+
+def choose_bands(num_perm: int, threshold: float) -> tuple:
+    """(bands, rows) whose S-curve midpoint (1/b)^(1/r) is closest to threshold."""
+    best = (num_perm, 1)
+    best_err = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        err = abs((1 / bands) ** (1 / rows) - threshold)
+        if err < best_err:
+            best, best_err = (bands, rows), err
+    return best
+
+
+def lsh_buckets(signatures: list, bands: int, rows: int, indices=None):
+    """Yield each LSH band bucket (list of indices) holding more than one of
+    `indices` (default: all)."""
+    indices = range(len(signatures)) if indices is None else indices
+    for band in range(bands):
+        buckets = defaultdict(list)
+        lo = band * rows
+        for idx in indices:
+            buckets[signatures[idx][lo:lo + rows]].append(idx)
+        for members in buckets.values():
+            if len(members) > 1:
+                yield members
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int):
+        rx, ry = self.find(x), self.find(y)
+        if rx != ry:
+            self.parent[max(rx, ry)] = min(rx, ry)
+
+# ───────────────────────────────────────────────
+# CLUSTERING + MERGING
+# ───────────────────────────────────────────────
+
+def _join_heads(members: list, uf: _UnionFind, similar) -> list:
+    """Union each member with the first earlier cluster head it is similar
+    to, else make it a head; returns the heads.
+
+    Comparing against heads rather than every earlier member keeps a bucket
+    of n near-identical entries at n comparisons, while two similar members
+    the first one does not resemble still meet (the second finds the first
+    of them as a head).
+    """
+    heads = []
+    for idx in members:
+        root = uf.find(idx)
+        for head in heads:
+            if uf.find(head) == root or similar(head, idx):
+                uf.union(head, idx)
+                break
+        else:
+            heads.append(idx)
+    return heads
+
+
+def find_clusters(corpus: list, threshold: float = DEFAULT_THRESHOLD,
+                  num_perm: int = DEFAULT_NUM_PERM, k: int = DEFAULT_SHINGLE,
+                  answer_threshold: float = DEFAULT_ANSWER_THRESHOLD) -> list:
+    """Clusters (sorted index lists, size > 1) of near-duplicate entries:
+    similar questions whose answers are similar too."""
+    shingle_sets = [shingles(item.get("q", ""), k) for item in corpus]
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(s) for s in shingle_sets]
+    bands, rows = choose_bands(num_perm, threshold)
+    answer_sets = {}
+
+    def answer_shingles(idx):
+        if idx not in answer_sets:
+            answer_sets[idx] = shingles(str(corpus[idx].get("a", "")), k)
+        return answer_sets[idx]
+
+    def similar(i, j):
+        return (jaccard(shingle_sets[i], shingle_sets[j]) >= threshold
+                and jaccard(answer_shingles(i), answer_shingles(j)) >= answer_threshold)
+
+    uf = _UnionFind(len(corpus))
+    # Entries with one signature share every bucket: cluster them once here
+    # and let only their heads into the LSH buckets
+    by_signature = defaultdict(list)
+    for idx, sig in enumerate(signatures):
+        by_signature[sig].append(idx)
+    heads = []
+    for members in by_signature.values():
+        heads.extend(_join_heads(members, uf, similar))
+    heads.sort()
+    for members in lsh_buckets(signatures, bands, rows, heads):
+        _join_heads(members, uf, similar)
+    groups = defaultdict(list)
+    for idx in range(len(corpus)):
+        groups[uf.find(idx)].append(idx)
+    return sorted((g for g in groups.values() if len(g) > 1), key=lambda g: g[0])
+
+
+def _representative(corpus: list, cluster: list) -> int:
+    """Most useful member: most sources, then longest answer, then earliest."""
+    return max(cluster, key=lambda i: (len(_sources_of(corpus[i])),
+                                       len(str(corpus[i].get("a", ""))), -i))
+
+
+def _sources_of(item: dict) -> list:
+    sources = item.get("sources") or []
+    return [sources] if isinstance(sources, str) else [s for s in sources if isinstance(s, str)]
+
+
+def merge_cluster(corpus: list, cluster: list) -> dict:
+    """Representative entry with the de-duplicated union of all sources."""
+    keep = _representative(corpus, cluster)
+    merged = dict(corpus[keep])
+    seen, sources = set(), []
+    for idx in [keep] + [i for i in cluster if i != keep]:
+        for url in _sources_of(corpus[idx]):
+            key = url.strip().rstrip("/").lower()
+            if key not in seen:
+                seen.add(key)
+                sources.append(url.strip())
+    if sources or "sources" in merged:
+        merged["sources"] = sources
+    return merged
+
+
+def dedupe_corpus(corpus: list, threshold: float = DEFAULT_THRESHOLD,
+                  num_perm: int = DEFAULT_NUM_PERM, k: int = DEFAULT_SHINGLE,
+                  answer_threshold: float = DEFAULT_ANSWER_THRESHOLD) -> tuple:
+    """Return (deduplicated corpus, report dict). Order of first occurrence is kept."""
+    started = time.perf_counter()
+    clusters = find_clusters(corpus, threshold, num_perm, k, answer_threshold)
+    merged_at = {cluster[0]: cluster for cluster in clusters}
+    dropped = {idx for cluster in clusters for idx in cluster[1:]}
+
+    output, report_clusters = [], []
+    for idx, item in enumerate(corpus):
+        if idx in dropped:
+            continue
+        cluster = merged_at.get(idx)
+        if cluster is None:
+            output.append(item)
+            continue
+        entry = merge_cluster(corpus, cluster)
+        keep = _representative(corpus, cluster)
+        output.append(entry)
+        report_clusters.append({
+            "kept": entry.get("q", ""),
+            "merged": [corpus[i].get("q", "") for i in cluster if i != keep],
+            # what a rewrite would drop, for review
+            "dropped_answers": [corpus[i].get("a", "") for i in cluster if i != keep],
+            "size": len(cluster),
+            "sources": len(entry.get("sources", [])),
+        })
+
+    report = {
+        "input_entries": len(corpus),
+        "output_entries": len(output),
+        "removed": len(corpus) - len(output),
+        "clusters": len(clusters),
+        "threshold": threshold,
+        "answer_threshold": answer_threshold,
+        "num_perm": num_perm,
+        "shingle": k,
+        "bands_rows": list(choose_bands(num_perm, threshold)),
+        "seconds": round(time.perf_counter() - started, 3),
+        "details": sorted(report_clusters, key=lambda c: -c["size"]),
+    }
+    return output, report
+
+# ───────────────────────────────────────────────
+# CLI
+# ───────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find (and optionally merge) near-duplicate entries "
+                                                 "in a seed QA corpus")
+    parser.add_argument("corpus", help="input JSON list of {q, a, sources}")
+    parser.add_argument("--apply", action="store_true",
+                        help="write the deduplicated corpus; without it only the report is written")
+    parser.add_argument("-o", "--output", help="with --apply: where to write the corpus (default: stdout)")
+    parser.add_argument("--report", help="where to write the JSON cluster report (default: stdout "
+                                         "without --apply)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Jaccard similarity at which questions count as duplicates")
+    parser.add_argument("--answer-threshold", type=float, default=DEFAULT_ANSWER_THRESHOLD,
+                        help="Jaccard similarity their answers must also reach")
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM)
+    parser.add_argument("--shingle", type=int, default=DEFAULT_SHINGLE, help="character n-gram size")
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    if not isinstance(corpus, list):
+        parser.error("corpus must be a JSON list of QA objects")
+
+    if args.output and not args.apply:
+        parser.error("-o writes the rewritten corpus; add --apply")
+    output, report = dedupe_corpus(corpus, args.threshold, args.num_perm, args.shingle,
+                                   args.answer_threshold)
+
+    if args.apply:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+        else:
+            json.dump(output, sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write("\n")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    elif not args.apply:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+
+    verb = "merged" if args.apply else "found (report only; --apply to merge)"
+    print(f"🧹 {report['input_entries']} → {report['output_entries']} entries "
+          f"({report['clusters']} clusters {verb} in {report['seconds']}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# locgenai/gazetteer.py
+# Regional gazetteer — places, landmarks, festivals and foods with their
+# spellings (English, romanized Bengali, Bengali script), matched in one
+# linear pass by an Aho-Corasick automaton.
+#
+# Entities give spelling-independent cache keys ("haora bridge" and
+# "rabindra setu" both become "Howrah Bridge"), a grounded query for local
+# lookup, and a stable shard for routing queries between API instances.
+
+import threading
+import unicodedata
+import zlib
+from collections import deque
+
+# ───────────────────────────────────────────────
+# GAZETTEER
+# ───────────────────────────────────────────────
+
+# id -> (canonical name, type, aliases). The canonical name is itself an alias.
+# Aliases must name this entity and nothing else: a bare word with another
+# common meaning ("victoria", "ganga", "metro") would rewrite unrelated
+# queries into questions about Kolkata, so it is left out.
+GAZETTEER = {
+    "kolkata": ("Kolkata", "city", [
+        "calcutta", "kolkatta", "kolkota", "kolikata", "কলকাতা", "কোলকাতা", "ক্যালকাটা",
+    ]),
+    "howrah": ("Howrah", "city", ["haora", "howra", "হাওড়া"]),
+    "howrah_bridge": ("Howrah Bridge", "landmark", [
+        "haora bridge", "howra bridge", "rabindra setu", "robindro setu", "howrah setu",
+        "হাওড়া ব্রিজ", "হাওড়া সেতু", "রবীন্দ্র সেতু",
+    ]),
+    "victoria_memorial": ("Victoria Memorial", "landmark", [
+        "victoria memorial hall", "bhictoria memorial", "victoria mahal", "ভিক্টোরিয়া মেমোরিয়াল",
+    ]),
+    "dakshineswar": ("Dakshineswar Temple", "landmark", [
+        "dakshineswar", "dakshineshwar", "dakhineswar", "dokkhineshwar", "dakshineswar kali temple",
+        "dakshineswar mandir", "দক্ষিণেশ্বর", "দক্ষিণেশ্বর মন্দির",
+    ]),
+    "kalighat": ("Kalighat Temple", "landmark", ["kalighat", "kalighat mandir", "কালীঘাট"]),
+    "belur_math": ("Belur Math", "landmark", ["belur moth", "বেলুড় মঠ"]),
+    "indian_museum": ("Indian Museum", "landmark", ["ভারতীয় জাদুঘর", "ভারতীয় যাদুঘর"]),
+    "park_street": ("Park Street", "landmark", ["park st", "mother teresa sarani", "পার্ক স্ট্রিট"]),
+    "college_street": ("College Street", "landmark", ["boipara", "boi para", "কলেজ স্ট্রিট", "বইপাড়া"]),
+    "new_market": ("New Market", "landmark", ["hogg market", "nyu market", "নিউ মার্কেট"]),
+    "eden_gardens": ("Eden Gardens", "landmark", ["eden garden", "ইডেন গার্ডেন্স"]),
+    "maidan": ("Maidan", "landmark", ["brigade parade ground", "ময়দান"]),
+    "science_city": ("Science City", "landmark", ["সায়েন্স সিটি"]),
+    "hooghly": ("Hooghly River", "landmark", ["hooghly", "hugli", "hugli river", "হুগলি", "হুগলি নদী"]),
+    "sundarbans": ("Sundarbans", "landmark", ["sundarban", "sunderbans", "সুন্দরবন"]),
+    "durga_puja": ("Durga Puja", "festival", [
+        "durga pujo", "durgapuja", "durgapujo", "durgotsav", "durgotsab", "sharodotsav", "pujo",
+        "দুর্গা পূজা", "দুর্গাপূজা", "দুর্গাপুজো", "দুর্গোৎসব", "পুজো",
+    ]),
+    "kali_puja": ("Kali Puja", "festival", ["kali pujo", "kalipuja", "কালী পূজা", "কালীপুজো"]),
+    "saraswati_puja": ("Saraswati Puja", "festival", [
+        "saraswati pujo", "sarasvati puja", "swaraswati puja", "সরস্বতী পূজা", "সরস্বতী পুজো",
+    ]),
+    "poila_baishakh": ("Poila Baishakh", "festival", [
+        "pohela boishakh", "poila boishakh", "bengali new year", "পয়লা বৈশাখ", "পহেলা বৈশাখ",
+    ]),
+    "rosogolla": ("Roshogolla", "food", [
+        "rosogolla", "rasgulla", "rosgulla", "roshgolla", "rasagola", "রসগোল্লা",
+    ]),
+    "mishti_doi": ("Mishti Doi", "food", ["misti doi", "mishti dahi", "sweet curd", "মিষ্টি দই"]),
+    "sandesh": ("Sandesh", "food", ["sondesh", "shondesh", "সন্দেশ"]),
+    "kathi_roll": ("Kathi Roll", "food", ["kati roll", "kathi rolls", "kati rolls", "কাঠি রোল"]),
+    "puchka": ("Puchka", "food", ["phuchka", "fuchka", "ফুচকা"]),
+    "metro": ("Kolkata Metro", "transport", ["kolkata metro rail", "calcutta metro", "কলকাতা মেট্রো"]),
+    "tram": ("Tram", "transport", ["trams", "tramcar", "ট্রাম"]),
+}
+
+
+def normalize(text: str) -> str:
+    """NFC, casefolded, single-spaced — the form aliases are matched in."""
+    return " ".join(unicodedata.normalize("NFC", str(text)).casefold().split())
+
+# ───────────────────────────────────────────────
+# AHO-CORASICK AUTOMATON
+# ───────────────────────────────────────────────
+
+class EntityMatcher:
+    """Aho-Corasick automaton over alias strings; one pass per query.
+
+    Matches must start and end on word boundaries (or end in a case
+    ending, see `_CASE_ENDINGS`), and overlapping matches
+    resolve to the longest, leftmost one ("howrah bridge" beats "howrah").
+    """
+
+    def __init__(self, aliases: dict):
+        # aliases: normalized alias -> entity id
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [None]   # (alias length, entity id) ending at this state
+        self._link = [0]     # nearest suffix state with an output
+        for alias, entity_id in aliases.items():
+            state = 0
+            for ch in alias:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                    self._link.append(0)
+                state = nxt
+            self._out[state] = (len(alias), entity_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                fail = self._fail[nxt]
+                self._link[nxt] = fail if self._out[fail] else self._link[fail]
+
+    def find(self, text: str) -> list:
+        """Non-overlapping (start, end, entity id) spans in normalized `text`."""
+        spans = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            s = state if self._out[state] else self._link[state]
+            while s:
+                length, entity_id = self._out[s]
+                start, end = i + 1 - length, i + 1
+                if _boundary(text, start - 1):
+                    end = _inflected_end(text, end)
+                    if end is not None:
+                        spans.append((start, end, entity_id))
+                s = self._link[s]
+        # Longest-leftmost, non-overlapping
+        spans.sort(key=lambda sp: (sp[0], -(sp[1] - sp[0])))
+        chosen, last_end = [], 0
+        for start, end, entity_id in spans:
+            if start >= last_end:
+                chosen.append((start, end, entity_id))
+                last_end = end
+        return chosen
+
+
+# Case endings that may follow an entity name ("kolkatar", "কলকাতায়");
+# the match then covers the ending, which canonicalization drops
+_CASE_ENDINGS = ("r", "y", "te", "ke", "er", "র", "য়", "তে", "কে", "ের")
+
+
+def _inflected_end(text: str, end: int):
+    """End of the mention if it stops on a word boundary, possibly after a
+    case ending; None if it is only the prefix of a longer word."""
+    if _boundary(text, end):
+        return end
+    for ending in _CASE_ENDINGS:
+        if text.startswith(ending, end) and _boundary(text, end + len(ending)):
+            return end + len(ending)
+    return None
+
+
+def _boundary(text: str, i: int) -> bool:
+    """True if position `i` is outside the text or not a word character."""
+    if i < 0 or i >= len(text):
+        return True
+    ch = text[i]
+    return not (ch.isalnum() or unicodedata.category(ch).startswith("M"))
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def _get_matcher() -> EntityMatcher:
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                aliases = {}
+                for entity_id, (name, _, names) in GAZETTEER.items():
+                    for alias in [name, *names]:
+                        aliases.setdefault(normalize(alias), entity_id)
+                _matcher = EntityMatcher(aliases)
+    return _matcher
+
+
+def register_entities(entries: dict):
+    """Add or replace gazetteer entries (id -> (name, type, aliases))."""
+    global _matcher
+    with _matcher_lock:
+        GAZETTEER.update(entries)
+        _matcher = None
+
+# ───────────────────────────────────────────────
+# QUERY HELPERS
+# ───────────────────────────────────────────────
+
+def extract_entities(query: str) -> list:
+    """Canonical entity ids mentioned in `query`, in order, without repeats."""
+    seen = []
+    for _, _, entity_id in _get_matcher().find(normalize(query)):
+        if entity_id not in seen:
+            seen.append(entity_id)
+    return seen
+
+
+def canonicalize_entities(query: str) -> str:
+    """Normalized query with every entity mention replaced by its canonical name."""
+    text = normalize(query)
+    parts, last = [], 0
+    for start, end, entity_id in _get_matcher().find(text):
+        parts.append(text[last:start])
+        parts.append(GAZETTEER[entity_id][0].lower())
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def shard_for(query: str, shards: int) -> int:
+    """Stable shard for a query: by its first entity, else by its text.
+
+    Spelling variants of a question about one place land on the same shard,
+    so that shard's caches answer all of them.
+    """
+    if shards <= 1:
+        return 0
+    entities = extract_entities(query)
+    key = entities[0] if entities else canonicalize_entities(query)
+    return zlib.crc32(key.encode("utf-8")) % shards
@@ -0,0 +1,168 @@
+# locgenai/generation.py
+# Generation settings per request — output budget, temperature and stop
+# sequences chosen by request class and language style, with output budgets
+# that adapt to how long answers actually turn out.
+#
+# Decode time and cost grow with output length; a "where is Victoria
+# Memorial" lookup should not get the same budget as an itinerary.
+
+import os
+import threading
+from collections import deque
+
+from .routing import CHITCHAT, FACTUAL, GENERAL, RECOMMENDATION
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+ADAPTIVE_BUDGETS = os.getenv("LOCGENAI_ADAPTIVE_BUDGETS", "1") != "0"
+
+# request class -> (max output tokens, temperature); the token count is the
+# starting budget, and adaptation keeps it between a quarter and double that
+CLASS_POLICIES = {
+    CHITCHAT: (96, 0.9),
+    FACTUAL: (256, 0.2),
+    RECOMMENDATION: (640, 0.7),
+    GENERAL: (448, 0.5),
+}
+# Bengali script costs more tokens per word than romanized text
+STYLE_TOKEN_FACTORS = {"benglish": 1.0, "code-mixed": 1.15, "native": 1.6}
+# Gemini 2.5 models count thinking tokens against max_output_tokens, so a
+# thinking model gets this many on top of the answer budget (flash-lite does
+# not think unless asked)
+THINKING_TOKENS = {"gemini-2.5-flash": 512, "gemini-2.5-pro": 1024}
+# Cut off role-play continuations; chit-chat also ends at the first paragraph
+STOP_SEQUENCES = ["\nUser:", "\nQuestion:", "\nQ:"]
+CHITCHAT_STOPS = ["\n\n"]
+
+# Adaptation: observed lengths per (class, style), and the budget kept over them
+WINDOW = 200
+MIN_SAMPLES = 20
+BUDGET_PERCENTILE = 0.95
+HEADROOM = 1.25
+# More truncated answers than this among the last TRUNCATION_WINDOW and
+# the budget grows regardless
+MAX_TRUNCATED_RATE = 0.05
+TRUNCATION_WINDOW = 50
+MIN_BUDGET = 48
+
+# ───────────────────────────────────────────────
+# SETTINGS
+# ───────────────────────────────────────────────
+
+class GenerationSettings:
+    """Settings for one model call; `record` reports the output it produced."""
+
+    __slots__ = ("request_class", "style", "max_output_tokens", "temperature", "stop_sequences", "_policy")
+
+    def __init__(self, request_class: str, style: str, max_output_tokens: int, temperature: float,
+                 stop_sequences: list, policy=None):
+        self.request_class = request_class
+        self.style = style
+        self.max_output_tokens = max_output_tokens
+        self.temperature = temperature
+        self.stop_sequences = stop_sequences
+        self._policy = policy
+
+    def as_config(self, thinking_tokens: int = 0) -> dict:
+        """google.generativeai `generation_config` dict; `thinking_tokens` are
+        added to the output limit for models that spend it on thinking."""
+        return {
+            "max_output_tokens": self.max_output_tokens + thinking_tokens,
+            "temperature": self.temperature,
+            "stop_sequences": list(self.stop_sequences),
+        }
+
+    def record(self, output_tokens: int, truncated: bool = False):
+        """Report an answer's length; a truncated answer with no text counts
+        as using the whole budget."""
+        if truncated and not output_tokens:
+            output_tokens = self.max_output_tokens
+        if self._policy is not None and output_tokens:
+            self._policy.observe(self.request_class, self.style, output_tokens, truncated)
+
+    def __repr__(self):
+        return (f"GenerationSettings({self.request_class}/{self.style}, max_output_tokens="
+                f"{self.max_output_tokens}, temperature={self.temperature})")
+
+
+class _Lengths:
+    __slots__ = ("tokens", "truncated", "budget")
+
+    def __init__(self, budget: int):
+        self.tokens = deque(maxlen=WINDOW)
+        self.truncated = deque(maxlen=TRUNCATION_WINDOW)
+        self.budget = budget
+
+
+class GenerationPolicy:
+    """Picks settings per (request class, language style) and adapts budgets.
+
+    Once MIN_SAMPLES answers are seen, the budget follows the 95th
+    percentile of observed output lengths plus headroom, so answers that
+    are naturally short stop reserving room for essays; a budget that
+    truncates too often grows.
+    """
+
+    def __init__(self, policies: dict = None, adaptive: bool = ADAPTIVE_BUDGETS):
+        self.policies = dict(CLASS_POLICIES if policies is None else policies)
+        self.adaptive = adaptive
+        self._lengths = {}
+        self._lock = threading.Lock()
+
+    def base_budget(self, request_class: str, style: str) -> int:
+        tokens, _ = self.policies.get(request_class, self.policies[GENERAL])
+        return int(tokens * STYLE_TOKEN_FACTORS.get(style, 1.0))
+
+    def settings_for(self, request_class: str, style: str = None) -> GenerationSettings:
+        _, temperature = self.policies.get(request_class, self.policies[GENERAL])
+        budget = self.base_budget(request_class, style)
+        if self.adaptive:
+            with self._lock:
+                lengths = self._lengths.get((request_class, style))
+                if lengths is not None:
+                    budget = lengths.budget
+        stops = STOP_SEQUENCES + (CHITCHAT_STOPS if request_class == CHITCHAT else [])
+        return GenerationSettings(request_class, style, budget, temperature, stops,
+                                  self if self.adaptive else None)
+
+    def observe(self, request_class: str, style: str, output_tokens: int, truncated: bool = False):
+        """Record one answer's length and re-derive the budget for its key."""
+        base = self.base_budget(request_class, style)
+        with self._lock:
+            lengths = self._lengths.get((request_class, style))
+            if lengths is None:
+                lengths = self._lengths[(request_class, style)] = _Lengths(base)
+            lengths.tokens.append(output_tokens)
+            lengths.truncated.append(bool(truncated))
+            if len(lengths.tokens) < MIN_SAMPLES:
+                return
+            if sum(lengths.truncated) / len(lengths.truncated) > MAX_TRUNCATED_RATE:
+                target = lengths.budget * HEADROOM
+            else:
+                ordered = sorted(lengths.tokens)
+                target = ordered[int(BUDGET_PERCENTILE * (len(ordered) - 1))] * HEADROOM
+            lengths.budget = int(max(MIN_BUDGET, base // 4, min(2 * base, target)))
+
+    def snapshot(self) -> dict:
+        """Current budget, samples and truncation rate per class/style."""
+        with self._lock:
+            return {
+                f"{cls}/{style}": {
+                    "budget": v.budget,
+                    "base": self.base_budget(cls, style),
+                    "samples": len(v.tokens),
+                    "mean_tokens": round(sum(v.tokens) / len(v.tokens), 1) if v.tokens else 0,
+                    "truncated_rate": round(sum(v.truncated) / len(v.truncated), 3) if v.truncated else 0,
+                }
+                for (cls, style), v in self._lengths.items()
+            }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count when the API reports none (~4 characters a token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+GENERATION = GenerationPolicy()
@@ -0,0 +1,271 @@
+# locgenai/learned.py
+# Learned QA store — frequent local misses whose model answer has proven
+# stable are promoted into a local corpus searched alongside SEED_DATA.
+#
+#   python -m locgenai.learned --export review.csv     # for human review
+#   python -m locgenai.learned --remove "some question"
+#   python -m locgenai.learned --purge-expired
+
+import argparse
+import csv
+import difflib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .canonical import canonical_key
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+PACKAGE_ROOT = os.path.dirname(__file__)
+LEARNING_ENABLED = os.getenv("LOCGENAI_LEARNING", "1") != "0"
+LEARNED_PATH = os.getenv("LOCGENAI_LEARNED_PATH", os.path.join(PACKAGE_ROOT, "learned_qas.json"))
+# Local misses before a question is considered for promotion
+PROMOTE_AFTER_MISSES = int(os.getenv("LOCGENAI_PROMOTE_AFTER", "5"))
+# Independent model answers that must agree (this similar) before promotion
+STABLE_ANSWERS = 2
+STABILITY_RATIO = 0.6
+# Learned answers expire and go back to the model after this long
+LEARNED_TTL_SECONDS = int(os.getenv("LOCGENAI_LEARNED_TTL_DAYS", "30")) * 86400
+MAX_TRACKED_QUESTIONS = 10000
+
+
+def question_key(prompt: str) -> str:
+    """Canonical key: misses in any script or spelling count together."""
+    return canonical_key(prompt)
+
+
+def _display_question(prompt: str) -> str:
+    return " ".join(prompt.lower().split()).strip(" ?!.")
+
+# ───────────────────────────────────────────────
+# MISS TRACKING
+# ───────────────────────────────────────────────
+
+class _Miss:
+    __slots__ = ("question", "count", "answer", "sources", "backend", "agreeing")
+
+    def __init__(self, question: str):
+        self.question = question  # first spelling seen; what the entry shows
+        self.count = 0
+        self.answer = None
+        self.sources = []
+        self.backend = None
+        self.agreeing = 0
+
+
+class LearnedStore:
+    """Counts local misses per question and owns the promoted QA entries.
+
+    `corpus()` returns the unexpired entries in seed format
+    ({'q', 'a', 'sources'} plus a 'learned' provenance dict); the list
+    object only changes when the store does.
+    """
+
+    def __init__(self, path: str = LEARNED_PATH, promote_after: int = PROMOTE_AFTER_MISSES,
+                 ttl: int = LEARNED_TTL_SECONDS, clock=time.time):
+        self.path = path
+        self.promote_after = promote_after
+        self.ttl = ttl
+        self._clock = clock
+        self._misses = OrderedDict()
+        self._entries = {}  # question key -> entry
+        self._corpus = []
+        self._corpus_built_at = None
+        self._next_expiry = float("inf")
+        self._lock = threading.Lock()
+        self.version = 0
+        self.stats = {"misses": 0, "promoted": 0, "expired": 0}
+        self.load()
+
+    # — persistence —
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Could not load learned QAs: {e}")
+            return
+        with self._lock:
+            self._entries = {question_key(e["q"]): e for e in entries if e.get("q") and e.get("a")}
+            self._changed()
+        print(f"✅ Loaded {len(self._entries)} learned QAs")
+
+    def save(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save learned QAs: {e}")
+
+    def export(self) -> list:
+        with self._lock:
+            return list(self._entries.values())
+
+    def restore(self, entries: list) -> int:
+        """Adopt exported entries, but only into an empty store: the JSON
+        file, when there is one, has the reviewed state."""
+        with self._lock:
+            if self._entries:
+                return 0
+            self._entries = {question_key(e["q"]): e for e in entries if e.get("q") and e.get("a")}
+            self._changed()
+            return len(self._entries)
+
+    def _changed(self):
+        self.version += 1
+        self._corpus_built_at = None
+
+    # — learning —
+
+    def observe(self, prompt: str, result: dict, template_key: str = None,
+                generated: bool = True, miss: bool = True):
+        """Record a local miss answered by `result`; promote when due.
+
+        `generated` is False for answers replayed from the answer cache:
+        they count as misses but not as independent answers. Background
+        refreshes pass `miss=False`: a new answer, but no new question.
+        """
+        key = question_key(prompt)
+        if not key:
+            return
+        promote = None
+        with self._lock:
+            if key in self._entries:
+                return
+            tracked = self._misses.pop(key, None) or _Miss(_display_question(prompt))
+            self._misses[key] = tracked
+            while len(self._misses) > MAX_TRACKED_QUESTIONS:
+                self._misses.popitem(last=False)
+            if miss:
+                tracked.count += 1
+                self.stats["misses"] += 1
+
+            answer = (result or {}).get("answer")
+            if generated and answer:
+                if tracked.answer and difflib.SequenceMatcher(None, tracked.answer, answer).ratio() >= STABILITY_RATIO:
+                    tracked.agreeing += 1
+                else:
+                    tracked.agreeing = 1
+                tracked.answer = answer
+                tracked.sources = list(result.get("sources") or [])
+                tracked.backend = result.get("backend")
+
+            if tracked.count >= self.promote_after and tracked.agreeing >= STABLE_ANSWERS:
+                now = self._clock()
+                promote = {
+                    "q": tracked.question,
+                    "a": tracked.answer,
+                    "sources": tracked.sources,
+                    "learned": {
+                        "backend": tracked.backend,
+                        "template": template_key,
+                        "misses": tracked.count,
+                        "promoted_at": now,
+                        "expires_at": now + self.ttl,
+                    },
+                }
+                self._entries[key] = promote
+                del self._misses[key]
+                self.stats["promoted"] += 1
+                self._changed()
+        if promote is not None:
+            print(f"🎓 Learned local answer for: {promote['q']}")
+            self.save()
+
+    # — reading —
+
+    def corpus(self) -> list:
+        """Unexpired learned entries, in seed format."""
+        now = self._clock()
+        with self._lock:
+            if self._corpus_built_at is None or now >= self._next_expiry:
+                expired = [k for k, e in self._entries.items() if _expires_at(e) <= now]
+                for k in expired:
+                    del self._entries[k]
+                if expired:
+                    self.stats["expired"] += len(expired)
+                    self.version += 1
+                self._corpus = list(self._entries.values())
+                self._next_expiry = min((_expires_at(e) for e in self._corpus), default=float("inf"))
+                self._corpus_built_at = now
+            return self._corpus
+
+    def remove(self, prompt: str) -> bool:
+        with self._lock:
+            removed = self._entries.pop(question_key(prompt), None) is not None
+            if removed:
+                self._changed()
+        if removed:
+            self.save()
+        return removed
+
+    def export_review(self, out) -> int:
+        """Write learned entries with provenance as CSV; returns the row count."""
+        writer = csv.writer(out)
+        writer.writerow(["question", "answer", "sources", "backend", "template",
+                         "misses", "promoted_at", "expires_at"])
+        rows = 0
+        for e in sorted(self.corpus(), key=lambda e: -(e.get("learned", {}).get("misses") or 0)):
+            meta = e.get("learned", {})
+            writer.writerow([
+                e["q"], e["a"], " ".join(e.get("sources", [])), meta.get("backend"), meta.get("template"),
+                meta.get("misses"), _iso(meta.get("promoted_at")), _iso(meta.get("expires_at")),
+            ])
+            rows += 1
+        return rows
+
+
+def _expires_at(entry: dict) -> float:
+    return entry.get("learned", {}).get("expires_at") or float("inf")
+
+
+def _iso(ts) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts)) if ts else ""
+
+
+LEARNED = LearnedStore() if LEARNING_ENABLED else None
+
+# ───────────────────────────────────────────────
+# CLI
+# ───────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Review and maintain the learned QA store")
+    parser.add_argument("--path", default=LEARNED_PATH)
+    parser.add_argument("--export", metavar="CSV", help="write entries with provenance ('-' for stdout)")
+    parser.add_argument("--remove", metavar="QUESTION", action="append", default=[],
+                        help="drop a learned question (repeatable)")
+    parser.add_argument("--purge-expired", action="store_true")
+    args = parser.parse_args(argv)
+
+    store = LearnedStore(args.path)
+    for question in args.remove:
+        print(("🗑️ removed: " if store.remove(question) else "not found: ") + question, file=sys.stderr)
+    if args.purge_expired:
+        store.corpus()
+        store.save()
+        print(f"🧹 {store.stats['expired']} expired entries purged", file=sys.stderr)
+    if args.export:
+        if args.export == "-":
+            rows = store.export_review(sys.stdout)
+        else:
+            with open(args.export, "w", encoding="utf-8", newline="") as f:
+                rows = store.export_review(f)
+        print(f"📝 exported {rows} learned QAs", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# locgenai/message_store.py
+# Compact chat history for session state — slotted records, small ids,
+# interned roles and one process-wide table of source URLs
+
+import sys
+import threading
+from collections.abc import Mapping
+
+from .postprocess import render_sources_html, render_text_html
+
+# ───────────────────────────────────────────────
+# SHARED SOURCE TABLE
+# ───────────────────────────────────────────────
+
+class SourceTable:
+    """Append-only URL <-> small int table shared by every session."""
+
+    def __init__(self):
+        self._ids = {}
+        self._urls = []
+        self._lock = threading.Lock()
+
+    def intern(self, url: str) -> int:
+        idx = self._ids.get(url)
+        if idx is None:
+            with self._lock:
+                idx = self._ids.get(url)
+                if idx is None:
+                    idx = len(self._urls)
+                    self._urls.append(sys.intern(url))
+                    self._ids[url] = idx
+        return idx
+
+    def intern_all(self, urls) -> tuple:
+        return tuple(self.intern(u) for u in urls)
+
+    def lookup(self, ids) -> list:
+        return [self._urls[i] for i in ids]
+
+    def __len__(self):
+        return len(self._urls)
+
+
+SOURCES = SourceTable()
+
+# ───────────────────────────────────────────────
+# RECORDS
+# ───────────────────────────────────────────────
+
+ROLE_USER = sys.intern("user")
+ROLE_ASSISTANT = sys.intern("assistant")
+
+
+def _compact_html(content: str, html):
+    """Render once on write; keep the HTML only when it differs from the text."""
+    if html is None:
+        html = render_text_html(content) if content else ""
+    return None if html == content else html
+
+
+class Message:
+    """One chat turn. `html` is None when it would equal `content`.
+
+    `pending` turns still wait for a model answer; `provisional` ones show
+    a local preview that the answer may replace.
+    """
+
+    __slots__ = ("id", "role", "content", "html", "source_ids", "pending", "provisional")
+
+    def __init__(self, msg_id: int, role: str, content: str, html=None,
+                 source_ids: tuple = (), pending: bool = False, provisional: bool = False):
+        self.id = msg_id
+        self.role = sys.intern(role)
+        self.content = content
+        self.html = _compact_html(content, html)
+        self.source_ids = source_ids
+        self.pending = pending
+        self.provisional = provisional
+
+
+class MessageView(Mapping):
+    """Read-only dict view of a Message: id, role, content, meta."""
+
+    __slots__ = ("_msg",)
+    _KEYS = ("id", "role", "content", "meta")
+
+    def __init__(self, msg: Message):
+        self._msg = msg
+
+    def __getitem__(self, key):
+        msg = self._msg
+        if key == "meta":
+            return self.meta
+        if key in ("id", "role", "content"):
+            return getattr(msg, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    @property
+    def meta(self) -> dict:
+        msg = self._msg
+        meta = {"html": msg.content if msg.html is None else msg.html}
+        if msg.pending:
+            meta["pending"] = True
+        if msg.provisional:
+            meta["provisional"] = True
+        if msg.source_ids:
+            sources = SOURCES.lookup(msg.source_ids)
+            meta["sources"] = sources
+            meta["sources_html"] = render_sources_html(sources)
+        return meta
+
+# ───────────────────────────────────────────────
+# STORE
+# ───────────────────────────────────────────────
+
+class MessageStore:
+    """List-like chat history; iterating yields dict-compatible views."""
+
+    __slots__ = ("_messages", "_next_id")
+
+    def __init__(self):
+        self._messages = []
+        self._next_id = 0
+
+    def append(self, role: str, content: str, meta: dict = None) -> int:
+        """Add a turn; `meta` takes the renderer's keys (html, sources, pending, provisional)."""
+        meta = meta or {}
+        msg = Message(self._next_id, role, content, meta.get("html"),
+                      SOURCES.intern_all(meta.get("sources", ())), bool(meta.get("pending")),
+                      bool(meta.get("provisional")))
+        self._next_id += 1
+        self._messages.append(msg)
+        return msg.id
+
+    def _find(self, msg_id: int) -> Message:
+        for msg in reversed(self._messages):
+            if msg.id == msg_id:
+                return msg
+        raise KeyError(msg_id)
+
+    def update(self, msg_id: int, content: str, meta: dict = None):
+        """Replace a turn's content in place (e.g. a placeholder's answer)."""
+        meta = meta or {}
+        msg = self._find(msg_id)
+        msg.content = content
+        msg.html = _compact_html(content, meta.get("html"))
+        msg.source_ids = SOURCES.intern_all(meta.get("sources", ()))
+        msg.pending = bool(meta.get("pending"))
+        msg.provisional = bool(meta.get("provisional"))
+
+    def settle(self, msg_id: int):
+        """Stop waiting on a turn but keep what it shows (e.g. a preview)."""
+        self._find(msg_id).pending = False
+
+    def clear(self):
+        self._messages.clear()
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return (MessageView(m) for m in self._messages)
+
+    def __getitem__(self, index):
+        return MessageView(self._messages[index])
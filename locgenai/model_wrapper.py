@@ -2,31 +2,42 @@
 # Final Default Wrapper — Gemini + Local fallback
 
 import os
+import difflib
 import json
 import random
-import google.generativeai as genai
+import re
+import threading
+import time
+from contextlib import nullcontext
+
+from .admission import ADMISSION, Ticket
+from .answer_cache import ANSWER_CACHE, FRESH, GRACE, MISS, NEGATIVE, STALE, answer_key
+from .bm25 import load_or_build
+from .backends import (  # noqa: F401 — GEMINI_API_KEY kept importable from here
+    BACKENDS, GEMINI_API_KEY, LOCAL_MODEL_PATH, LlamaCppBackend, LocalBackend,
+    PromptRejected, get_backend, register_backend,
+)
+from .context_cache import region_knowledge, register_region_knowledge
+from .generation import GENERATION
+from .canonical import OPEN_QUESTIONS, QUESTIONS, canonical_key
+from .learned import LEARNED
+from .prefetch import FOLLOWUPS, Prefetcher
+from .profiling import stage
+from .prompts import DEFAULT_REGION, REGIONS, get_template
+from .routing import MODEL_ROUTER, classify_request, extract_features, route
+from .snapshot import SNAPSHOT_ENABLED, SNAPSHOT_PATH, SnapshotManager
 
 # ───────────────────────────────────────────────
 # CONFIGURATION
 # ───────────────────────────────────────────────
 
-# Load Gemini API key from environment (for Hugging Face Space secret)
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
-if not GEMINI_API_KEY:
-    print("⚠️ GEMINI_API_KEY not found in environment — Gemini may not work.")
-else:
-    print("✅ GEMINI_API_KEY loaded successfully.")
-
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Model selection
-PRIMARY_MODEL = "gemini-2.5-flash-lite"
-BACKUP_MODEL = "gemini-2.5-pro"
-
 # Local data file
 PACKAGE_ROOT = os.path.dirname(__file__)
 SEED_PATH = os.path.join(PACKAGE_ROOT, "seed_qas.json")
+# Saved BM25 index, reused while the corpus it was built from is unchanged
+BM25_PATH = os.getenv("LOCGENAI_BM25_PATH", os.path.join(PACKAGE_ROOT, "bm25_index.bin"))
+# region -> knowledge passages; with the seed QAs, the prefix Gemini caches
+KNOWLEDGE_PATH = os.getenv("LOCGENAI_KNOWLEDGE_PATH", os.path.join(PACKAGE_ROOT, "region_knowledge.json"))
 
 # Load local Q&A data
 try:
@@ -37,70 +48,429 @@ except Exception as e:
     SEED_DATA = []
     print(f"⚠️ Could not load seed_qas.json: {e}")
 
+
+def _register_knowledge():
+    """Register each region's passages plus its seed QAs as regional knowledge."""
+    try:
+        with open(KNOWLEDGE_PATH, "r", encoding="utf-8") as f:
+            passages = json.load(f)
+    except Exception as e:
+        passages = {}
+        print(f"⚠️ Could not load regional knowledge: {e}")
+    seed_passages = {}
+    for item in SEED_DATA:
+        seed_passages.setdefault(item.get("region", DEFAULT_REGION), []).append(f"Q: {item['q']}\nA: {item['a']}")
+    for region in set(passages) | set(seed_passages):
+        register_region_knowledge(region, passages.get(region, []) + seed_passages.get(region, []))
+
+
+_register_knowledge()
+
 # ───────────────────────────────────────────────
 # LOCAL LOOKUP
 # ───────────────────────────────────────────────
 
+_corpus = {"version": None, "items": SEED_DATA}
+_bm25 = {"corpus": None, "index": None}
+_canonical_questions = {"corpus": None, "questions": []}
+
+
+def local_corpus() -> list:
+    """Seed QAs followed by learned ones; the same list until either changes."""
+    if LEARNED is None:
+        return SEED_DATA
+    learned = LEARNED.corpus()
+    if _corpus["version"] != (LEARNED.version, len(SEED_DATA)):
+        _corpus["items"] = SEED_DATA + learned
+        _corpus["version"] = (LEARNED.version, len(SEED_DATA))
+    return _corpus["items"]
+
+
+def bm25_index():
+    """BM25 index of `local_corpus()`, loaded from disk or rebuilt when it changes."""
+    corpus = local_corpus()
+    if _bm25["corpus"] is not corpus:
+        _bm25["index"] = load_or_build(corpus, BM25_PATH)
+        _bm25["corpus"] = corpus
+    return _bm25["index"]
+
+
+def canonical_questions() -> list:
+    """Canonical word set of each `local_corpus()` question, position for position."""
+    corpus = local_corpus()
+    if _canonical_questions["corpus"] is not corpus:
+        _canonical_questions["questions"] = [frozenset(canonical_key(item["q"]).split()) for item in corpus]
+        _canonical_questions["corpus"] = corpus
+    return _canonical_questions["questions"]
+
+
+def search_local(query: str, k: int = 5) -> list:
+    """Top-k corpus entries for `query` as (item, score, confidence), best first."""
+    corpus = local_corpus()
+    return [(corpus[doc_id], score, conf) for doc_id, score, conf in bm25_index().search(query, k)]
+
+
 def find_local_answer(query: str):
-    """Simple substring-based match from local knowledge base."""
-    q = query.strip().lower()
-    for item in SEED_DATA:
-        if q in item["q"].lower() or item["q"].lower() in q:
-            return item
-    return None
+    """Word-set containment on canonical questions, then a confident BM25
+    hit over q + a.
+
+    The query's words must all be in the question, and the question words
+    must agree, so neither "when is durga puja" nor "victoria memorial
+    ticket price" gets a "where is ..." answer. A one-word query only
+    matches a one-word question ("tell me about kolkata" is just "kolkata").
+    """
+    corpus = local_corpus()
+    q = frozenset(canonical_key(query).split())
+    asks = q & QUESTIONS
+    if q:
+        for item, cq in zip(corpus, canonical_questions()):
+            if cq & QUESTIONS == asks and (q == cq or (len(q) > 1 and q <= cq)):
+                return item
+    # BM25 ignores question words, so the hit must itself ask what the query
+    # asks: "kolkata festivals" does not say when durga puja is
+    hit = bm25_index().best(query)
+    if not hit or not (asks - OPEN_QUESTIONS) <= canonical_questions()[hit[0]]:
+        return None
+    return corpus[hit[0]]
 
 # ───────────────────────────────────────────────
-# GEMINI CALL
+# BACKENDS
 # ───────────────────────────────────────────────
 
-def _call_gemini(model_name: str, prompt: str):
-    """Call Gemini model and return plain text response."""
-    try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        if hasattr(response, "text") and response.text:
-            return response.text.strip()
-    except Exception as e:
-        print(f"[Gemini Error] {model_name}: {e}")
-    return None
+# Answers only what find_local_answer's token-aware gate accepts
+LOCAL_BACKEND = register_backend(LocalBackend(local_corpus, lookup=find_local_answer))
+# Looser than the local backend's own threshold: previews only need to be related
+PREVIEW_MATCH_THRESHOLD = float(os.getenv("LOCGENAI_PREVIEW_THRESHOLD", "0.5"))
+if LOCAL_MODEL_PATH:
+    register_backend(LlamaCppBackend(LOCAL_MODEL_PATH))
+
+
+def _plan_backends(prompt: str):
+    """Yield the available backends to try, in order, for this query.
+
+    The "gemini" routing slot expands into the models MODEL_ROUTER picks
+    from the query's complexity and the observed latency/error stats.
+    """
+    _, confidence = LOCAL_BACKEND.match(prompt, threshold=0.0)
+    features = extract_features(prompt, confidence)
+    for slot in route(features["request_class"]):
+        if slot == "gemini":
+            candidates = [get_backend(name) for name in MODEL_ROUTER.plan(features)]
+        else:
+            candidates = [BACKENDS.get(slot)]
+        for backend in candidates:
+            if backend is not None and backend.available():
+                yield backend
+
+
+def _text_for(backend, prompt: str, user_text: str) -> str:
+    """What `backend` is given: retrieval matches the question itself (and
+    reuses the lookup already made for it), models get the rendered template."""
+    return prompt if backend is LOCAL_BACKEND else user_text
+
+
+BUSY_ANSWER = "Ektu beshi bhir cholche — ek minute pore abar jiggesh korbe?"
+# Admission-control identity for cache refreshes and other background calls
+BACKGROUND_SESSION = "background"
+REJECTED_ANSWER = "Sorry, ei proshner uttor ami dite parbo na. Onno kichu jiggesh korbe?"
+
+
+def _fallback_answer() -> str:
+    return random.choice([
+        "Sorry re, amar connection ta thik nei, abar try korbe?",
+        "Hmm... ektu samasya holo, please try again!",
+    ])
 
 # ───────────────────────────────────────────────
 # MAIN FUNCTION
 # ───────────────────────────────────────────────
 
-def get_response(prompt: str):
-    """Return dict with {'answer': str, 'sources': list}"""
+def get_response(prompt: str, language_style: str = None, region: str = DEFAULT_REGION,
+                 session_id: str = None):
+    """Return dict with {'answer': str, 'sources': list}
+
+    `language_style` and `region` select the prompt template; style
+    directives never touch `prompt`, so local lookup sees the raw query.
+    `session_id` is who admission control charges for a model call; with
+    one, the answered turn also feeds the follow-up prefetcher.
+    """
     if not prompt or not prompt.strip():
         return {"answer": "Please enter a question.", "sources": []}
+    result = _answer(prompt, language_style, region, session_id)
+    if PREFETCHER is not None and session_id and session_id != BACKGROUND_SESSION:
+        PREFETCHER.after_answer(session_id, prompt, language_style, region)
+    return result
+
 
-    # Step 1: Try local seed knowledge first
-    local_match = find_local_answer(prompt)
+def _answer(prompt: str, language_style: str, region: str, session_id: str) -> dict:
+
+    # Step 1: Try local seed knowledge first (the local backend keeps the
+    # result, so routing and the backend walk below do not search again)
+    with stage("local match"):
+        local_match = LOCAL_BACKEND.answer_item(prompt)
     if local_match:
         return {
             "answer": local_match["a"],
-            "sources": local_match.get("sources", [])
+            "sources": local_match.get("sources", []),
+            "backend": "local",
         }
 
-    # Step 2: Add instruction for Benglish style
-    instruction = (
-        "Reply in Benglish (mix of Bengali and English), friendly tone, "
-        "short and natural, relevant to the user's question only."
-    )
-    final_prompt = f"{instruction}\n\nUser: {prompt}\nAssistant:"
-
-    # Step 3: Try Gemini Flash Lite first
-    reply = _call_gemini(PRIMARY_MODEL, final_prompt)
-    if not reply:
-        # Step 4: Backup model
-        reply = _call_gemini(BACKUP_MODEL, final_prompt)
-
-    # Step 5: Fallback if everything fails
-    if not reply:
-        fallback = random.choice([
-            "Sorry re, amar connection ta thik nei, abar try korbe?",
-            "Hmm... ektu samasya holo, please try again!",
-        ])
-        return {"answer": fallback, "sources": []}
-
-    # Step 6: Return final Gemini answer
-    return {"answer": reply, "sources": []}
+    # Step 2: Pick the precompiled template (instruction goes as system_instruction)
+    with stage("prompt build"):
+        template = get_template(language_style, region)
+        user_text = template.render(prompt)
+        knowledge = region_knowledge(template.region)
+
+    # Step 3: Cached model answer — fresh ones skip the model entirely,
+    # stale ones are served now and refreshed in the background
+    key = answer_key(prompt, template.key) if ANSWER_CACHE is not None else None
+    state, cached = ANSWER_CACHE.lookup(key) if key else (MISS, None)
+    if state == NEGATIVE:
+        return dict(cached, cache=state)
+    if state in (FRESH, STALE) and LEARNED is not None:
+        LEARNED.observe(prompt, cached, template.key, generated=False)
+    if state == FRESH:
+        if cached.get("prefetched") and PREFETCHER is not None:
+            PREFETCHER.record_hit()
+        return dict(cached, cache=state)
+    if state == STALE:
+        def refresh():
+            with _admit(BACKGROUND_SESSION) as ticket:
+                if not ticket.admitted:
+                    return None
+                try:
+                    fresh = _model_answer(prompt, user_text, template.system_instruction, knowledge, template.name)
+                except PromptRejected as e:
+                    # As in step 5: stop serving (and refreshing) the old answer
+                    print(f"[Model] prompt rejected on refresh: {e}")
+                    ANSWER_CACHE.store_negative(key, {"answer": REJECTED_ANSWER, "sources": [], "rejected": True})
+                    return None
+            # As in step 7: retrieval answers are neither cached nor learned,
+            # so the stale model answer stays until a model answers again
+            if not fresh or fresh["backend"] == LOCAL_BACKEND.name:
+                return None
+            if LEARNED is not None:
+                LEARNED.observe(prompt, fresh, template.key, miss=False)
+            return fresh
+        ANSWER_CACHE.refresh_async(key, refresh)
+        return dict(cached, cache=state)
+
+    # Step 4: Admission control — over the caps, answer from local data only
+    with _admit(session_id) as ticket:
+        if not ticket.admitted:
+            return _shed_answer(prompt, ticket.reason, cached if state == GRACE else None)
+
+        # Step 5: Walk the backends routed for this request (cheapest capable first)
+        try:
+            result = _model_answer(prompt, user_text, template.system_instruction, knowledge, template.name)
+        except PromptRejected as e:
+            print(f"[Model] prompt rejected: {e}")
+            rejected = {"answer": REJECTED_ANSWER, "sources": [], "rejected": True}
+            if key:
+                ANSWER_CACHE.store_negative(key, rejected)
+            return rejected
+
+    # Step 6: Fallback if everything fails — a recent answer beats an apology
+    if result is None:
+        if state == GRACE:
+            return dict(cached, cache=state)
+        return {"answer": _fallback_answer(), "sources": [], "fallback": True}
+
+    # Step 7: Return final answer (generated ones are kept for next time and
+    # may be learned; retrieval answers are cheap and track seed edits)
+    if result["backend"] != LOCAL_BACKEND.name:
+        if key:
+            ANSWER_CACHE.store(key, result)
+        if LEARNED is not None:
+            LEARNED.observe(prompt, result, template.key)
+    return result
+
+
+def prefetch_answer(prompt: str, language_style: str = None, region: str = DEFAULT_REGION) -> str:
+    """Answer a predicted question into ANSWER_CACHE; returns what happened.
+
+    Runs as the background session and counts as no miss for learning.
+    """
+    if ANSWER_CACHE is None:
+        return "no_cache"
+    if LOCAL_BACKEND.answer_item(prompt):
+        return "local"
+    template = get_template(language_style, region)
+    key = answer_key(prompt, template.key)
+    if ANSWER_CACHE.peek(key) != MISS:
+        return "cached"
+    with _admit(BACKGROUND_SESSION) as ticket:
+        if not ticket.admitted:
+            return "shed"
+        try:
+            result = _model_answer(prompt, template.render(prompt), template.system_instruction,
+                                   region_knowledge(template.region), template.name)
+        except PromptRejected:
+            ANSWER_CACHE.store_negative(key, {"answer": REJECTED_ANSWER, "sources": [], "rejected": True})
+            return "rejected"
+    if result is None or result["backend"] == LOCAL_BACKEND.name:
+        return "failed"
+    ANSWER_CACHE.store(key, dict(result, prefetched=True))
+    return "prefetched"
+
+
+def _interactive_busy() -> bool:
+    return ADMISSION is not None and ADMISSION.snapshot()["inflight"] > 0
+
+
+PREFETCHER = Prefetcher(prefetch_answer, FOLLOWUPS, busy=_interactive_busy) if FOLLOWUPS is not None else None
+
+# Warm restarts: set by init_runtime()
+SNAPSHOTS = None
+_runtime_lock = threading.Lock()
+
+
+def init_runtime():
+    """Restore the last runtime snapshot, then keep it current (periodically
+    and at exit). Returns the SnapshotManager, or None when disabled.
+
+    Entry points (app.py, serve.py) call this once before the first request;
+    importing this module has no such side effects, so CLIs and scripts
+    that only need lookups do not touch the snapshot. Safe to call again.
+    """
+    global SNAPSHOTS
+    with _runtime_lock:
+        if SNAPSHOTS is None and SNAPSHOT_ENABLED:
+            SNAPSHOTS = SnapshotManager(SNAPSHOT_PATH, SEED_PATH, index=lambda: _bm25["index"],
+                                        cache=ANSWER_CACHE, learned=LEARNED, stats=MODEL_ROUTER.stats)
+            SNAPSHOTS.restore()
+            SNAPSHOTS.start()
+    return SNAPSHOTS
+
+
+def _admit(session_id: str):
+    if ADMISSION is None:
+        return nullcontext(Ticket(True))
+    return ADMISSION.admit(session_id)
+
+
+def _shed_answer(prompt: str, reason: str, stale=None) -> dict:
+    """Local-only answer for a request admission control turned away."""
+    if stale:
+        return dict(stale, cache=GRACE, shed=reason)
+    reply = LOCAL_BACKEND.generate(prompt)
+    if reply:
+        return {"answer": reply, "sources": LOCAL_BACKEND.sources_for(prompt),
+                "backend": LOCAL_BACKEND.name, "shed": reason}
+    preview = preview_answer(prompt)
+    if preview:
+        return dict(preview, shed=reason)
+    return {"answer": BUSY_ANSWER, "sources": [], "fallback": True, "shed": reason}
+
+
+def _model_answer(prompt: str, user_text: str, system_instruction: str, knowledge: str,
+                  style: str = None):
+    """First non-empty backend answer as a result dict, or None.
+
+    Output budget, temperature and stops follow the request class and the
+    template's language `style`. Raises PromptRejected when a model
+    refuses the prompt itself.
+    """
+    generation = GENERATION.settings_for(classify_request(prompt), style)
+    with stage("model call"):
+        for backend in _plan_backends(prompt):
+            text = _text_for(backend, prompt, user_text)
+            if backend.network:
+                reply = MODEL_ROUTER.timed(backend.name, backend.generate,
+                                           text, system_instruction, knowledge, generation)
+            else:
+                reply = backend.generate(text, system_instruction, knowledge, generation)
+            if reply:
+                return {"answer": reply, "sources": backend.sources_for(text),
+                        "backend": backend.name}
+    return None
+
+
+# Words that say nothing about what a question is asking for
+_PREVIEW_STOPWORDS = frozenset(
+    "a an and are best can do does for from good how i in is it me of on should the "
+    "there to visit what when where which who why with you".split()
+) | frozenset(r.lower() for r in REGIONS)
+
+
+def _topic_words(text: str) -> set:
+    return {w for w in re.findall(r"\w+", text.lower()) if w not in _PREVIEW_STOPWORDS}
+
+
+def preview_answer(prompt: str):
+    """Closest seed answer to show while the model call runs, or None.
+
+    Only for queries `find_local_answer` misses (those are answered
+    immediately anyway). Candidates are scored on character similarity and
+    shared topic words, so a question merely naming the same city does not
+    qualify. The result is flagged `provisional`. The scan runs in the
+    caller, not MATCH_POOL: it is cheap next to the model call it covers.
+    """
+    if not prompt or not prompt.strip() or LOCAL_BACKEND.answer_item(prompt):
+        return None
+    words = _topic_words(prompt)
+    if not words:
+        return None
+    q = " ".join(prompt.lower().split())
+    best, best_score = None, 0.0
+    for item in local_corpus():
+        item_words = _topic_words(item["q"])
+        overlap = len(words & item_words) / len(words | item_words) if item_words else 0.0
+        if not overlap:
+            continue
+        score = 0.5 * difflib.SequenceMatcher(None, q, item["q"].lower()).ratio() + 0.5 * overlap
+        if score > best_score:
+            best, best_score = item, score
+    if best is None or best_score < PREVIEW_MATCH_THRESHOLD:
+        return None
+    return {
+        "answer": best["a"],
+        "sources": list(best.get("sources", [])),
+        "backend": "local",
+        "provisional": True,
+        "matched_question": best["q"],
+        "score": round(best_score, 3),
+    }
+
+
+def stream_response(prompt: str, language_style: str = None, region: str = DEFAULT_REGION,
+                    session_id: str = None):
+    """Yield the answer as text chunks, routed and admitted like get_response."""
+    if not prompt or not prompt.strip():
+        yield "Please enter a question."
+        return
+
+    local_match = LOCAL_BACKEND.answer_item(prompt)
+    if local_match:
+        yield local_match["a"]
+        return
+
+    template = get_template(language_style, region)
+    user_text = template.render(prompt)
+    knowledge = region_knowledge(template.region)
+
+    generation = GENERATION.settings_for(classify_request(prompt), template.name)
+
+    with _admit(session_id) as ticket:
+        if not ticket.admitted:
+            yield _shed_answer(prompt, ticket.reason)["answer"]
+            return
+        for backend in _plan_backends(prompt):
+            produced = False
+            start = time.perf_counter()
+            text = _text_for(backend, prompt, user_text)
+            try:
+                for chunk in backend.stream(text, template.system_instruction, knowledge, generation):
+                    produced = True
+                    yield chunk
+            except PromptRejected as e:
+                # As in get_response: no other model is asked
+                print(f"[Model] prompt rejected: {e}")
+                yield REJECTED_ANSWER
+                return
+            if backend.network:
+                MODEL_ROUTER.stats.record(backend.name, time.perf_counter() - start, produced)
+            if produced:
+                return
+
+    yield _fallback_answer()
@@ -0,0 +1,247 @@
+# locgenai/offload.py
+# Process-pool offload for CPU-bound corpus matching — keeps the GIL free for
+# Streamlit reruns and spreads large scans over every core.
+#
+# Only LocalBackend's question scan is offloaded; the preview scan and the
+# BM25 build (once per corpus change) still run in the calling process.
+#
+# The question index is written once to a flat, read-only file that workers
+# mmap; tasks carry only (path, query, slice bounds), never the corpus.
+#
+#   header  <4s I I>   magic b"LGIX", format version, entry count
+#   offsets <I> * (count + 1)  byte offsets into the blob
+#   blob    UTF-8 lower-cased questions, back to back
+
+import atexit
+import difflib
+import itertools
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+# 0 disables the pool; matching then always runs in-process
+OFFLOAD_WORKERS = int(os.getenv("LOCGENAI_OFFLOAD_WORKERS", str(max(0, (os.cpu_count() or 1) - 1))))
+# Below this many entries a scan is cheaper than the inter-process round trip
+OFFLOAD_MIN_ITEMS = int(os.getenv("LOCGENAI_OFFLOAD_MIN_ITEMS", "2000"))
+# Matches allowed in the pool at once; more than this run synchronously
+MAX_PENDING_MATCHES = int(os.getenv("LOCGENAI_OFFLOAD_QUEUE", "16"))
+
+_MAGIC = b"LGIX"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sII")
+_OFFSET = struct.Struct("<I")
+
+# ───────────────────────────────────────────────
+# SHARED INDEX
+# ───────────────────────────────────────────────
+
+def write_index(texts, path: str):
+    """Write `texts` in the flat index format to `path`."""
+    encoded = [t.encode("utf-8") for t in texts]
+    offsets = [0] + list(itertools.accumulate(len(b) for b in encoded))
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(encoded)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(encoded))
+
+
+class IndexView:
+    """Read-only mmap of an index file; `text(i)` decodes one entry."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"not a locgenai index: {path}")
+        self._offsets_at = _HEADER.size
+        self._blob_at = _HEADER.size + _OFFSET.size * (self.count + 1)
+
+    def text(self, i: int) -> str:
+        lo, hi = struct.unpack_from("<2I", self._mm, self._offsets_at + _OFFSET.size * i)
+        return self._mm[self._blob_at + lo:self._blob_at + hi].decode("utf-8")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self._mm.close()
+
+
+def best_match_in(index: IndexView, query: str, lo: int = 0, hi: int = None):
+    """(position, score) of the most similar entry in [lo, hi), or (-1, 0.0).
+
+    Same scoring and tie-breaking (first best wins) as LocalBackend.match.
+    """
+    hi = len(index) if hi is None else hi
+    matcher = difflib.SequenceMatcher(b=query, autojunk=False)
+    best, best_score = -1, 0.0
+    for i in range(lo, hi):
+        matcher.set_seq1(index.text(i))
+        if matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+            continue
+        score = matcher.ratio()
+        if score > best_score:
+            best, best_score = i, score
+    return best, best_score
+
+def corpus_fingerprint(corpus) -> int:
+    """Hash of the corpus questions — in-place edits (`SEED_DATA[:] = ...`)
+    change it where the list's identity and length would not."""
+    return hash(tuple(item["q"] for item in corpus))
+
+# ───────────────────────────────────────────────
+# WORKER SIDE
+# ───────────────────────────────────────────────
+
+_worker_index = None  # the IndexView this worker process has mapped
+
+
+def _score_slice(path: str, query: str, lo: int, hi: int):
+    global _worker_index
+    if _worker_index is None or _worker_index.path != path:
+        if _worker_index is not None:
+            _worker_index.close()
+        _worker_index = IndexView(path)
+    return best_match_in(_worker_index, query, lo, hi)
+
+# ───────────────────────────────────────────────
+# POOL
+# ───────────────────────────────────────────────
+
+class OffloadPool:
+    """Process pool that scores queries against a published, mmap-shared index.
+
+    `best_match` splits the index into one slice per worker. When the pool
+    is saturated, disabled or broken, the same scan runs in the caller.
+    """
+
+    def __init__(self, workers: int = OFFLOAD_WORKERS, max_pending: int = MAX_PENDING_MATCHES,
+                 directory: str = None):
+        self.workers = workers
+        self.directory = directory or tempfile.gettempdir()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._index = None
+        self._fingerprint = None
+        self._generation = 0
+        self._pins = {}  # index path -> matches using it
+        self._lock = threading.Lock()
+        self.stats = {"offloaded": 0, "sync": 0, "published": 0, "broken": 0, "errors": 0}
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            # spawn: never fork the threaded server process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def publish(self, corpus, fingerprint=None) -> IndexView:
+        """Write the corpus questions to a fresh index file unless unchanged."""
+        fingerprint = corpus_fingerprint(corpus) if fingerprint is None else fingerprint
+        with self._lock:
+            return self._publish(corpus, fingerprint)
+
+    def _publish(self, corpus, fingerprint) -> IndexView:
+        if self._index is not None and fingerprint == self._fingerprint:
+            return self._index
+        self._generation += 1
+        path = os.path.join(self.directory, f"locgenai-index-{os.getpid()}-{self._generation}.bin")
+        write_index((item["q"].lower() for item in corpus), path)
+        old, self._index, self._fingerprint = self._index, IndexView(path), fingerprint
+        self.stats["published"] += 1
+        # Workers may not have opened an index still in use yet: it goes
+        # when its last match finishes instead
+        if old is not None and not self._pins.get(old.path):
+            _discard(old)
+        return self._index
+
+    def _pin(self, corpus) -> IndexView:
+        """The index for `corpus`, kept on disk until `_unpin`."""
+        fingerprint = corpus_fingerprint(corpus)
+        with self._lock:
+            index = self._publish(corpus, fingerprint)
+            self._pins[index.path] = self._pins.get(index.path, 0) + 1
+            return index
+
+    def _unpin(self, index: IndexView):
+        with self._lock:
+            self._pins[index.path] -= 1
+            if not self._pins[index.path]:
+                del self._pins[index.path]
+                if index is not self._index:
+                    _discard(index)
+
+    def best_match(self, corpus, query: str):
+        """(corpus position, score) of the closest question, or (-1, 0.0)."""
+        index = self._pin(corpus)
+        try:
+            return self._best_match(index, query)
+        finally:
+            self._unpin(index)
+
+    def _best_match(self, index: IndexView, query: str):
+        if not len(index):
+            return -1, 0.0
+        executor = self._get_executor()
+        if executor is None or not self._slots.acquire(blocking=False):
+            self.stats["sync"] += 1
+            return best_match_in(index, query)
+        try:
+            step = -(-len(index) // self.workers)
+            futures = [executor.submit(_score_slice, index.path, query, lo, min(lo + step, len(index)))
+                       for lo in range(0, len(index), step)]
+            results = [f.result() for f in futures]
+            self.stats["offloaded"] += 1
+        except BrokenProcessPool as e:
+            print(f"⚠️ Offload pool broke, matching in-process from now on: {e}")
+            self.stats["broken"] += 1
+            self.shutdown()
+            self.workers = 0
+            return best_match_in(index, query)
+        except OSError as e:
+            # A worker could not map the index; our own view still works
+            print(f"⚠️ Offloaded match failed, matching in-process: {e}")
+            self.stats["errors"] += 1
+            return best_match_in(index, query)
+        finally:
+            self._slots.release()
+        # Slices come back in order, so max() keeps the first best like a linear scan
+        return max(results, key=lambda r: r[1]) if results else (-1, 0.0)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        self.shutdown()
+        if self._index is not None:
+            _discard(self._index)
+            self._index.close()
+            self._index = None
+
+
+def _discard(index: IndexView):
+    """Delete an index file no match is using. Workers that mapped it keep
+    their mapping until they move on; ours unmaps when garbage-collected."""
+    try:
+        os.remove(index.path)
+    except OSError:
+        pass
+
+
+MATCH_POOL = OffloadPool() if OFFLOAD_WORKERS > 0 else None
+if MATCH_POOL is not None:
+    atexit.register(MATCH_POOL.close)
@@ -0,0 +1,163 @@
+# locgenai/postprocess.py
+# Answer post-processing — one pass from raw model output to display-ready result
+
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+from urllib.parse import urlparse
+
+from .profiling import stage
+
+# ───────────────────────────────────────────────
+# HELPERS
+# ───────────────────────────────────────────────
+
+URL_PATTERN = re.compile(r'(https?://[^\s<>"\'\\)]+)', flags=re.IGNORECASE)
+
+SOURCE_KEYS = ("source", "sources", "references", "urls")
+TEXT_KEYS = ("answer", "text", "content", "response")
+MAX_SOURCE_LINKS = 3
+
+EMPTY_ANSWER_TEXT = "⚠️ Sorry — I couldn't generate an answer right now. Please try rephrasing or try again."
+
+
+@lru_cache(maxsize=4096)
+def is_safe_url(url: str) -> bool:
+    try:
+        parsed = urlparse(url)
+        return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+    except Exception:
+        return False
+
+
+def sanitize_html(text: Any) -> str:
+    if text is None:
+        return ""
+    s = str(text)
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _link(url: str, label: str = None) -> str:
+    safe_url = url.replace('"', "%22")
+    return (f'<a href="{safe_url}" target="_blank" rel="noopener noreferrer" '
+            f'class="source-link">{label or safe_url}</a>')
+
+
+def _linkify(text: str, found: list = None) -> str:
+    """Wrap safe URLs in anchors; collect them into `found` when given."""
+    def replace_url(match):
+        url = match.group(0)
+        if is_safe_url(url):
+            if found is not None:
+                found.append(url)
+            return _link(url)
+        return url
+    return URL_PATTERN.sub(replace_url, text)
+
+
+def linkify_urls(text: str) -> str:
+    return _linkify(text)
+
+
+@lru_cache(maxsize=1024)
+def render_text_html(text: str) -> str:
+    """Escaped, line-broken, linkified HTML for a message body."""
+    return _linkify(sanitize_html(text).replace("\n", "<br>"))
+
+
+def render_sources_html(sources) -> str:
+    """'Link 1, Link 2, ...' anchors for the first few sources."""
+    return ", ".join(
+        _link(src, f"Link {i}") for i, src in enumerate(sources[:MAX_SOURCE_LINKS], start=1)
+    )
+
+
+def extract_text_from_response(response: Any) -> str:
+    if response is None:
+        return ""
+    if isinstance(response, str):
+        return response
+    if isinstance(response, dict):
+        for key in TEXT_KEYS:
+            if key in response and response[key]:
+                return str(response[key])
+        if "choices" in response:
+            parts = []
+            for choice in response.get("choices", []):
+                if isinstance(choice, dict):
+                    parts.append(choice.get("text") or choice.get("message", {}).get("content", "") or "")
+            if parts:
+                return " ".join(parts).strip()
+        return json.dumps(response, indent=2)
+    try:
+        return str(response)
+    except Exception:
+        return "[Unable to display response]"
+
+
+def _dedupe(urls) -> list:
+    seen, out = set(), []
+    for url in urls:
+        url = url.strip()
+        key = url.rstrip("/").lower()
+        if key not in seen and is_safe_url(url):
+            seen.add(key)
+            out.append(url)
+    return out
+
+
+def extract_sources(response: Any) -> list:
+    """Validated, de-duplicated source URLs from a dict-like response."""
+    if not isinstance(response, dict):
+        return []
+    sources = []
+    for key in SOURCE_KEYS:
+        if key in response:
+            value = response[key]
+            if isinstance(value, str):
+                sources.append(value)
+            elif isinstance(value, (list, tuple)):
+                sources.extend(s for s in value if isinstance(s, str))
+    return _dedupe(sources)
+
+# ───────────────────────────────────────────────
+# PIPELINE
+# ───────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class ProcessedAnswer:
+    """Display-ready answer: plain text, clean sources and pre-rendered HTML."""
+    text: str
+    sources: tuple = field(default_factory=tuple)
+    html: str = ""
+    sources_html: str = ""
+
+    def to_meta(self) -> dict:
+        """Fields the chat renderer stores alongside the message."""
+        meta = {"html": self.html}
+        if self.sources:
+            meta["sources"] = list(self.sources)
+            meta["sources_html"] = self.sources_html
+        return meta
+
+
+def process_response(response: Any) -> ProcessedAnswer:
+    """Normalize any get_response()-style result in a single pass.
+
+    Dict responses take their sources from the source keys; plain strings
+    take them from URLs found in the text while it is being linkified.
+    """
+    with stage("response extraction"):
+        text = extract_text_from_response(response)
+        if not text or not str(text).strip():
+            text = EMPTY_ANSWER_TEXT
+
+        found = []
+        html = _linkify(sanitize_html(text).replace("\n", "<br>"), found)
+        if isinstance(response, dict):
+            sources = extract_sources(response)
+        else:
+            sources = _dedupe(found)
+        return ProcessedAnswer(text, tuple(sources), html, render_sources_html(sources))
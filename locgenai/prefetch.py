@@ -0,0 +1,284 @@
+# locgenai/prefetch.py
+# Follow-up prefetching — learns which question tends to follow which from
+# session histories, and answers the likely next questions into the answer
+# cache while the user is still reading.
+#
+# Prefetches run on one background thread, only while no interactive model
+# call is in flight, within a per-minute budget, and are admitted as the
+# background session, so they never take a slot from a user.
+#
+#   python -m locgenai.prefetch --train sessions.json   # list of question lists
+#   python -m locgenai.prefetch --predict "durga puja kobe"
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from .canonical import canonical
+from .gazetteer import extract_entities
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+PACKAGE_ROOT = os.path.dirname(__file__)
+PREFETCH_ENABLED = os.getenv("LOCGENAI_PREFETCH", "1") != "0"
+FOLLOWUPS_PATH = os.getenv("LOCGENAI_FOLLOWUPS_PATH", os.path.join(PACKAGE_ROOT, "followups.json"))
+# Likely next questions answered after each turn
+PREFETCH_TOP_K = int(os.getenv("LOCGENAI_PREFETCH_TOP_K", "2"))
+# A follow-up must have been seen this often before it is worth a model call
+MIN_SUPPORT = int(os.getenv("LOCGENAI_PREFETCH_MIN_SUPPORT", "2"))
+# Model calls per minute the prefetcher may spend
+PREFETCH_BUDGET_PER_MINUTE = float(os.getenv("LOCGENAI_PREFETCH_BUDGET", "6"))
+PREFETCH_QUEUE = 8
+# Pause before each prefetch, and how long to wait out interactive traffic
+PREFETCH_DELAY_SECONDS = 1.0
+BUSY_WAIT_SECONDS = 5.0
+MAX_STATES = 5000
+MAX_FOLLOWERS = 20
+MAX_SESSIONS = 10000
+SAVE_EVERY = 50
+
+# ───────────────────────────────────────────────
+# FOLLOW-UP MODEL
+# ───────────────────────────────────────────────
+
+class FollowUpModel:
+    """First-order Markov model over canonical questions.
+
+    Each question updates two states: the exact question ("q:") and its
+    first gazetteer entity ("e:"). The entity state generalizes, so a new
+    question about Durga Puja still predicts the usual Durga Puja
+    follow-ups.
+    """
+
+    def __init__(self, path: str = None, min_support: int = MIN_SUPPORT):
+        self.path = path
+        self.min_support = min_support
+        self._next = OrderedDict()   # state -> Counter(canonical question)
+        self._text = OrderedDict()   # canonical question -> last spelling asked
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        if path:
+            self.load()
+
+    @staticmethod
+    def _states(prompt: str) -> list:
+        states = [f"q:{canonical(prompt)}"]
+        entities = extract_entities(prompt)
+        if entities:
+            states.append(f"e:{entities[0]}")
+        return states
+
+    def learn(self, prev: str, nxt: str):
+        """Record that `nxt` was asked right after `prev` in one session."""
+        nxt_key = canonical(nxt)
+        if not nxt_key or nxt_key == canonical(prev):
+            return
+        with self._lock:
+            self._text[nxt_key] = " ".join(nxt.split())
+            self._text.move_to_end(nxt_key)
+            for state in self._states(prev):
+                followers = self._next.pop(state, None) or Counter()
+                self._next[state] = followers
+                followers[nxt_key] += 1
+                if len(followers) > 2 * MAX_FOLLOWERS:
+                    self._next[state] = Counter(dict(followers.most_common(MAX_FOLLOWERS)))
+            while len(self._next) > MAX_STATES:
+                self._next.popitem(last=False)
+            while len(self._text) > MAX_STATES * 2:
+                self._text.popitem(last=False)
+            self._unsaved += 1
+        if self.path and self._unsaved >= SAVE_EVERY:
+            self.save()
+
+    def learn_session(self, questions: list):
+        for prev, nxt in zip(questions, questions[1:]):
+            self.learn(prev, nxt)
+
+    def predict(self, prompt: str, k: int = PREFETCH_TOP_K) -> list:
+        """Up to `k` likely next questions, exact-question evidence first."""
+        own = canonical(prompt)
+        picked = []
+        with self._lock:
+            for state in self._states(prompt):
+                for key, count in self._next.get(state, Counter()).most_common():
+                    if len(picked) >= k or count < self.min_support:
+                        break
+                    if key != own and key in self._text and self._text[key] not in picked:
+                        picked.append(self._text[key])
+        return picked
+
+    def __len__(self):
+        return len(self._next)
+
+    # — persistence —
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Could not load follow-up model: {e}")
+            return
+        with self._lock:
+            self._next = OrderedDict((s, Counter(c)) for s, c in data.get("next", {}).items())
+            self._text = OrderedDict(data.get("text", {}))
+        print(f"✅ Loaded follow-ups for {len(self._next)} questions")
+
+    def flush(self):
+        """Save if anything was learned since the last save."""
+        if self.path and self._unsaved:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = {"next": {s: dict(c) for s, c in self._next.items()}, "text": dict(self._text)}
+            self._unsaved = 0
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save follow-up model: {e}")
+
+# ───────────────────────────────────────────────
+# PREFETCHER
+# ───────────────────────────────────────────────
+
+class Prefetcher:
+    """Learns from each answered turn and prefetches the predicted next ones.
+
+    `fetch(prompt, language_style, region)` answers one question into the
+    cache and returns a status word for the stats; `busy()` is True while
+    interactive model calls are running.
+    """
+
+    def __init__(self, fetch, model: FollowUpModel, busy=None, top_k: int = PREFETCH_TOP_K,
+                 budget_per_minute: float = PREFETCH_BUDGET_PER_MINUTE, max_queue: int = PREFETCH_QUEUE,
+                 delay: float = PREFETCH_DELAY_SECONDS, clock=time.monotonic):
+        self.model = model
+        self.top_k = top_k
+        self.delay = delay
+        self._fetch = fetch
+        self._busy = busy or (lambda: False)
+        self._clock = clock
+        self._rate = budget_per_minute / 60.0
+        self._burst = max(1.0, float(top_k))
+        self._tokens = self._burst
+        self._updated = clock()
+        self._queue = queue.Queue(max_queue)
+        self._pending = set()
+        self._last = OrderedDict()  # session id -> previous question
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = Counter()
+
+    def after_answer(self, session_id: str, prompt: str, language_style: str = None, region: str = None):
+        """Learn the session's transition into `prompt`, then queue its likely follow-ups."""
+        with self._lock:
+            prev = self._last.pop(session_id, None)
+            self._last[session_id] = prompt
+            while len(self._last) > MAX_SESSIONS:
+                self._last.popitem(last=False)
+        if prev is not None:
+            self.model.learn(prev, prompt)
+        for question in self.model.predict(prompt, self.top_k):
+            self._submit((question, language_style, region))
+
+    def record_hit(self):
+        self.stats["hits"] += 1
+
+    def _submit(self, job):
+        tag = (canonical(job[0]), job[1], job[2])
+        with self._lock:
+            if tag in self._pending:
+                return
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.stats["dropped"] += 1
+                return
+            self._pending.add(tag)
+            self.stats["queued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="locgenai-prefetch", daemon=True)
+                self._thread.start()
+
+    def _spend(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                time.sleep(self.delay)
+                waited = 0.0
+                while self._busy() and waited < BUSY_WAIT_SECONDS:
+                    time.sleep(0.2)
+                    waited += 0.2
+                if self._busy():
+                    self.stats["busy"] += 1
+                elif not self._spend():
+                    self.stats["over_budget"] += 1
+                else:
+                    self.stats[self._fetch(*job) or "done"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[Prefetch] failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard((canonical(job[0]), job[1], job[2]))
+
+    def snapshot(self) -> dict:
+        return {"queue_depth": self._queue.qsize(), "states": len(self.model), **self.stats}
+
+
+FOLLOWUPS = FollowUpModel(FOLLOWUPS_PATH) if PREFETCH_ENABLED else None
+if FOLLOWUPS is not None:
+    atexit.register(FOLLOWUPS.flush)
+
+# ───────────────────────────────────────────────
+# CLI
+# ───────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and inspect the follow-up model")
+    parser.add_argument("--path", default=FOLLOWUPS_PATH)
+    parser.add_argument("--train", metavar="JSON", help="session histories: a list of question lists")
+    parser.add_argument("--predict", metavar="QUESTION", action="append", default=[])
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    model = FollowUpModel(args.path)
+    if args.train:
+        with open(args.train, "r", encoding="utf-8") as f:
+            sessions = json.load(f)
+        for questions in sessions:
+            model.learn_session([q for q in questions if isinstance(q, str) and q.strip()])
+        model.save()
+        print(f"📝 trained on {len(sessions)} sessions, {len(model)} states", file=sys.stderr)
+    for question in args.predict:
+        print(f"{question} →")
+        for nxt in model.predict(question, args.k):
+            print(f"    {nxt}")
+
+
+if __name__ == "__main__":
+    main()
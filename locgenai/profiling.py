@@ -0,0 +1,253 @@
+# locgenai/profiling.py
+# Opt-in per-request profiling — cProfile for hot functions, a stack sampler
+# for flame graphs, and named stage timings. Off unless forced or sampled.
+
+import cProfile
+import html
+import io
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+# Fraction of normal requests profiled automatically (0 = only when forced)
+PROFILE_SAMPLE_RATE = float(os.getenv("LOCGENAI_PROFILE_RATE", "0"))
+SAMPLE_INTERVAL_SECONDS = 0.002
+MAX_STORED_PROFILES = 20
+
+PROFILES = deque(maxlen=MAX_STORED_PROFILES)
+_active = threading.local()
+
+# ───────────────────────────────────────────────
+# STACK SAMPLER
+# ───────────────────────────────────────────────
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    """Periodically snapshots one thread's stack into folded-stack counts."""
+
+    def __init__(self, thread_id: int, counts: Counter, interval: float):
+        super().__init__(daemon=True, name="locgenai-profiler")
+        self.thread_id = thread_id
+        self.counts = counts
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+# ───────────────────────────────────────────────
+# REQUEST PROFILE
+# ───────────────────────────────────────────────
+
+class RequestProfile:
+    """Profile of one request, possibly spread over several threads.
+
+    Each `activate()` block (e.g. model call on a worker, then render on the
+    script thread) is profiled and merged into the same result.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.created = time.time()
+        self.elapsed = 0.0
+        self.stages = []  # (name, seconds)
+        self.folded = Counter()
+        self._stats = None
+        self._lock = threading.Lock()
+        self.finished = False
+
+    @contextmanager
+    def activate(self):
+        if getattr(_active, "profile", None) is not None:
+            # Already profiling this thread — only one profiler may be enabled
+            yield self
+            return
+        profiler = cProfile.Profile()
+        sampler = _Sampler(threading.get_ident(), self.folded, SAMPLE_INTERVAL_SECONDS)
+        _active.profile = self
+        start = time.perf_counter()
+        sampler.start()
+        profiler.enable()
+        try:
+            yield self
+        finally:
+            profiler.disable()
+            sampler.stop()
+            _active.profile = None
+            with self._lock:
+                self.elapsed += time.perf_counter() - start
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+    def record_stage(self, name: str, seconds: float):
+        with self._lock:
+            self.stages.append((name, seconds))
+
+    def finish(self):
+        """Mark complete and keep it in the recent-profiles store."""
+        if not self.finished:
+            self.finished = True
+            PROFILES.appendleft(self)
+        return self
+
+    def top_functions(self, limit: int = 15, sort: str = "cumulative") -> list:
+        """Hottest functions as dicts: function, calls, tottime, cumtime."""
+        if self._stats is None:
+            return []
+        rows = []
+        stats = self._stats.stats
+        order = sorted(stats.items(), key=lambda kv: kv[1][3 if sort == "cumulative" else 2], reverse=True)
+        for (filename, line, name), (_, ncalls, tottime, cumtime, _) in order[:limit]:
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": ncalls,
+                "tottime_ms": round(tottime * 1000, 2),
+                "cumtime_ms": round(cumtime * 1000, 2),
+            })
+        return rows
+
+    def stats_text(self, limit: int = 30) -> str:
+        if self._stats is None:
+            return ""
+        out = io.StringIO()
+        self._stats.stream = out
+        self._stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def folded_text(self) -> str:
+        """Brendan Gregg folded-stack format (for flamegraph.pl / speedscope)."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.folded.most_common())
+
+    def flamegraph_svg(self, width: int = 1200) -> str:
+        return render_flamegraph(self.folded, title=self.label, width=width)
+
+# ───────────────────────────────────────────────
+# ENTRY POINTS
+# ───────────────────────────────────────────────
+
+def start_profile(label: str, force: bool = False):
+    """Return a RequestProfile if forced or sampled, else None."""
+    if force or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+        return RequestProfile(label)
+    return None
+
+
+def activated(profile):
+    """`with activated(p):` — profiles the block if `p` is not None."""
+    return profile.activate() if profile is not None else nullcontext()
+
+
+def run_profiled(profile, fn, *args, **kwargs):
+    """Call `fn` inside `profile` (for submitting to executors)."""
+    with activated(profile):
+        return fn(*args, **kwargs)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a named stage of the request; no-op when not profiling."""
+    profile = getattr(_active, "profile", None)
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.record_stage(name, time.perf_counter() - start)
+
+# ───────────────────────────────────────────────
+# FLAME GRAPH
+# ───────────────────────────────────────────────
+
+_ROW_HEIGHT = 18
+
+
+def _build_tree(folded: Counter) -> dict:
+    root = {"name": "all", "value": 0, "children": {}}
+    for stack, count in folded.items():
+        root["value"] += count
+        node = root
+        for frame in stack.split(";"):
+            child = node["children"].setdefault(frame, {"name": frame, "value": 0, "children": {}})
+            child["value"] += count
+            node = child
+    return root
+
+
+def _color(name: str) -> str:
+    h = zlib.crc32(name.encode("utf-8"))
+    return f"rgb({205 + h % 50},{(h >> 8) % 180 + 40},{(h >> 16) % 55})"
+
+
+def render_flamegraph(folded: Counter, title: str = "", width: int = 1200) -> str:
+    """Self-contained SVG flame graph from folded-stack counts."""
+    root = _build_tree(folded)
+    total = root["value"] or 1
+    rects = []
+
+    def depth_of(node) -> int:
+        return 1 + max((depth_of(c) for c in node["children"].values()), default=0)
+
+    height = (depth_of(root) + 1) * _ROW_HEIGHT + 20
+
+    def layout(node, x: float, depth: int):
+        w = node["value"] / total * width
+        if w < 0.5:
+            return
+        y = height - (depth + 1) * _ROW_HEIGHT
+        label = html.escape(node["name"])
+        pct = node["value"] / total * 100
+        if w > 7 * len(node["name"]):
+            text = label
+        elif w > 30:
+            text = html.escape(node["name"][: int(w / 7) - 2]) + ".."
+        else:
+            text = ""
+        rects.append(
+            f'<g><title>{label} ({node["value"]} samples, {pct:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{_ROW_HEIGHT - 1}" '
+            f'fill="{_color(node["name"])}" rx="2"/>'
+            f'<text x="{x + 3:.1f}" y="{y + 13}" font-size="11" font-family="monospace">{text}</text></g>'
+        )
+        child_x = x
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            layout(child, child_x, depth + 1)
+            child_x += child["value"] / total * width
+
+    layout(root, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<rect width="100%" height="100%" fill="#fdf6e3"/>'
+        f'<text x="4" y="14" font-size="13" font-family="sans-serif">'
+        f'{html.escape(title)} — {root["value"]} samples</text>'
+        + "".join(rects) + "</svg>"
+    )
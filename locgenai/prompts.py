@@ -0,0 +1,94 @@
+# locgenai/prompts.py
+# Prompt templates — named, versioned, compiled once per (style, region)
+
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Template
+
+# ───────────────────────────────────────────────
+# TEMPLATE REGISTRY
+# ───────────────────────────────────────────────
+
+DEFAULT_STYLE = "benglish"
+DEFAULT_REGION = "kolkata"
+
+# Language styles reported by the UI are folded onto template names here.
+STYLE_ALIASES = {
+    None: DEFAULT_STYLE,
+    "english": DEFAULT_STYLE,
+    "code-mixed": "code-mixed",
+    "native": "native",
+}
+
+# name -> (version, instruction)
+STYLE_TEMPLATES = {
+    "benglish": (
+        1,
+        "Reply in Benglish (mix of Bengali and English), friendly tone, "
+        "short and natural, relevant to the user's question only.",
+    ),
+    "code-mixed": (
+        1,
+        "Respond in the same code-mixed language style as the user. "
+        "Friendly tone, short and natural, relevant to the user's question only.",
+    ),
+    "native": (
+        1,
+        "Respond in the same native language as the user. "
+        "Friendly tone, short and natural, relevant to the user's question only.",
+    ),
+}
+
+# region -> human readable scope used in the system instruction
+REGIONS = {
+    "kolkata": "Kolkata and West Bengal",
+}
+
+USER_TEMPLATE = Template("$query")
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A compiled prompt: fixed system instruction plus a user-text template."""
+    name: str
+    version: int
+    region: str
+    system_instruction: str
+    user_template: Template = USER_TEMPLATE
+
+    @property
+    def key(self) -> str:
+        """Stable identifier, e.g. 'benglish@v1/kolkata'."""
+        return f"{self.name}@v{self.version}/{self.region}"
+
+    def render(self, query: str) -> str:
+        """Render only the user part — the instruction travels separately."""
+        return self.user_template.substitute(query=query.strip())
+
+
+# ───────────────────────────────────────────────
+# LOOKUP
+# ───────────────────────────────────────────────
+
+def resolve_style(language_style) -> str:
+    """Map a UI language style (or template name) to a registered template."""
+    if language_style in STYLE_TEMPLATES:
+        return language_style
+    return STYLE_ALIASES.get(language_style, DEFAULT_STYLE)
+
+
+@lru_cache(maxsize=None)
+def _compile(name: str, region: str) -> PromptTemplate:
+    version, instruction = STYLE_TEMPLATES[name]
+    scope = REGIONS.get(region)
+    if scope:
+        instruction = (
+            f"You are LocGenAI, a regional knowledge assistant for {scope}. "
+            f"{instruction}"
+        )
+    return PromptTemplate(name, version, region, instruction)
+
+
+def get_template(language_style=None, region: str = DEFAULT_REGION) -> PromptTemplate:
+    """Return the compiled template for a language style and region."""
+    return _compile(resolve_style(language_style), region or DEFAULT_REGION)
@@ -0,0 +1,242 @@
+# locgenai/routing.py
+# Request classification and per-class backend routing rules
+
+import os
+import re
+import threading
+import time
+from collections import deque
+
+
+# ───────────────────────────────────────────────
+# REQUEST CLASSES
+# ───────────────────────────────────────────────
+
+CHITCHAT = "chitchat"
+FACTUAL = "factual"
+RECOMMENDATION = "recommendation"
+GENERAL = "general"
+
+_CHITCHAT_WORDS = {
+    "hi", "hello", "hey", "namaskar", "nomoskar", "thanks", "thank", "you",
+    "dhonnobad", "bye", "ok", "okay", "good", "morning", "night", "kemon", "acho",
+}
+_RECOMMEND_RE = re.compile(
+    r"\b(best|recommend\w*|suggest\w*|should i|top|must[- ]visit|worth|"
+    r"ki khabo|kothay jabo|kon(ta)?)\b"
+)
+_FACTUAL_RE = re.compile(r"^(what|where|when|who|how|is|are|which|kothay|kobe|ki)\b")
+_WORD_RE = re.compile(r"\w+")
+
+
+def classify_request(query: str) -> str:
+    """Cheap heuristic class for a raw user query."""
+    q = query.strip().lower()
+    words = _WORD_RE.findall(q)
+    if not words:
+        return CHITCHAT
+    if len(words) <= 4 and all(w in _CHITCHAT_WORDS for w in words):
+        return CHITCHAT
+    if _RECOMMEND_RE.search(q):
+        return RECOMMENDATION
+    if _FACTUAL_RE.match(q) or len(words) <= 6:
+        return FACTUAL
+    return GENERAL
+
+# ───────────────────────────────────────────────
+# ROUTING RULES
+# ───────────────────────────────────────────────
+
+# Symbolic slots resolved by model_wrapper: "local" (retrieval-only corpus
+# responder), "local-llm" (optional llama.cpp), "gemini" (the models picked
+# by MODEL_ROUTER for this particular request).
+ROUTING_RULES = {
+    CHITCHAT: ("local", "gemini"),
+    FACTUAL: ("local", "gemini", "local-llm"),
+    RECOMMENDATION: ("gemini", "local-llm", "local"),
+    GENERAL: ("gemini", "local-llm", "local"),
+}
+
+# LOCGENAI_OFFLINE=1 keeps every request on the zero-network path
+OFFLINE = os.getenv("LOCGENAI_OFFLINE", "0") == "1"
+OFFLINE_SLOTS = ("local", "local-llm")
+
+
+def route(request_class: str) -> tuple:
+    """Ordered backend slots to try for a request class."""
+    slots = ROUTING_RULES.get(request_class, ROUTING_RULES[GENERAL])
+    if OFFLINE:
+        slots = tuple(s for s in slots if s in OFFLINE_SLOTS)
+    return slots
+
+# ───────────────────────────────────────────────
+# MODEL ROUTER (cost / latency aware)
+# ───────────────────────────────────────────────
+
+# model -> relative cost per request and capability tier (1 = cheapest)
+MODEL_CATALOG = {
+    "gemini-2.5-flash-lite": {"cost": 1.0, "tier": 1},
+    "gemini-2.5-flash": {"cost": 3.0, "tier": 2},
+    "gemini-2.5-pro": {"cost": 12.0, "tier": 3},
+}
+
+# The error weight scales with each model's cost: a failing model loses its
+# place to the next one up, but an outage of every model cannot make the
+# most expensive one look cheapest
+DEFAULT_WEIGHTS = {"cost": 1.0, "latency": 0.5, "error": 20.0, "tier": 50.0}
+
+# How much each request class contributes to complexity (0..1)
+_CLASS_COMPLEXITY = {CHITCHAT: 0.0, FACTUAL: 0.15, RECOMMENDATION: 0.3, GENERAL: 0.45}
+
+# Models tried per request before giving up on Gemini
+MAX_MODEL_ATTEMPTS = 2
+# Tiers above the one a query needs that it may be routed to, however the
+# cheaper models are doing — a tier-1 query never reaches pro
+MAX_TIER_STEP = 1
+
+
+def _weights_from_env() -> dict:
+    """Parse LOCGENAI_ROUTER_WEIGHTS='cost=1,latency=0.5,error=20'."""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in os.getenv("LOCGENAI_ROUTER_WEIGHTS", "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() in weights and value.strip():
+            try:
+                weights[name.strip()] = float(value)
+            except ValueError:
+                print(f"⚠️ Ignoring bad router weight: {part}")
+    return weights
+
+
+def extract_features(query: str, retrieval_confidence: float = 0.0) -> dict:
+    """Complexity features of a query used for model selection."""
+    q = query.strip().lower()
+    words = _WORD_RE.findall(q)
+    request_class = classify_request(query)
+    parts = 1 + q.count("?") + len(re.findall(r"\b(and|also|aar|ebong)\b", q))
+    complexity = (
+        _CLASS_COMPLEXITY.get(request_class, 0.5)
+        + min(len(words), 40) / 40 * 0.35
+        + min(parts - 1, 3) * 0.1
+        - retrieval_confidence * 0.3
+    )
+    return {
+        "words": len(words),
+        "request_class": request_class,
+        "parts": parts,
+        "retrieval_confidence": retrieval_confidence,
+        "complexity": max(0.0, min(1.0, complexity)),
+    }
+
+
+def required_tier(complexity: float) -> int:
+    if complexity < 0.4:
+        return 1
+    if complexity < 0.75:
+        return 2
+    return 3
+
+
+class ModelStats:
+    """Rolling latency and error rate per model.
+
+    Only the last `window` calls younger than `horizon` seconds count, so a
+    burst of errors stops penalising a model once it has aged out.
+    """
+
+    def __init__(self, window: int = 50, horizon: float = 300.0, clock=time.monotonic):
+        self.window = window
+        self.horizon = horizon
+        self._clock = clock
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, model_name: str, latency: float, ok: bool):
+        with self._lock:
+            calls = self._calls.setdefault(model_name, deque(maxlen=self.window))
+            calls.append((self._clock(), latency, ok))
+            self.recorded += 1
+
+    def export(self) -> dict:
+        """Calls per model as [age seconds, latency, ok] — ages survive a restart."""
+        now = self._clock()
+        with self._lock:
+            return {name: [[now - ts, lat, ok] for ts, lat, ok in calls] for name, calls in self._calls.items()}
+
+    def restore(self, exported: dict, downtime: float = 0.0):
+        """Merge exported calls, aged by `downtime` seconds more."""
+        now = self._clock()
+        with self._lock:
+            for name, rows in exported.items():
+                calls = self._calls.setdefault(name, deque(maxlen=self.window))
+                merged = sorted([(now - age - downtime, lat, ok) for age, lat, ok in rows] + list(calls))
+                calls.clear()
+                calls.extend(merged[-self.window:])
+
+    def _recent(self, model_name: str) -> list:
+        cutoff = self._clock() - self.horizon
+        return [(lat, ok) for ts, lat, ok in list(self._calls.get(model_name, ())) if ts >= cutoff]
+
+    def latency(self, model_name: str, default: float = 2.0) -> float:
+        """Mean latency (seconds) of recent successful calls."""
+        calls = [lat for lat, ok in self._recent(model_name) if ok]
+        return sum(calls) / len(calls) if calls else default
+
+    def error_rate(self, model_name: str) -> float:
+        calls = self._recent(model_name)
+        return sum(1 for _, ok in calls if not ok) / len(calls) if calls else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            name: {"latency": round(self.latency(name), 3),
+                   "error_rate": round(self.error_rate(name), 3),
+                   "calls": len(self._recent(name))}
+            for name in list(self._calls)
+        }
+
+
+class ModelRouter:
+    """Rank models per request by weighted cost, latency, errors and capability."""
+
+    def __init__(self, catalog: dict = None, weights: dict = None, stats: ModelStats = None):
+        self.catalog = catalog or MODEL_CATALOG
+        self.weights = weights or _weights_from_env()
+        self.stats = stats or ModelStats()
+
+    def score(self, model_name: str, tier_needed: int) -> float:
+        info, w = self.catalog[model_name], self.weights
+        shortfall = max(0, tier_needed - info["tier"])
+        return (
+            w["cost"] * info["cost"]
+            + w["latency"] * self.stats.latency(model_name)
+            + w["error"] * self.stats.error_rate(model_name) * info["cost"]
+            + w["tier"] * shortfall
+        )
+
+    def plan(self, features: dict) -> list:
+        """Ordered models to try: capable ones by score, cheapest fallback last.
+
+        Models more than MAX_TIER_STEP tiers above the query's are left out.
+        """
+        tier_needed = required_tier(features["complexity"])
+        allowed = [m for m in self.catalog if self.catalog[m]["tier"] <= tier_needed + MAX_TIER_STEP]
+        ranked = sorted(allowed, key=lambda m: self.score(m, tier_needed))
+        capable = [m for m in ranked if self.catalog[m]["tier"] >= tier_needed]
+        plan = capable[:MAX_MODEL_ATTEMPTS]
+        if len(plan) < MAX_MODEL_ATTEMPTS:
+            plan += [m for m in ranked if m not in plan][:MAX_MODEL_ATTEMPTS - len(plan)]
+        return plan
+
+    def timed(self, model_name: str, fn, *args, **kwargs):
+        """Run `fn`, recording latency and success (non-empty result) for the model."""
+        start = time.perf_counter()
+        result = None
+        try:
+            result = fn(*args, **kwargs)
+            return result
+        finally:
+            self.stats.record(model_name, time.perf_counter() - start, bool(result))
+
+
+MODEL_ROUTER = ModelRouter()
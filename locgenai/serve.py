@@ -0,0 +1,280 @@
+# locgenai/serve.py
+# Headless HTTP API around locgenai — run with: python -m locgenai.serve
+#
+#   GET  /health            -> {"status": "ok", ...}
+#   POST /query             {"prompt", "language_style"?, "region"?} -> answer dict
+#   POST /batch             {"queries": [<query>, ...]}              -> {"results": [...]}
+#
+# Admission control charges the X-Session-Id header, else the client
+# address; a batch is charged to it once, as a single call.
+#   POST /stream            <query> -> NDJSON lines {"chunk": ...} then {"done": true}
+
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .admission import ADMISSION
+from .answer_cache import ANSWER_CACHE
+from .canonical import cache_info as canonical_cache_info
+from .generation import GENERATION
+from .model_wrapper import PREFETCHER, get_response, init_runtime, stream_response
+from .postprocess import process_response
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+DEFAULT_HOST = os.getenv("LOCGENAI_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.getenv("LOCGENAI_PORT", "8765"))
+DEFAULT_WORKERS = int(os.getenv("LOCGENAI_WORKERS", "8"))
+# Idle keep-alive connections are closed after this many seconds
+KEEPALIVE_SECONDS = 15
+# Per-request cap on how long a worker may take before we answer 504
+REQUEST_TIMEOUT_SECONDS = 60
+MAX_BODY_BYTES = 64 * 1024
+MAX_BATCH = 32
+# Items of one batch answered at once; the rest wait their turn
+BATCH_CONCURRENCY = int(os.getenv("LOCGENAI_BATCH_CONCURRENCY", "2"))
+
+# ───────────────────────────────────────────────
+# REQUEST HANDLING
+# ───────────────────────────────────────────────
+
+def _query_args(payload, session_id: str = None, where: str = "request body") -> dict:
+    """get_response arguments from a query object; the session id is never
+    taken from the payload, so clients cannot pick who is charged."""
+    if not isinstance(payload, dict):
+        raise ValueError(f"{where} must be a JSON object")
+    prompt = payload.get("prompt")
+    if not isinstance(prompt, str):
+        raise ValueError(f"'prompt' in {where} must be a string")
+    args = {"prompt": prompt, "session_id": session_id}
+    for key in ("language_style", "region"):
+        if payload.get(key) is not None:
+            args[key] = str(payload[key])
+    return args
+
+
+def answer(args: dict) -> dict:
+    """get_response plus the same normalized fields the UI uses."""
+    response = get_response(**args)
+    processed = process_response(response)
+    result = dict(response) if isinstance(response, dict) else {}
+    result.update({
+        "answer": processed.text,
+        "sources": list(processed.sources),
+        "html": processed.html,
+    })
+    return result
+
+
+class LocGenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    timeout = KEEPALIVE_SECONDS
+    server_version = "LocGenAI/0.1"
+
+    # ── plumbing ──
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        raw = self.rfile.read(length) if length else b"{}"
+        payload = json.loads(raw.decode("utf-8"))
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        return payload
+
+    def _run(self, fn, *args):
+        """Execute on the shared worker pool and wait for the result."""
+        return self.server.pool.submit(fn, *args).result(timeout=REQUEST_TIMEOUT_SECONDS)
+
+    # ── routes ──
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            health = {"status": "ok", "workers": self.server.workers}
+            if ANSWER_CACHE is not None:
+                health["answer_cache"] = dict(ANSWER_CACHE.stats, entries=len(ANSWER_CACHE))
+            if ADMISSION is not None:
+                health["admission"] = ADMISSION.snapshot()
+            health["canonical"] = canonical_cache_info()
+            health["generation"] = GENERATION.snapshot()
+            if PREFETCHER is not None:
+                health["prefetch"] = PREFETCHER.snapshot()
+            if self.server.snapshots is not None:
+                health["snapshot"] = self.server.snapshots.snapshot()
+            self._send_json(200, health)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        route = self.path.rstrip("/")
+        if route not in ("/query", "/batch", "/stream"):
+            self._send_json(404, {"error": "not found"})
+            return
+        if self.server.draining:
+            self.close_connection = True
+            self._send_json(503, {"error": "shutting down"})
+            return
+        # Admission control charges the caller's session, else its address
+        session_id = self.headers.get("X-Session-Id") or self.client_address[0]
+        try:
+            payload = self._read_json()
+            if route == "/query":
+                self._send_json(200, self._run(answer, _query_args(payload, session_id)))
+            elif route == "/batch":
+                self._batch(payload, session_id)
+            else:
+                self._stream(_query_args(payload, session_id))
+        except (ValueError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except FutureTimeout:
+            self._send_json(504, {"error": "model call timed out"})
+        except Exception as e:
+            print(f"[Serve Error] {route}: {e}")
+            self._send_json(500, {"error": "internal error"})
+
+    def _batch(self, payload: dict, session_id: str = None):
+        queries = payload.get("queries")
+        if not isinstance(queries, list) or not queries:
+            raise ValueError("'queries' must be a non-empty list")
+        if len(queries) > MAX_BATCH:
+            raise ValueError(f"at most {MAX_BATCH} queries per batch")
+        # Items carry no session of their own: the batch is charged once
+        # below, and each item's model call still takes a global slot
+        items = [_query_args(q, None, f"queries[{i}]") for i, q in enumerate(queries)]
+        if ADMISSION is None:
+            self._send_json(200, {"results": self._run_batch(items)})
+            return
+        with ADMISSION.admit(session_id, global_slot=False) as ticket:
+            if not ticket.admitted:
+                self._send_json(429, {"error": "session is over its limits, retry later", "shed": ticket.reason})
+                return
+            results = self._run_batch(items)
+        self._send_json(200, {"results": results})
+
+    def _run_batch(self, items: list) -> list:
+        """Answer `items` on the worker pool, at most BATCH_CONCURRENCY at a time."""
+        futures, running = [], set()
+        for args in items:
+            if len(running) >= BATCH_CONCURRENCY:
+                done, running = wait(running, timeout=REQUEST_TIMEOUT_SECONDS, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise FutureTimeout()
+            future = self.server.pool.submit(answer, args)
+            futures.append(future)
+            running.add(future)
+        return [f.result(timeout=REQUEST_TIMEOUT_SECONDS) for f in futures]
+
+    def _stream(self, args: dict):
+        # Chunked NDJSON — chunks are produced on a worker and relayed here
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(obj):
+            line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+
+        chunks = queue.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in stream_response(**args):
+                    chunks.put(chunk)
+            finally:
+                chunks.put(done)
+
+        future = self.server.pool.submit(produce)
+        try:
+            while True:
+                chunk = chunks.get(timeout=REQUEST_TIMEOUT_SECONDS)
+                if chunk is done:
+                    break
+                write({"chunk": chunk})
+            future.result(timeout=REQUEST_TIMEOUT_SECONDS)
+            write({"done": True})
+        except queue.Empty:
+            write({"error": "model call timed out"})
+        except Exception as e:
+            print(f"[Serve Error] /stream: {e}")
+            write({"error": "internal error"})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class LocGenAIServer(ThreadingHTTPServer):
+    """HTTP front end; model work runs on a bounded worker pool."""
+
+    daemon_threads = False  # let in-flight requests finish on shutdown
+    allow_reuse_address = True
+
+    def __init__(self, address, workers: int = DEFAULT_WORKERS, verbose: bool = False):
+        super().__init__(address, LocGenAIHandler)
+        self.workers = workers
+        self.verbose = verbose
+        self.draining = False
+        self.snapshots = None  # set by main() from init_runtime()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="locgenai-worker")
+
+    def drain(self):
+        """Refuse new work, wait for in-flight requests, then stop workers.
+
+        Call after serve_forever() has returned.
+        """
+        self.draining = True
+        self.server_close()  # joins handler threads (daemon_threads is False)
+        self.pool.shutdown(wait=True)
+
+# ───────────────────────────────────────────────
+# ENTRY POINT
+# ───────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LocGenAI headless API server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="size of the model-call worker pool")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    server = LocGenAIServer((args.host, args.port), workers=args.workers, verbose=args.verbose)
+    server.snapshots = init_runtime()
+
+    def _stop(signum, _frame):
+        print(f"🛑 Signal {signum} received — draining requests...")
+        server.draining = True
+        # shutdown() blocks until serve_forever exits, so it can't run in this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    print(f"✅ LocGenAI API listening on http://{args.host}:{args.port} ({args.workers} workers)")
+    server.serve_forever()
+    server.drain()
+    print("👋 LocGenAI API stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# locgenai/snapshot.py
+# Runtime snapshots — the BM25 index, answer cache, learned QAs and rolling
+# latency stats written to one file periodically and at shutdown, and read
+# back at startup so a restarted app does not begin cold.
+#
+# File layout (little-endian; every section starts 8-byte aligned so the
+# BM25 arrays can be used straight from an mmap):
+#
+#   <4s H H d 32s>      magic b"LGSN", format version, section count,
+#                       created_at (unix time), sha256 of the seed file
+#   section table       <16s Q Q I 4x> per section: name, offset, length, crc32
+#   <I>                 crc32 of the header and section table
+#   sections            "bm25": a BM25 index file; the rest are UTF-8 JSON
+#
+# The BM25 section is only restored when the seed file hash still matches;
+# any section with a bad checksum is skipped on its own.
+
+import atexit
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .bm25 import BM25Index, preload
+
+# ───────────────────────────────────────────────
+# CONFIGURATION
+# ───────────────────────────────────────────────
+
+PACKAGE_ROOT = os.path.dirname(__file__)
+SNAPSHOT_ENABLED = os.getenv("LOCGENAI_SNAPSHOT", "1") != "0"
+SNAPSHOT_PATH = os.getenv("LOCGENAI_SNAPSHOT_PATH", os.path.join(PACKAGE_ROOT, "runtime.snapshot"))
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("LOCGENAI_SNAPSHOT_INTERVAL", "300"))
+
+SNAPSHOT_FORMAT_VERSION = 1
+_MAGIC = b"LGSN"
+_HEADER = struct.Struct("<4sHHd32s")
+_SECTION = struct.Struct("<16sQQI4x")
+_TABLE_CRC = struct.Struct("<I")
+# Sections only valid for the seed data they were built from
+SEED_BOUND = ("bm25",)
+
+
+def file_sha256(path: str) -> bytes:
+    """SHA-256 of a file, or 32 zero bytes if it cannot be read."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+    except OSError:
+        return bytes(32)
+    return h.digest()
+
+# ───────────────────────────────────────────────
+# FILE FORMAT
+# ───────────────────────────────────────────────
+
+def write_snapshot(path: str, sections: dict, seed_hash: bytes, created_at: float = None):
+    """Write `sections` (name -> bytes) atomically: to a temp file, then renamed."""
+    created_at = time.time() if created_at is None else created_at
+    table_size = _HEADER.size + _SECTION.size * len(sections) + _TABLE_CRC.size
+    offset = table_size + (-table_size % 8)
+    table, layout = b"", []
+    for name, payload in sections.items():
+        table += _SECTION.pack(name.encode("ascii"), offset, len(payload), zlib.crc32(payload))
+        layout.append((offset, payload))
+        offset += len(payload) + (-len(payload) % 8)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        header = _HEADER.pack(_MAGIC, SNAPSHOT_FORMAT_VERSION, len(sections), created_at, seed_hash)
+        f.write(header + table)
+        f.write(_TABLE_CRC.pack(zlib.crc32(header + table)))
+        for offset, payload in layout:
+            f.write(bytes(offset - f.tell()))
+            f.write(payload)
+        f.write(bytes(-f.tell() % 8))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_snapshot(buf) -> tuple:
+    """(created_at, seed hash, {name: memoryview}) from a snapshot buffer.
+
+    Raises ValueError if the header or section table is damaged; sections
+    whose checksum fails are left out (and named in the log).
+    """
+    if len(buf) < _HEADER.size:
+        raise ValueError("snapshot is truncated")
+    magic, version, count, created_at, seed_hash = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC or version != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"unsupported snapshot format {magic!r} v{version}")
+    table_end = _HEADER.size + _SECTION.size * count
+    if len(buf) < table_end + _TABLE_CRC.size:
+        raise ValueError("snapshot is truncated")
+    if _TABLE_CRC.unpack_from(buf, table_end)[0] != zlib.crc32(bytes(buf[:table_end])):
+        raise ValueError("snapshot header is corrupt")
+    table = bytes(buf[_HEADER.size:table_end])
+
+    view = memoryview(buf)
+    sections = {}
+    for i in range(count):
+        raw_name, offset, length, crc = _SECTION.unpack_from(table, i * _SECTION.size)
+        name = raw_name.rstrip(b"\0").decode("ascii")
+        payload = view[offset:offset + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            print(f"⚠️ Snapshot section {name!r} failed its checksum, skipped")
+            continue
+        sections[name] = payload
+    return created_at, seed_hash, sections
+
+# ───────────────────────────────────────────────
+# SNAPSHOT MANAGER
+# ───────────────────────────────────────────────
+
+class SnapshotManager:
+    """Saves and restores runtime state for the components it is given.
+
+    `index()` returns the current BM25 index (or None); `cache`, `learned`
+    and `stats` are an AnswerCache, LearnedStore and ModelStats, any of
+    which may be None.
+    """
+
+    def __init__(self, path: str, seed_path: str, index=None, cache=None, learned=None, stats=None,
+                 interval: float = SNAPSHOT_INTERVAL_SECONDS):
+        self.path = path
+        self.seed_path = seed_path
+        self.interval = interval
+        self._index = index or (lambda: None)
+        self._cache = cache
+        self._learned = learned
+        self._stats = stats
+        self._seed_hash = file_sha256(seed_path)
+        self._written = None  # fingerprint of the state last written
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"writes": 0, "skipped": 0, "errors": 0, "restored": {}}
+
+    def _fingerprint(self) -> tuple:
+        index = self._index()
+        return (
+            index.corpus_hash if index is not None else None,
+            self._cache.stats["stores"] if self._cache is not None else None,
+            self._learned.version if self._learned is not None else None,
+            self._stats.recorded if self._stats is not None else None,
+        )
+
+    def _sections(self) -> dict:
+        sections = {}
+        index = self._index()
+        if index is not None:
+            sections["bm25"] = index.to_bytes()
+        parts = (("answer_cache", self._cache), ("learned", self._learned), ("latency", self._stats))
+        for name, component in parts:
+            if component is not None:
+                sections[name] = json.dumps(component.export(), ensure_ascii=False).encode("utf-8")
+        return sections
+
+    def write(self, force: bool = False) -> bool:
+        """Write a snapshot if anything changed since the last one."""
+        with self._lock:
+            fingerprint = self._fingerprint()
+            if not force and fingerprint == self._written:
+                self.stats["skipped"] += 1
+                return False
+            try:
+                write_snapshot(self.path, self._sections(), self._seed_hash)
+            except (OSError, TypeError, ValueError) as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Could not write snapshot: {e}")
+                return False
+            self._written = fingerprint
+            self.stats["writes"] += 1
+            return True
+
+    def restore(self) -> dict:
+        """Load the snapshot at `path` into the components; counts per section."""
+        try:
+            with open(self.path, "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not open snapshot: {e}")
+            return {}
+        try:
+            created_at, seed_hash, sections = read_snapshot(buf)
+        except (ValueError, struct.error) as e:
+            print(f"⚠️ Ignoring snapshot: {e}")
+            return {}
+
+        if seed_hash != self._seed_hash:
+            dropped = [name for name in SEED_BOUND if sections.pop(name, None) is not None]
+            if dropped:
+                print(f"ℹ️ Seed data changed since the snapshot, not restoring {', '.join(dropped)}")
+        downtime = max(0.0, time.time() - created_at)
+        restored = {}
+        for name, payload in sections.items():
+            try:
+                restored[name] = self._restore_section(name, payload, downtime)
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"⚠️ Could not restore snapshot section {name!r}: {e}")
+        restored = {name: n for name, n in restored.items() if n is not None}
+        self.stats["restored"] = restored
+        # What was just restored need not be written back unchanged
+        self._written = self._fingerprint()
+        summary = ", ".join(f"{n} {name}" for name, n in restored.items())
+        print(f"✅ Restored snapshot from {downtime:.0f}s ago ({summary or 'nothing usable'})")
+        return restored
+
+    def _restore_section(self, name: str, payload, downtime: float):
+        if name == "bm25":
+            # Arrays stay views into the mapping, which lives as long as they do
+            index = BM25Index.from_buffer(payload)
+            preload(index)
+            return index.doc_count
+        if name == "answer_cache" and self._cache is not None:
+            return self._cache.restore(json.loads(bytes(payload).decode("utf-8")))
+        if name == "learned" and self._learned is not None:
+            return self._learned.restore(json.loads(bytes(payload).decode("utf-8")))
+        if name == "latency" and self._stats is not None:
+            exported = json.loads(bytes(payload).decode("utf-8"))
+            self._stats.restore(exported, downtime)
+            return sum(len(calls) for calls in exported.values())
+        return None
+
+    def start(self):
+        """Write every `interval` seconds on a daemon thread, and once more at exit."""
+        if self._thread is not None:
+            return
+        atexit.register(self.write)
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="locgenai-snapshot", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.write()
+
+    def snapshot(self) -> dict:
+        return {"path": self.path, **self.stats}
@@ -0,0 +1,98 @@
+// LocGenAI — page behaviours (served once via Streamlit static files).
+// Loaded from a zero-height component iframe, so it works on the parent document.
+(function () {
+    const doc = window.parent.document;
+
+    // Hide the default Streamlit "Clear" button and add the custom styled one
+    const styleClearButton = () => {
+        doc.querySelectorAll('button[kind="secondary"]').forEach(btn => {
+            if (!btn.textContent.includes('Clear') || btn.dataset.locgenaiStyled) return;
+            btn.dataset.locgenaiStyled = '1';
+            btn.style.display = 'none';
+            const customBtn = doc.createElement('button');
+            customBtn.className = 'clear-chat-btn';
+            customBtn.innerHTML = '<span class="clear-icon">🗑️</span><span class="clear-text">Clear Chat</span>';
+            customBtn.onclick = () => btn.click();
+            btn.parentElement.appendChild(customBtn);
+        });
+    };
+
+    // Follow new messages only while the reader is already near the bottom
+    const NEAR_BOTTOM_PX = 120;
+    let following = true;
+    let userMessages = 0;
+
+    // The chat column's block holds the Clear button and every message
+    const messageContainer = () => {
+        const chat = doc.getElementById('chatWindow');
+        return chat && chat.closest('[data-testid="stVerticalBlock"]');
+    };
+
+    // Nearest scrolling ancestor of the messages (Streamlit's main view)
+    const scroller = () => {
+        const container = messageContainer();
+        const bubbles = container ? container.querySelectorAll('.message-bubble') : [];
+        let el = bubbles.length ? bubbles[bubbles.length - 1] : container;
+        for (; el && el !== doc.body; el = el.parentElement) {
+            const overflow = window.parent.getComputedStyle(el).overflowY;
+            if ((overflow === 'auto' || overflow === 'scroll') && el.scrollHeight > el.clientHeight) {
+                return el;
+            }
+        }
+        return doc.scrollingElement;
+    };
+
+    const nearBottom = (el) => el.scrollHeight - el.scrollTop - el.clientHeight <= NEAR_BOTTOM_PX;
+
+    const scrollToBottom = () => {
+        const container = messageContainer();
+        const sent = container ? container.querySelectorAll('.message-bubble.user').length : 0;
+        // A message the user just sent is always brought into view
+        if (following || sent > userMessages) {
+            const el = scroller();
+            el.scrollTop = el.scrollHeight;
+            following = true;
+        }
+        userMessages = sent;
+    };
+
+    const refresh = () => {
+        styleClearButton();
+        scrollToBottom();
+    };
+
+    // Scroll events do not bubble; capture them and keep those of the view
+    // holding the messages (not, say, the input box)
+    const onScroll = (event) => {
+        const el = event.target === doc ? doc.scrollingElement : event.target;
+        const container = messageContainer();
+        if (container && el.contains(container)) {
+            following = nearBottom(el);
+        }
+    };
+    doc.addEventListener('scroll', onScroll, { capture: true, passive: true });
+
+    // Watch the message container only — not the whole page, which the
+    // pending-answer poll touches twice a second
+    const observer = new MutationObserver(refresh);
+    let watched = null;
+    const watch = () => {
+        const container = messageContainer();
+        if (container && container !== watched) {
+            observer.disconnect();
+            observer.observe(container, { childList: true, subtree: true });
+            watched = container;
+        }
+        refresh();
+    };
+
+    watch();
+    // Streamlit may still be mounting the chat column when this frame loads
+    setTimeout(watch, 150);
+    setTimeout(watch, 300);
+
+    window.addEventListener('pagehide', () => {
+        observer.disconnect();
+        doc.removeEventListener('scroll', onScroll, { capture: true });
+    });
+})();
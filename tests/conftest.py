@@ -0,0 +1,36 @@
+# tests/conftest.py
+# Keep the suite offline and side-effect free: no Gemini calls, no snapshot
+# BM25 or learned-QA files written into the package, no worker processes
+# or prefetch threads.
+
+import json
+import os
+import sys
+
+os.environ.setdefault("LOCGENAI_OFFLINE", "1")
+os.environ.setdefault("LOCGENAI_SNAPSHOT", "0")
+os.environ.setdefault("LOCGENAI_BM25_PATH", "")
+os.environ.setdefault("LOCGENAI_OFFLOAD_WORKERS", "0")
+os.environ.setdefault("LOCGENAI_LEARNING", "0")
+os.environ.setdefault("LOCGENAI_PREFETCH", "0")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_FILE = os.path.join(REPO_ROOT, "locgenai", "seed_qas (3).json")
+sys.path.insert(0, REPO_ROOT)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def seed_data():
+    with open(SEED_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def wrapper(seed_data):
+    """locgenai.model_wrapper with the seed QAs loaded."""
+    import locgenai.model_wrapper as model_wrapper
+    model_wrapper.SEED_DATA[:] = seed_data
+    model_wrapper._corpus["version"] = None
+    return model_wrapper
@@ -0,0 +1,103 @@
+# tests/test_admission.py
+
+import threading
+
+from locgenai.admission import (
+    QUEUE_FULL, QUEUE_TIMEOUT, RATE_LIMITED, SESSION_BUSY, AdmissionController,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _controller(clock, **kwargs):
+    options = dict(session_concurrency=2, rate_per_minute=60, burst=2,
+                   global_inflight=8, queue_size=4, queue_timeout=0.05)
+    options.update(kwargs)
+    return AdmissionController(clock=clock, **options)
+
+
+def _admitted(controller, session_id, **kwargs):
+    with controller.admit(session_id, **kwargs) as ticket:
+        return ticket
+
+
+def test_burst_then_rate_limit_then_refill():
+    clock = Clock()
+    controller = _controller(clock)
+    assert _admitted(controller, "a").admitted
+    assert _admitted(controller, "a").admitted
+    ticket = _admitted(controller, "a")
+    assert not ticket.admitted and ticket.reason == RATE_LIMITED
+    clock.now += 1.0  # 60 per minute: one token a second
+    assert _admitted(controller, "a").admitted
+
+
+def test_sessions_have_separate_buckets():
+    controller = _controller(Clock(), burst=1)
+    assert _admitted(controller, "a").admitted
+    assert not _admitted(controller, "a").admitted
+    assert _admitted(controller, "b").admitted
+
+
+def test_session_concurrency_cap():
+    controller = _controller(Clock(), session_concurrency=1, burst=5)
+    with controller.admit("a") as first:
+        assert first.admitted
+        busy = _admitted(controller, "a")
+        assert not busy.admitted and busy.reason == SESSION_BUSY
+        assert _admitted(controller, "b").admitted
+    assert _admitted(controller, "a").admitted
+    assert controller.snapshot()["inflight"] == 0
+
+
+def test_queue_full_and_timeout_are_shed():
+    controller = _controller(Clock(), global_inflight=1, queue_size=0)
+    with controller.admit("a"):
+        ticket = _admitted(controller, "b")
+    assert ticket.reason == QUEUE_FULL
+
+    controller = AdmissionController(global_inflight=1, queue_size=1, queue_timeout=0.05)
+    with controller.admit("a"):
+        ticket = _admitted(controller, "b")
+    assert ticket.reason == QUEUE_TIMEOUT
+    assert controller.snapshot()["queue_depth"] == 0
+    # The timed-out request gave its session slot back
+    assert controller._sessions["b"].inflight == 0
+
+
+def test_queued_request_runs_when_a_slot_frees():
+    controller = AdmissionController(global_inflight=1, queue_size=1, queue_timeout=5)
+    tickets = []
+    with controller.admit("a"):
+        waiter = threading.Thread(target=lambda: tickets.append(_admitted(controller, "b")))
+        waiter.start()
+        while not controller.snapshot()["queue_depth"]:
+            pass
+    waiter.join(5)
+    assert tickets and tickets[0].admitted
+    assert controller.stats["queued"] == 1
+
+
+def test_session_only_admission_leaves_global_slots_free():
+    controller = _controller(Clock(), global_inflight=1, queue_size=0)
+    with controller.admit("batch", global_slot=False) as batch:
+        assert batch.admitted
+        # The batch's own model calls still get the one global slot
+        assert _admitted(controller, "other").admitted
+        assert controller.snapshot()["inflight"] == 0
+    assert controller._sessions["batch"].inflight == 0
+
+
+def test_shed_counts_in_snapshot():
+    controller = _controller(Clock(), burst=1)
+    _admitted(controller, "a")
+    _admitted(controller, "a")
+    snapshot = controller.snapshot()
+    assert snapshot["admitted"] == 1
+    assert snapshot["shed"] == {RATE_LIMITED: 1} and snapshot["shed_total"] == 1
@@ -0,0 +1,49 @@
+# tests/test_answer_cache.py
+
+from locgenai.answer_cache import FRESH, GRACE, MISS, NEGATIVE, STALE, AnswerCache, answer_key
+from locgenai.backends import PromptRejected
+from locgenai.prompts import DEFAULT_REGION, get_template
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class InlineExecutor:
+    def submit(self, fn):
+        fn()
+
+
+def test_stale_while_revalidate_states():
+    clock = Clock()
+    cache = AnswerCache(ttl=100, revalidate=50, grace=200, negative_ttl=30, clock=clock)
+    cache.store("k", {"answer": "a"})
+    for age, state in ((0, FRESH), (120, STALE), (250, GRACE), (301, MISS)):
+        clock.now = 1000 + age
+        assert cache.lookup("k")[0] == state
+    cache.store_negative("n", {"answer": "no"})
+    assert cache.lookup("n")[0] == NEGATIVE
+    clock.now += 31
+    assert cache.lookup("n")[0] == MISS
+
+
+def test_rejected_refresh_stores_a_negative_entry(wrapper, monkeypatch):
+    clock = Clock()
+    cache = AnswerCache(ttl=100, revalidate=50, clock=clock, executor=InlineExecutor())
+    monkeypatch.setattr(wrapper, "ANSWER_CACHE", cache)
+    prompt = "tell me a long story about the history of bengal"
+    key = answer_key(prompt, get_template(None, DEFAULT_REGION).key)
+    cache.store(key, {"answer": "old answer", "sources": [], "backend": "gemini-2.5-flash"})
+
+    def rejected(*args, **kwargs):
+        raise PromptRejected("blocked (SAFETY)")
+
+    monkeypatch.setattr(wrapper, "_model_answer", rejected)
+    clock.now += 120
+    assert wrapper.get_response(prompt)["answer"] == "old answer"  # stale, refreshed inline
+    state, value = cache.lookup(key)
+    assert state == NEGATIVE and value["rejected"]
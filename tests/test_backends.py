@@ -0,0 +1,97 @@
+# tests/test_backends.py
+# GeminiBackend's per-model fallback, shared by generate, stream and agenerate.
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from locgenai import backends
+from locgenai.backends import GeminiBackend, PromptRejected
+
+
+class NotFound(Exception):
+    """Named like google.api_core.exceptions.NotFound."""
+
+
+def _response(text="", blocked=None):
+    return SimpleNamespace(text=text, prompt_feedback=SimpleNamespace(block_reason=blocked),
+                           usage_metadata=None, candidates=[])
+
+
+class FakeModel:
+    def __init__(self, error=None, text="ok", blocked=None):
+        self.error, self.text, self.blocked = error, text, blocked
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False, generation_config=None):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        if stream:
+            return iter([_response(blocked=self.blocked)] if self.blocked else
+                        [_response(w) for w in self.text.split(" ")])
+        return _response(self.text, self.blocked)
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        return self.generate_content(prompt, generation_config=generation_config)
+
+
+class CacheRecorder:
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, model_name=None):
+        self.invalidated.append(model_name)
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    cache = CacheRecorder()
+    monkeypatch.setattr(backends, "CONTEXT_CACHE", cache)
+    backend = GeminiBackend("gemini-2.5-flash")
+    backend.cache = cache
+
+    def use(*models):
+        monkeypatch.setattr(backend, "_models", lambda *a: iter([(i == 0 and len(models) > 1, m)
+                                                                  for i, m in enumerate(models)]))
+    backend.use = use
+    return backend
+
+
+def _generate(backend):
+    return backend.generate("q", "instruction")
+
+
+def _stream(backend):
+    return "".join(backend.stream("q", "instruction")) or None
+
+
+def _agenerate(backend):
+    return asyncio.run(backend.agenerate("q", "instruction"))
+
+
+CALLS = [_generate, _stream, _agenerate]
+
+
+@pytest.mark.parametrize("call", CALLS)
+def test_gone_cache_is_invalidated_and_inline_model_answers(gemini, call):
+    gemini.use(FakeModel(NotFound("cached content not found")), FakeModel(text="inline answer"))
+    assert call(gemini).replace(" ", "") == "inlineanswer"
+    assert gemini.cache.invalidated == ["gemini-2.5-flash"]
+
+
+@pytest.mark.parametrize("call", CALLS)
+def test_other_errors_fall_back_without_invalidating(gemini, call):
+    gemini.use(FakeModel(RuntimeError("quota exceeded")), FakeModel(text="inline"))
+    assert call(gemini) == "inline"
+    assert gemini.cache.invalidated == []
+
+
+@pytest.mark.parametrize("call", CALLS)
+def test_blocked_prompt_is_not_sent_again(gemini, call):
+    first, second = FakeModel(blocked="SAFETY"), FakeModel()
+    gemini.use(first, second)
+    with pytest.raises(PromptRejected):
+        call(gemini)
+    assert (first.calls, second.calls) == (1, 0)
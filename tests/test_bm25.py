@@ -0,0 +1,65 @@
+# tests/test_bm25.py
+
+import pytest
+
+from locgenai import bm25
+from locgenai.bm25 import BM25Index, corpus_hash, load_or_build, tokenize
+
+CORPUS = [
+    {"q": "famous sweets of kolkata", "a": "Roshogolla, sandesh and mishti doi."},
+    {"q": "how to reach howrah bridge", "a": "Take the metro to Howrah Maidan."},
+    {"q": "best time to visit kolkata", "a": "October to February, when it is cool."},
+    {"q": "where to buy books", "a": "College Street has the second-hand book stalls."},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return BM25Index.build(CORPUS)
+
+
+def test_tokenize_drops_stopwords_and_question_words_and_folds_plurals():
+    assert tokenize("What are the best sweets of Kolkata?") == ["sweet", "kolkata"]
+
+
+def test_search_ranks_the_matching_question_first(index):
+    hits = index.search("kolkata sweets", k=2)
+    assert hits[0][0] == 0
+    assert all(0 < conf <= 1 for _, _, conf in hits)
+    assert index.search("", k=3) == [] and index.search("zzz", k=3) == []
+
+
+def test_best_needs_every_query_term_in_the_hit(index):
+    assert index.best("famous sweets kolkata")[0] == 0
+    # "delhi" is not in the corpus, "books" is not in the sweets answer
+    assert index.best("famous sweets delhi") is None
+    assert index.best("famous sweets books") is None
+
+
+def test_round_trip_through_bytes(index):
+    restored = BM25Index.from_buffer(index.to_bytes())
+    assert restored.corpus_hash == index.corpus_hash == corpus_hash(CORPUS)
+    for query in ("kolkata sweets", "howrah bridge metro", "books college street"):
+        assert restored.search(query) == index.search(query)
+
+
+def test_from_buffer_rejects_another_format(index):
+    data = bytearray(index.to_bytes())
+    data[:4] = b"XXXX"
+    with pytest.raises(ValueError):
+        BM25Index.from_buffer(bytes(data))
+
+
+def test_load_or_build_rebuilds_for_a_changed_corpus(tmp_path):
+    path = str(tmp_path / "bm25.idx")
+    first = load_or_build(CORPUS, path)
+    assert load_or_build(CORPUS, path).corpus_hash == first.corpus_hash
+    changed = CORPUS + [{"q": "what is jhalmuri", "a": "Puffed rice street snack."}]
+    rebuilt = load_or_build(changed, path)
+    assert rebuilt.corpus_hash == corpus_hash(changed) and rebuilt.doc_count == 5
+
+
+def test_preloaded_index_is_used_once(index):
+    bm25.preload(index)
+    assert load_or_build(CORPUS) is index
+    assert load_or_build(CORPUS) is not index
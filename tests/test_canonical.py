@@ -0,0 +1,30 @@
+# tests/test_canonical.py
+
+import pytest
+
+from locgenai.answer_cache import answer_key
+from locgenai.canonical import canonical_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("howrah to sealdah", "sealdah to howrah"),
+    ("howrah theke sealdah", "sealdah theke howrah"),
+    ("from howrah to sealdah", "to howrah from sealdah"),
+    ("when is durga puja", "where is durga puja"),
+    ("durga puja kobe", "durga puja kothay"),
+])
+def test_answer_keys_keep_order_and_question_words(a, b):
+    assert answer_key(a, "t") != answer_key(b, "t")
+
+
+@pytest.mark.parametrize("a, b", [
+    ("kolkata te ki khabo", "কলকাতায় কী খাবো"),
+    ("famous food of kolkata?", "Famous  food of Calcutta"),
+    ("Victoria Memorial kothay", "bhictoria memorial kothai"),
+])
+def test_answer_keys_share_script_and_spelling_variants(a, b):
+    assert answer_key(a, "t") == answer_key(b, "t")
+
+
+def test_lookup_key_ignores_word_order():
+    assert canonical_key("victoria memorial kothay") == canonical_key("where is victoria memorial")
@@ -0,0 +1,80 @@
+# tests/test_context_cache.py
+# ContextCache against a stub client and a fake clock.
+
+from locgenai.context_cache import MIN_CACHE_CHARS, ContextCache, region_knowledge
+from locgenai.prompts import DEFAULT_REGION, get_template
+
+
+class StubClient:
+    def __init__(self, fail_refresh=False):
+        self.fail_refresh = fail_refresh
+        self.created, self.refreshed, self.deleted = [], [], []
+
+    def create(self, model_name, system_instruction, contents, ttl):
+        handle = f"cache-{len(self.created)}"
+        self.created.append(handle)
+        return handle
+
+    def refresh(self, handle, ttl):
+        if self.fail_refresh:
+            raise RuntimeError("update failed")
+        self.refreshed.append(handle)
+
+    def delete(self, handle):
+        self.deleted.append(handle)
+
+    def model_for(self, handle):
+        return f"model<{handle}>"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _prefix():
+    template = get_template(None, DEFAULT_REGION)
+    return template.system_instruction, region_knowledge(template.region)
+
+
+def test_registered_knowledge_is_long_enough_to_cache(wrapper):
+    instruction, knowledge = _prefix()
+    assert len(instruction) + len(knowledge) >= MIN_CACHE_CHARS
+
+
+def test_create_hit_refresh_and_expiry(wrapper):
+    client, clock = StubClient(), Clock()
+    cache = ContextCache(client, ttl=600, refresh_margin=60, clock=clock)
+    instruction, knowledge = _prefix()
+
+    assert cache.model_for("gemini-2.5-flash", instruction, knowledge) == "model<cache-0>"
+    clock.now = 100
+    assert cache.model_for("gemini-2.5-flash", instruction, knowledge) == "model<cache-0>"
+    assert cache.stats["creates"] == 1 and cache.stats["hits"] == 1
+
+    clock.now = 560  # inside the refresh margin
+    assert cache.model_for("gemini-2.5-flash", instruction, knowledge) == "model<cache-0>"
+    assert client.refreshed == ["cache-0"]
+
+    clock.now = 560 + 601  # expired server-side
+    assert cache.model_for("gemini-2.5-flash", instruction, knowledge) == "model<cache-1>"
+    assert client.deleted == []
+
+
+def test_failed_refresh_replaces_and_deletes_the_old_cache(wrapper):
+    client, clock = StubClient(fail_refresh=True), Clock()
+    cache = ContextCache(client, ttl=600, refresh_margin=60, clock=clock)
+    instruction, knowledge = _prefix()
+    cache.model_for("gemini-2.5-flash", instruction, knowledge)
+    clock.now = 560
+    assert cache.model_for("gemini-2.5-flash", instruction, knowledge) == "model<cache-1>"
+    assert client.deleted == ["cache-0"]
+
+
+def test_short_prefix_goes_inline():
+    client = StubClient()
+    assert ContextCache(client).model_for("gemini-2.5-flash", "short instruction", "") is None
+    assert client.created == []
@@ -0,0 +1,33 @@
+# tests/test_dedupe.py
+
+from locgenai.dedupe import dedupe_corpus, find_clusters
+
+
+def _qa(q, a="Roshogolla, mishti doi and kathi rolls.", sources=()):
+    return {"q": q, "a": a, "sources": list(sources)}
+
+
+def test_identical_entries_collapse_with_sources_merged():
+    corpus = [_qa("famous food of kolkata", sources=[f"https://example.com/{i}"]) for i in range(500)]
+    output, report = dedupe_corpus(corpus)
+    assert len(output) == 1
+    assert len(output[0]["sources"]) == 500
+    assert report["clusters"] == 1 and report["removed"] == 499
+
+
+def test_similar_questions_with_different_answers_stay_apart():
+    corpus = [
+        _qa("kolkata weather in june", "Hot and humid, with the monsoon arriving mid-month."),
+        _qa("kolkata weather in july", "Heavy monsoon rain most days; carry an umbrella."),
+    ]
+    assert find_clusters(corpus) == []
+
+
+def test_members_unlike_the_first_still_cluster_together():
+    corpus = [
+        _qa("famous food of kolkata"),
+        _qa("places to visit in kolkata", "Victoria Memorial, Howrah Bridge and Park Street."),
+        _qa("places to visit in kolkata?", "Victoria Memorial, Howrah Bridge and Park Street."),
+        _qa("famous food of kolkata!"),
+    ]
+    assert find_clusters(corpus) == [[0, 3], [1, 2]]
@@ -0,0 +1,37 @@
+# tests/test_gazetteer.py
+
+import pytest
+
+from locgenai.gazetteer import canonicalize_entities, extract_entities, shard_for
+
+
+def test_entities_in_order_of_mention_without_repeats():
+    assert extract_entities("howrah bridge theke kalighat, then back to howrah bridge") == [
+        "howrah_bridge", "kalighat"]
+    assert extract_entities("haora to calcutta") == ["howrah", "kolkata"]
+
+
+def test_longest_alias_wins_and_words_stay_whole():
+    assert extract_entities("rabindra setu") == ["howrah_bridge"]
+    # "pujo" inside another word is not a festival
+    assert extract_entities("pujomondol") == []
+
+
+def test_bengali_script_aliases():
+    assert extract_entities("কলকাতার রসগোল্লা") == ["kolkata", "rosogolla"]
+
+
+def test_canonicalize_rewrites_mentions_only():
+    assert canonicalize_entities("Best phuchka in Calcutta?") == "best puchka in kolkata?"
+
+
+@pytest.mark.parametrize("spellings", [
+    ("how to reach howrah bridge", "how to reach haora bridge", "how to reach rabindra setu"),
+    ("kolkata sweets", "calcutta sweets", "kolkatta sweets"),
+])
+def test_spellings_of_one_place_share_a_shard(spellings):
+    assert len({shard_for(q, 8) for q in spellings}) == 1
+
+
+def test_single_shard():
+    assert shard_for("anything", 1) == 0
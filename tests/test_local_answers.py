@@ -0,0 +1,26 @@
+# tests/test_local_answers.py
+# tools/check_local_answers.py's cases, through both local answer paths.
+
+import importlib.util
+import os
+
+import pytest
+
+from conftest import REPO_ROOT
+
+_spec = importlib.util.spec_from_file_location(
+    "check_local_answers", os.path.join(REPO_ROOT, "tools", "check_local_answers.py"))
+check_local_answers = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_local_answers)
+CASES = check_local_answers.CASES
+
+
+@pytest.mark.parametrize("query, expected", CASES.items())
+def test_find_local_answer(wrapper, query, expected):
+    assert (wrapper.find_local_answer(query) or {}).get("q") == expected
+
+
+@pytest.mark.parametrize("query, expected", CASES.items())
+def test_local_backend(wrapper, query, expected):
+    answers = {item["a"]: item["q"] for item in wrapper.SEED_DATA}
+    assert answers.get(wrapper.LOCAL_BACKEND.generate(query)) == expected
@@ -0,0 +1,49 @@
+# tests/test_offload.py
+
+import os
+from concurrent.futures import Future
+
+from locgenai.offload import OffloadPool
+
+
+def _corpus(*questions):
+    return [{"q": q, "a": ""} for q in questions]
+
+
+def test_in_place_edit_republishes(tmp_path):
+    pool = OffloadPool(workers=0, directory=str(tmp_path))
+    corpus = _corpus("howrah bridge", "kolkata weather")
+    assert pool.best_match(corpus, "howrah bridge")[0] == 0
+    assert pool.best_match(corpus, "howrah bridge")[0] == 0
+    corpus[:] = _corpus("kolkata weather", "howrah bridge")
+    assert pool.best_match(corpus, "howrah bridge")[0] == 1
+    assert pool.stats["published"] == 2
+    pool.close()
+
+
+def test_index_in_use_outlives_republish(tmp_path):
+    pool = OffloadPool(workers=0, directory=str(tmp_path))
+    old = pool._pin(_corpus("howrah bridge"))
+    pool.publish(_corpus("kolkata weather"))
+    assert os.path.exists(old.path)
+    pool._unpin(old)
+    assert not os.path.exists(old.path)
+    pool.close()
+
+
+class _FailingExecutor:
+    def submit(self, *args):
+        future = Future()
+        future.set_exception(FileNotFoundError("index file is gone"))
+        return future
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+def test_worker_os_error_falls_back_in_process(tmp_path):
+    pool = OffloadPool(workers=2, directory=str(tmp_path))
+    pool._executor = _FailingExecutor()
+    assert pool.best_match(_corpus("howrah bridge", "kolkata weather"), "kolkata weather") == (1, 1.0)
+    assert pool.stats["errors"] == 1
+    pool.close()
@@ -0,0 +1,31 @@
+# tests/test_prompts.py
+
+from locgenai.prompts import DEFAULT_STYLE, get_template
+
+
+def test_templates_are_compiled_once_per_style_and_region():
+    assert get_template("code-mixed", "kolkata") is get_template("code-mixed", "kolkata")
+    # UI styles that alias one template share it
+    assert get_template(None) is get_template("english") is get_template(DEFAULT_STYLE)
+
+
+def test_key_names_style_version_and_region():
+    assert get_template("native", "kolkata").key == "native@v1/kolkata"
+    assert get_template("unknown-style").name == DEFAULT_STYLE
+
+
+def test_instruction_stays_out_of_the_rendered_text():
+    template = get_template("benglish", "kolkata")
+    assert template.render("  best phuchka?  ") == "best phuchka?"
+    assert "Kolkata and West Bengal" in template.system_instruction
+    assert "Benglish" in template.system_instruction
+
+
+def test_unknown_region_gets_the_bare_style_instruction():
+    template = get_template("benglish", "dhaka")
+    assert template.key == "benglish@v1/dhaka"
+    assert not template.system_instruction.startswith("You are LocGenAI")
+
+
+def test_rendering_does_not_expand_placeholders_in_the_query():
+    assert get_template().render("cost in $query or ${x}?") == "cost in $query or ${x}?"
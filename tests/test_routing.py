@@ -0,0 +1,40 @@
+# tests/test_routing.py
+
+import pytest
+
+from locgenai.routing import MODEL_CATALOG, ModelRouter, ModelStats, extract_features
+
+
+def _router(error_rates):
+    stats = ModelStats(clock=lambda: 0.0)
+    for model, rate in error_rates.items():
+        for i in range(10):
+            stats.record(model, 1.0, ok=i >= rate * 10)
+    return ModelRouter(weights={"cost": 1.0, "latency": 0.5, "error": 20.0, "tier": 50.0}, stats=stats)
+
+
+def test_healthy_models_route_trivial_queries_cheapest_first():
+    assert _router({}).plan(extract_features("roshogolla"))[0] == "gemini-2.5-flash-lite"
+
+
+@pytest.mark.parametrize("rate", [0.3, 1.0])
+def test_outage_of_every_model_keeps_trivial_queries_off_pro(rate):
+    plan = _router({m: rate for m in MODEL_CATALOG}).plan(extract_features("roshogolla"))
+    assert plan == ["gemini-2.5-flash-lite", "gemini-2.5-flash"]
+
+
+def test_failing_cheap_model_gives_way_to_the_next_one_up():
+    plan = _router({"gemini-2.5-flash-lite": 1.0}).plan(extract_features("roshogolla"))
+    assert plan[0] == "gemini-2.5-flash"
+
+
+def test_errors_on_the_models_tried_do_not_send_trivial_queries_to_pro():
+    # No API key: the two models tried fail, pro has never been called
+    router = _router({"gemini-2.5-flash-lite": 1.0, "gemini-2.5-flash": 1.0})
+    assert "gemini-2.5-pro" not in router.plan(extract_features("roshogolla"))
+
+
+def test_complex_queries_still_reach_pro():
+    query = ("plan a three day itinerary in kolkata covering food, heritage and festivals, "
+             "and also compare it with a trip to darjeeling? and what should I pack?")
+    assert _router({}).plan(extract_features(query))[0] == "gemini-2.5-pro"
@@ -0,0 +1,74 @@
+# tests/test_serve.py
+# The HTTP API charges admission per app session, as the client reports it.
+
+import threading
+
+import pytest
+
+from locgenai import serve
+from locgenai.admission import AdmissionController
+from locgenai.client import RemoteClient
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """A live server whose get_response admits against a one-call-per-session controller."""
+    admission = AdmissionController(rate_per_minute=0.001, burst=1)
+    seen = []
+
+    def get_response(prompt, language_style=None, region=None, session_id=None):
+        seen.append(session_id)
+        with admission.admit(session_id) as ticket:
+            return {"answer": "ok" if ticket.admitted else "shed", "sources": []}
+
+    monkeypatch.setattr(serve, "get_response", get_response)
+    monkeypatch.setattr(serve, "ADMISSION", None)
+    httpd = serve.LocGenAIServer(("127.0.0.1", 0), workers=2)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.seen = seen
+    yield httpd
+    httpd.shutdown()
+    httpd.drain()
+
+
+def _client(httpd):
+    return RemoteClient(f"http://127.0.0.1:{httpd.server_address[1]}")
+
+
+def test_app_sessions_are_admitted_independently(server):
+    client = _client(server)
+    assert client.get_response("howrah bridge", session_id="app-a")["answer"] == "ok"
+    assert client.get_response("howrah bridge", session_id="app-a")["answer"] == "shed"
+    # A second user of the same front end has its own budget
+    assert client.get_response("howrah bridge", session_id="app-b")["answer"] == "ok"
+    assert server.seen == ["app-a", "app-a", "app-b"]
+
+
+def test_session_is_taken_from_header_not_payload(server):
+    client = _client(server)
+    resp = client._session.post(f"{client.base_url}/query", json={"prompt": "x", "session_id": "spoofed"},
+                                headers={"X-Session-Id": "app-a"})
+    resp.raise_for_status()
+    assert server.seen == ["app-a"]
+
+
+def test_batch_items_carry_the_batch_session_only(server):
+    client = _client(server)
+    results = client.get_responses([{"prompt": "a", "session_id": "other"}, {"prompt": "b"}],
+                                   session_id="app-a")
+    assert [r["answer"] for r in results] == ["ok", "ok"]
+    # Items are answered without a session; the batch itself is not charged here
+    assert server.seen == [None, None]
+
+
+def test_stream_sends_the_session_header(server, monkeypatch):
+    sessions = []
+
+    def stream_response(prompt, language_style=None, region=None, session_id=None):
+        sessions.append(session_id)
+        yield "chunk"
+
+    monkeypatch.setattr(serve, "stream_response", stream_response)
+    assert list(_client(server).stream_response("x", session_id="app-b")) == ["chunk"]
+    assert sessions == ["app-b"]
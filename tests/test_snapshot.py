@@ -0,0 +1,77 @@
+# tests/test_snapshot.py
+
+import struct
+
+import pytest
+
+from locgenai import bm25
+from locgenai.bm25 import BM25Index
+from locgenai.snapshot import SnapshotManager, read_snapshot, write_snapshot
+
+SEED_HASH = bytes(range(32))
+CORPUS = [{"q": "famous sweets of kolkata", "a": "Roshogolla and sandesh."}]
+
+
+def _write(tmp_path, sections):
+    path = tmp_path / "runtime.snapshot"
+    write_snapshot(str(path), sections, SEED_HASH, created_at=123.0)
+    return path
+
+
+def test_round_trip(tmp_path):
+    path = _write(tmp_path, {"a": b"first", "b": b"second section"})
+    created_at, seed_hash, sections = read_snapshot(path.read_bytes())
+    assert (created_at, seed_hash) == (123.0, SEED_HASH)
+    assert {name: bytes(payload) for name, payload in sections.items()} == {
+        "a": b"first", "b": b"second section"}
+
+
+def test_corrupt_section_is_skipped(tmp_path):
+    data = bytearray(_write(tmp_path, {"a": b"first", "b": b"second section"}).read_bytes())
+    data[data.rindex(b"second")] ^= 0xFF
+    _, _, sections = read_snapshot(bytes(data))
+    assert list(sections) == ["a"]
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data.__setitem__(slice(0, 4), b"XXXX"),           # magic
+    lambda data: data.__setitem__(slice(4, 6), struct.pack("<H", 99)),  # format version
+    lambda data: data.__setitem__(16, data[16] ^ 0xFF),            # seed hash, under the header CRC
+    lambda data: data.__delitem__(slice(60, None)),                # truncated
+])
+def test_damaged_header_is_rejected(tmp_path, damage):
+    data = bytearray(_write(tmp_path, {"a": b"first"}).read_bytes())
+    damage(data)
+    with pytest.raises(ValueError):
+        read_snapshot(bytes(data))
+
+
+def _manager(tmp_path, seed_text, index=None):
+    seed = tmp_path / "seed.json"
+    seed.write_text(seed_text, encoding="utf-8")
+    return SnapshotManager(str(tmp_path / "runtime.snapshot"), str(seed), index=lambda: index)
+
+
+def test_manager_writes_only_on_change(tmp_path):
+    manager = _manager(tmp_path, "[]", BM25Index.build(CORPUS))
+    assert manager.write() and not manager.write()
+    assert manager.stats == {"writes": 1, "skipped": 1, "errors": 0, "restored": {}}
+
+
+def test_bm25_is_restored_only_for_the_seed_it_was_built_from(tmp_path):
+    index = BM25Index.build(CORPUS)
+    _manager(tmp_path, "[]", index).write()
+    try:
+        assert _manager(tmp_path, "[]").restore() == {"bm25": 1}
+        assert bm25.load_or_build(CORPUS).to_bytes() == index.to_bytes()
+        assert _manager(tmp_path, '[{"q": "changed"}]').restore() == {}
+        assert index.corpus_hash not in bm25._preloaded
+    finally:
+        bm25._preloaded.pop(index.corpus_hash, None)
+
+
+def test_missing_or_garbage_snapshot_restores_nothing(tmp_path):
+    manager = _manager(tmp_path, "[]")
+    assert manager.restore() == {}
+    (tmp_path / "runtime.snapshot").write_bytes(b"not a snapshot at all, just some text")
+    assert manager.restore() == {}
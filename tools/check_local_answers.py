@@ -0,0 +1,88 @@
+# tools/check_local_answers.py
+# Regression check for local answering: questions the seed data answers must
+# find their entry, and questions about other places or topics must find none
+# — through find_local_answer and through the local backend that factual
+# requests are routed to first.
+#
+#   python tools/check_local_answers.py            # exit status 1 on any failure
+#   python tools/check_local_answers.py --verbose
+#
+# A wrong local answer goes out without a model call, so the "no answer"
+# cases matter as much as the hits.
+
+import argparse
+import json
+import os
+import sys
+import warnings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_FILE = os.path.join(REPO_ROOT, "locgenai", "seed_qas (3).json")
+
+# query -> seed question it must be answered from (None: no local answer)
+CASES = {
+    # script, spelling and word-order variants
+    "famous food of kolkata": "famous food of kolkata",
+    "kolkata te ki khabo": "famous food of kolkata",
+    "কলকাতায় কী খাবো": "famous food of kolkata",
+    "Calcutta te ki khabo?": "famous food of kolkata",
+    "where is victoria memorial": "where is victoria memorial",
+    "victoria memorial kothay": "where is victoria memorial",
+    "kolkatar bhasha ki": "local language of kolkata",
+    "howrah bridge": "howrah bridge",
+    "what to eat in kolkata": "famous food of kolkata",
+    "festivals of kolkata": "kolkata festivals",
+    # a different question about the same thing
+    "when was victoria memorial built": None,
+    "victoria memorial ticket price": None,
+    "when is durga puja": None,
+    "durga puja kobe": None,
+    "how to reach howrah bridge": None,
+    # other places
+    "famous food of delhi": None,
+    "places to visit in delhi": None,
+    "chennai festivals": None,
+    "how to travel in mumbai": None,
+    "best time to visit darjeeling": None,
+    "local language of chennai": None,
+    # words that only look like a gazetteer entry
+    "diwali in delhi": None,
+    "Queen Victoria history": None,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check local answers against expected seed entries")
+    parser.add_argument("--seed", default=SEED_FILE)
+    parser.add_argument("--verbose", action="store_true", help="print passing cases too")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    os.environ.setdefault("LOCGENAI_OFFLINE", "1")
+    os.environ.setdefault("LOCGENAI_BM25_PATH", "")
+    sys.path.insert(0, REPO_ROOT)
+    import locgenai.model_wrapper as model_wrapper
+
+    with open(args.seed, "r", encoding="utf-8") as f:
+        model_wrapper.SEED_DATA[:] = json.load(f)
+
+    answers = {item["a"]: item["q"] for item in model_wrapper.SEED_DATA}
+    lookups = {
+        "find_local_answer": lambda q: (model_wrapper.find_local_answer(q) or {}).get("q"),
+        "local backend": lambda q: answers.get(model_wrapper.LOCAL_BACKEND.generate(q)),
+    }
+    failures = 0
+    for name, lookup in lookups.items():
+        for query, expected in CASES.items():
+            got = lookup(query)
+            ok = got == expected
+            failures += not ok
+            if args.verbose or not ok:
+                print(f"{'ok  ' if ok else 'FAIL'} {name}: {query!r}: expected {expected!r}, got {got!r}")
+    total = len(CASES) * len(lookups)
+    print(f"{total - failures}/{total} passed", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# tools/loadtest.py
+# Drive many concurrent AppTest sessions against app.py with a stubbed model
+# and report rerun latency, session memory and throughput.
+#
+#   python tools/loadtest.py                            # 1, 4, 16 sessions x 10 turns
+#   python tools/loadtest.py --sessions 8,32 --turns 20 --model-latency 0.5
+#   python tools/loadtest.py --json loadtest.json
+#
+# Every session runs in its own thread, and their model calls overlap in the
+# app's shared executor; all of them share this one process, so the numbers
+# are the capacity of a single app instance. AppTest installs a process-wide
+# mock runtime for each run, so script reruns themselves are serialized:
+# "rerun" latency is what a user waits (queueing included), "service" is
+# the script run alone. `get_response` is replaced with a stub that sleeps
+# like a model call and returns a fixed-size answer, so only the app's own
+# cost is measured.
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import types
+import warnings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Turn buckets the latency table is split into (conversation length so far)
+HISTORY_BUCKETS = (0, 5, 10, 20, 50, 100)
+
+
+def stub_get_response(latency: float, answer_words: int):
+    """Model stand-in: waits `latency` seconds, answers `answer_words` words."""
+    body = " ".join(["Kolkata"] * answer_words)
+
+    def get_response(prompt, language_style=None, region=None, session_id=None):
+        time.sleep(latency)
+        return {"answer": f"{prompt}: {body}", "sources": ["https://example.org/kolkata"], "backend": "stub"}
+
+    return get_response
+
+
+def deep_size(obj) -> int:
+    """Bytes reachable from `obj`, not counting modules, classes or functions."""
+    seen, stack, total = set(), [obj], 0
+    skip = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, skip):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        stack.extend(gc.get_referents(o))
+    return total
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource  # ru_maxrss is a high-water mark, but better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def bucket_of(turn: int) -> int:
+    return max(b for b in HISTORY_BUCKETS if b <= turn)
+
+# ───────────────────────────────────────────────
+# ONE SESSION
+# ───────────────────────────────────────────────
+
+_rerun_lock = threading.Lock()
+
+
+def timed_rerun(record: dict, turn: int, run):
+    """Call `run()` (one AppTest script run) under the rerun lock and time it."""
+    queued = time.perf_counter()
+    with _rerun_lock:
+        started = time.perf_counter()
+        result = run()
+        done = time.perf_counter()
+    record["reruns"].append((turn, done - queued))
+    record["service"].append(done - started)
+    return result
+
+
+def run_session(app_path: str, turns: int, settle_timeout: float, poll: float, record: dict, session_states: list):
+    """Hold one conversation of `turns` messages; timings go into `record`."""
+    from streamlit.testing.v1 import AppTest
+
+    at = timed_rerun(record, 0, AppTest.from_file(app_path, default_timeout=120).run)
+    for turn in range(turns):
+        turn_start = time.perf_counter()
+        at.text_area(key="user_input").input(f"question {turn} about kolkata")
+        timed_rerun(record, turn, [b for b in at.button if "Send" in str(b.label)][0].click().run)
+        # Poll reruns, as the app's fragment timer would, until the answer lands
+        deadline = time.perf_counter() + settle_timeout
+        while at.session_state["pending_jobs"] and time.perf_counter() < deadline:
+            time.sleep(poll)
+            timed_rerun(record, turn, at.run)
+        if at.exception:
+            record["errors"].append(str(at.exception))
+            break
+        if at.session_state["pending_jobs"]:
+            record["timeouts"] += 1
+        record["turns"].append(time.perf_counter() - turn_start)
+    session_states.append(at.session_state.to_dict())
+
+
+def run_level(app_path: str, sessions: int, turns: int, settle_timeout: float, poll: float) -> dict:
+    records = [{"reruns": [], "service": [], "turns": [], "errors": [], "timeouts": 0} for _ in range(sessions)]
+    states = []
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=run_session, args=(app_path, turns, settle_timeout, poll, r, states),
+                                name=f"loadtest-{i}") for i, r in enumerate(records)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - started
+    gc.collect()
+    rss_after = rss_bytes()
+
+    reruns = [(turn, s) for r in records for turn, s in r["reruns"]]
+    by_bucket = {}
+    for turn, seconds in reruns:
+        by_bucket.setdefault(bucket_of(turn), []).append(seconds)
+    turn_times = [s for r in records for s in r["turns"]]
+    state_sizes = [deep_size(s) for s in states]
+    return {
+        "sessions": sessions,
+        "turns": turns,
+        "wall_seconds": wall,
+        "turns_per_second": len(turn_times) / wall if wall else 0.0,
+        "reruns_per_second": len(reruns) / wall if wall else 0.0,
+        "rerun_ms": {p: percentile([s for _, s in reruns], p) * 1000 for p in (50, 95, 99)},
+        "service_ms": {p: percentile([s for r in records for s in r["service"]], p) * 1000 for p in (50, 95, 99)},
+        "rerun_ms_by_history": {
+            b: {p: percentile(v, p) * 1000 for p in (50, 95, 99)} for b, v in sorted(by_bucket.items())
+        },
+        "turn_ms": {p: percentile(turn_times, p) * 1000 for p in (50, 95, 99)},
+        "session_state_bytes": statistics.mean(state_sizes) if state_sizes else 0,
+        "rss_bytes_per_session": (rss_after - rss_before) / sessions,
+        "errors": sum(len(r["errors"]) for r in records),
+        "timeouts": sum(r["timeouts"] for r in records),
+    }
+
+# ───────────────────────────────────────────────
+# REPORT
+# ───────────────────────────────────────────────
+
+def print_report(results: list):
+    print(f"\n{'sessions':>8}{'turns/s':>9}{'reruns/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'service p50':>13}{'state KB':>10}{'RSS KB/sess':>13}{'errors':>8}")
+    for r in results:
+        print(f"{r['sessions']:>8}{r['turns_per_second']:>9.2f}{r['reruns_per_second']:>10.1f}"
+              f"{r['rerun_ms'][50]:>9.1f}{r['rerun_ms'][95]:>9.1f}{r['rerun_ms'][99]:>9.1f}"
+              f"{r['service_ms'][50]:>13.1f}"
+              f"{r['session_state_bytes'] / 1024:>10.1f}{r['rss_bytes_per_session'] / 1024:>13.0f}"
+              f"{r['errors'] + r['timeouts']:>8}")
+    print("\nRerun latency by conversation length (p50 / p95 ms):")
+    buckets = sorted({b for r in results for b in r["rerun_ms_by_history"]})
+    print(f"{'sessions':>8}" + "".join(f"{f'turn {b}+':>16}" for b in buckets))
+    for r in results:
+        cells = []
+        for b in buckets:
+            v = r["rerun_ms_by_history"].get(b)
+            cells.append(f"{v[50]:.1f} / {v[95]:.1f}" if v else "-")
+        print(f"{r['sessions']:>8}" + "".join(f"{c:>16}" for c in cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test app.py with concurrent AppTest sessions")
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"))
+    parser.add_argument("--sessions", default="1,4,16", help="comma-separated session counts")
+    parser.add_argument("--turns", type=int, default=10, help="messages per session")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="stubbed model call seconds")
+    parser.add_argument("--answer-words", type=int, default=120)
+    parser.add_argument("--poll", type=float, default=0.1, help="seconds between polling reruns")
+    parser.add_argument("--settle-timeout", type=float, default=30.0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    os.environ.setdefault("LOCGENAI_OFFLINE", "1")
+    os.environ.setdefault("LOCGENAI_PROFILE_RATE", "0")
+    os.environ.setdefault("LOCGENAI_SNAPSHOT", "0")  # measure a cold process, leave saved state alone
+    sys.path.insert(0, REPO_ROOT)
+
+    # app.py imports get_response from here on every rerun, so it sees the stub
+    import locgenai.model_wrapper as model_wrapper
+    model_wrapper.get_response = stub_get_response(args.model_latency, args.answer_words)
+    model_wrapper.preview_answer = lambda prompt: None
+
+    # Warm-up run: imports, caches and the shared executor are not per-session costs
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_file(os.path.abspath(args.app), default_timeout=120).run()
+
+    results = []
+    for sessions in (int(s) for s in args.sessions.split(",") if s.strip()):
+        print(f"⏱️ {sessions} sessions x {args.turns} turns ...", file=sys.stderr)
+        results.append(run_level(os.path.abspath(args.app), sessions, args.turns,
+                                 args.settle_timeout, args.poll))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# tools/rerun_payload.py
+# Measure the delta payload (bytes of element protos) Streamlit sends per rerun.
+#
+#   python tools/rerun_payload.py                 # current app.py
+#   git show <rev>:app.py > /tmp/app_old.py
+#   python tools/rerun_payload.py --app /tmp/app_old.py
+#
+# Streamlit re-sends every element's delta on each rerun, so the summed
+# serialized size of the element tree is what each chat message costs on
+# the wire (before transport compression).
+
+import argparse
+import os
+import sys
+import warnings
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def tree_bytes(node) -> int:
+    """Sum of serialized proto sizes for `node` and all its children."""
+    total = 0
+    proto = getattr(node, "proto", None)
+    if proto is not None and hasattr(proto, "ByteSize"):
+        total += proto.ByteSize()
+    children = getattr(node, "children", None) or {}
+    for child in (children.values() if isinstance(children, dict) else children):
+        total += tree_bytes(child)
+    return total
+
+
+def send(at, text: str):
+    at.text_area(key="user_input").input(text)
+    [b for b in at.button if "Send" in str(b.label)][0].click().run()
+
+
+def measure(app_path: str, turns: int) -> list:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.abspath(app_path), default_timeout=60).run()
+    rows = [("initial load", tree_bytes(at._tree))]
+    for i in range(turns):
+        send(at, f"hi {i}")
+        at.run()  # settle background answers
+        rows.append((f"after message {i + 1}", tree_bytes(at._tree)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Streamlit delta bytes per rerun")
+    parser.add_argument("--app", default=os.path.join(REPO_ROOT, "app.py"))
+    parser.add_argument("--turns", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    os.environ.setdefault("LOCGENAI_OFFLINE", "1")  # local answers only, no network
+    sys.path.insert(0, REPO_ROOT)
+
+    rows = measure(args.app, args.turns)
+    print(f"{'rerun':<20}{'delta bytes':>12}")
+    for label, size in rows:
+        print(f"{label:<20}{size:>12,}")
+
+
+if __name__ == "__main__":
+    main()